@@ -12,10 +12,79 @@ class Settings(BaseSettings):
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    token_cache_size: int = 10000
+    revocation_sync_seconds: float = 5.0
+    revocation_bloom_capacity: int = 100000
+    
+    # Login/registration rate limiting ("memory" or "redis")
+    rate_limit_backend: str = "memory"
+    redis_url: str = "redis://localhost:6379/0"
+    rate_limit_ip_burst: int = 20
+    rate_limit_ip_per_minute: float = 10.0
+    rate_limit_email_burst: int = 5
+    rate_limit_email_per_minute: float = 2.0
+    rate_limit_view_burst: int = 60
+    rate_limit_view_per_minute: float = 120.0
     
     # CORS
     frontend_url: str = "http://localhost:3000"
     
+    # Admission control; capacity should match the DB pool (pool_size + max_overflow)
+    admission_enabled: bool = True
+    admission_capacity: int = 15
+    
+    # Statement timeout for routes without a group budget
+    statement_timeout_ms: int = 5000
+    
+    # Slow-query log; echo logs every statement and is for local debugging only
+    sql_echo: bool = False
+    slow_query_threshold_ms: float = 200.0
+    slow_query_explain_sample_rate: float = 0.1
+    slow_query_explain_interval_seconds: float = 300.0
+    slow_query_explain_timeout_ms: int = 10000
+    slow_query_max_fingerprints: int = 1000
+    
+    # Tracing; exporter is "memory", "file" or "none"
+    tracing_exporter: str = "memory"
+    tracing_sample_rate: float = 0.01
+    tracing_file_path: str = "traces.jsonl"
+    
+    # Outbox worker (outbox_worker.py)
+    outbox_batch_size: int = 100
+    outbox_poll_interval_seconds: float = 1.0
+    outbox_lease_seconds: float = 60.0
+    outbox_max_attempts: int = 8
+    outbox_backoff_base_seconds: float = 2.0
+    outbox_backoff_max_seconds: float = 600.0
+    
+    # Live order updates over server-sent events
+    sse_heartbeat_seconds: float = 15.0
+    sse_retry_ms: int = 5000
+    sse_queue_size: int = 100
+    
+    # Product feed imports
+    product_import_batch_size: int = 5000
+    product_import_max_errors: int = 1000
+    
+    # Monthly order partitions and archival (archive_orders.py)
+    order_partitions_ahead: int = 3
+    order_partition_check_seconds: float = 21600.0
+    order_retention_months: int = 24
+    order_archive_dir: str = "archive"
+    
+    # Guest carts kept in a signed cookie until sign-in
+    guest_cart_max_items: int = 50
+    guest_cart_max_age_days: int = 30
+    
+    # Pricing used where no pricing rule applies
+    default_tax_percent: float = 18.0  # GST
+    default_shipping_fee: float = 200.0
+    free_shipping_over: float = 5000.0
+    cart_summary_cache_size: int = 10000
+    
+    # Request batching (POST /api/batch)
+    batch_max_requests: int = 20
+    
     # Environment
     environment: str = "development"
     
@@ -25,6 +94,24 @@ class Settings(BaseSettings):
     facebook_client_id: str = ""
     facebook_client_secret: str = ""
     
+    # Outbound HTTP to OAuth providers
+    oauth_http_timeout_seconds: float = 10.0
+    oauth_http_max_connections: int = 20
+    oidc_metadata_ttl_seconds: float = 3600.0
+    circuit_breaker_failure_threshold: int = 5
+    circuit_breaker_reset_seconds: float = 30.0
+    
+    # Product view analytics
+    view_buffer_size: int = 100000
+    view_flush_batch_size: int = 1000
+    view_flush_interval_seconds: float = 2.0
+    popularity_half_life_hours: float = 72.0
+    popularity_refresh_interval_seconds: float = 300.0
+    
+    # Sales analytics
+    analytics_timezone: str = "Asia/Kolkata"
+    analytics_refresh_interval_seconds: float = 300.0
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
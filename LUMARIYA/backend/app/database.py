@@ -1,20 +1,42 @@
+import asyncio
+from fastapi import HTTPException, Request, status
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import declarative_base, Session
 from app.config import get_settings
+from app.utils.disconnect import SCOPE_KEY, DisconnectGuard
+from app.utils.timeouts import (
+    statement_timeout_for,
+    cancels_on_disconnect,
+    is_query_canceled,
+    record_statement_timeout,
+    record_disconnect_cancellation,
+)
+from app.utils.tracing import tracer
 
 settings = get_settings()
 
 # Create async engine for PostgreSQL
 engine = create_async_engine(
     settings.database_url,
-    echo=settings.environment == "development",
+    echo=settings.sql_echo,
     future=True,
 )
 
+
+class TracedSession(AsyncSession):
+    """AsyncSession whose commits show up as spans in request traces."""
+
+    async def commit(self) -> None:
+        with tracer.span("db.commit"):
+            await super().commit()
+
+
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
-    class_=AsyncSession,
+    class_=TracedSession,
     expire_on_commit=False,
     autocommit=False,
     autoflush=False,
@@ -24,12 +46,67 @@ AsyncSessionLocal = async_sessionmaker(
 Base = declarative_base()
 
 
-async def get_db() -> AsyncSession:
-    """Dependency to get database session."""
-    async with AsyncSessionLocal() as session:
+@event.listens_for(Session, "after_begin")
+def apply_statement_timeout(session, transaction, connection):
+    """Apply the session's statement timeout to each transaction it begins."""
+    timeout_ms = session.info.get("statement_timeout_ms")
+    if timeout_ms:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+# Scope key of a session shared by the sub-requests of a batch (app/utils/batch.py)
+SHARED_SESSION_KEY = "shared_db_session"
+
+
+async def get_db(request: Request) -> AsyncSession:
+    """Dependency to get database session.
+
+    Statements run under the route's timeout budget. Routes marked read-only
+    in CANCEL_ON_DISCONNECT are cancelled, queries included, when the client
+    disconnects. Sub-requests of a batch
+    reuse the batch's session, which the batch closes.
+    """
+    shared = request.scope.get(SHARED_SESSION_KEY)
+    if shared is not None:
+        yield shared
+        return
+
+    guard = None
+    monitor = request.scope.get(SCOPE_KEY)
+    if monitor is not None and cancels_on_disconnect(request):
+        guard = DisconnectGuard(monitor)
+
+    # The span covers the pool checkout (and connect, for a new connection),
+    # so a request waiting on an exhausted pool shows it in its trace
+    with tracer.span("get_db"):
+        session = AsyncSessionLocal()
+        session.info["statement_timeout_ms"] = statement_timeout_for(request)
         try:
-            yield session
-        finally:
+            await session.connection()
+        except BaseException:
+            if guard is not None:
+                guard.stop()
+            await session.close()
+            raise
+
+    try:
+        yield session
+    except DBAPIError as e:
+        if not is_query_canceled(e):
+            raise
+        record_statement_timeout(request)
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="The request took too long, please try again",
+        ) from e
+    except asyncio.CancelledError:
+        if guard is not None and guard.triggered:
+            record_disconnect_cancellation(request)
+        raise
+    finally:
+        if guard is not None:
+            guard.stop()
+        with tracer.span("get_db.close"):
             await session.close()
 
 
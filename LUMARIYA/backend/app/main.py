@@ -1,12 +1,29 @@
 import os
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 
 from app.config import get_settings
-from app.database import init_db
-from app.routers import auth, products, cart, orders, users, oauth, admin
+from app.database import engine, init_db
+from app.routers import auth, products, cart, orders, users, oauth, admin, events, batch
+from app.utils.events import view_events
+from app.utils.import_jobs import import_jobs
+from app.utils.analytics import refresh_sales_rollup
+from app.utils.popularity import refresh_popularity
+from app.utils.jobs import PeriodicJob
+from app.utils.partitions import create_upcoming_partitions
+from app.utils.http import http_client
+from app.utils.revocation import sync_revocations
+from app.utils.rate_limit import bucket_store
+from app.utils.admission import AdmissionMiddleware, admission
+from app.utils.disconnect import DisconnectMiddleware
+from app.utils.metrics import MetricsMiddleware, instrument_engine, registry
+from app.utils.live_updates import live_updates, STREAM_PATHS
+from app.utils.slow_queries import slow_query_log
+from app.utils import query_budget
+from app.utils import tracing
 
 settings = get_settings()
 
@@ -14,12 +31,46 @@ settings = get_settings()
 STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static", "uploads")
 os.makedirs(STATIC_DIR, exist_ok=True)
 
+# Per-statement hooks: metrics, slow-query log, query budgets and tracing
+instrument_engine(engine.sync_engine)
+slow_query_log.instrument(engine.sync_engine)
+query_budget.instrument_engine(engine.sync_engine)
+tracing.instrument_engine(engine.sync_engine)
+
+# Order partitions for the coming months exist well before they are needed
+partition_job = PeriodicJob("order_partitions", create_upcoming_partitions, settings.order_partition_check_seconds)
+
+# Background jobs started with the application
+background_jobs = [
+    partition_job,
+    PeriodicJob("sales_rollup", refresh_sales_rollup, settings.analytics_refresh_interval_seconds),
+    PeriodicJob("popularity", refresh_popularity, settings.popularity_refresh_interval_seconds),
+    PeriodicJob("token_revocations", sync_revocations, settings.revocation_sync_seconds),
+]
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database on startup."""
+    """Initialize database and background work on startup, drain it on shutdown."""
     await init_db()
+    # Orders cannot be inserted until the current month's partition exists
+    await partition_job.run_once()
+    view_events.start()
+    slow_query_log.start()
+    live_updates.start()
+    import_jobs.start()
+    for job in background_jobs:
+        job.start()
     yield
+    for job in background_jobs:
+        await job.stop()
+    await import_jobs.stop()
+    await view_events.stop()
+    await slow_query_log.stop()
+    await live_updates.stop()
+    await http_client.close()
+    await bucket_store.close()
+    tracing.tracer.shutdown()
 
 
 # Create FastAPI application
@@ -30,6 +81,25 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Log routes that go over their query budget or repeat statements (N+1)
+if settings.environment == "development":
+    app.add_middleware(query_budget.QueryBudgetMiddleware)
+
+# Cancel reads whose client has gone away
+app.add_middleware(DisconnectMiddleware)
+
+# Shed load before requests queue on the DB pool
+if settings.admission_enabled:
+    app.add_middleware(AdmissionMiddleware, controller=admission)
+
+# Record latency, status and DB usage per route (outside admission, so
+# rejected and queued requests are measured too); event streams stay open
+# for hours and are counted by the sse_* metrics instead
+app.add_middleware(MetricsMiddleware, skip_paths=("/metrics",) + STREAM_PATHS)
+
+# Open a span per request, continuing the caller's W3C traceparent
+app.add_middleware(tracing.TracingMiddleware, skip_paths=("/metrics", "/health") + STREAM_PATHS)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -50,9 +120,12 @@ app.include_router(cart.router)
 app.include_router(orders.router)
 app.include_router(users.router)
 app.include_router(admin.router)
+app.include_router(events.router)
+app.include_router(batch.router)
 
 
 @app.get("/")
+@query_budget.query_budget(0)
 async def root():
     """Root endpoint."""
     return {
@@ -63,6 +136,13 @@ async def root():
 
 
 @app.get("/health")
+@query_budget.query_budget(0)
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Metrics in Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
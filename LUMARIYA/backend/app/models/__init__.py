@@ -2,7 +2,19 @@
 from app.models.user import User
 from app.models.product import Product
 from app.models.cart import Cart
-from app.models.order import Order, OrderItem
+from app.models.order import Order, OrderItem, OrderSummary
 from app.models.address import Address
+from app.models.catalog import CatalogVersion
+from app.models.recommendation import ProductCoPurchase, ProductRecommendation, RecommendationState
+from app.models.event import ProductView, ProductPopularity, PopularityState
+from app.models.analytics import SalesDailyRollup, SalesRollupState
+from app.models.token import RevokedToken
+from app.models.outbox import OutboxEvent
+from app.models.pricing import PricingRule
 
-__all__ = ["User", "Product", "Cart", "Order", "OrderItem", "Address"]
+__all__ = [
+    "User", "Product", "Cart", "Order", "OrderItem", "OrderSummary", "Address", "CatalogVersion",
+    "ProductCoPurchase", "ProductRecommendation", "RecommendationState",
+    "ProductView", "ProductPopularity", "PopularityState",
+    "SalesDailyRollup", "SalesRollupState", "RevokedToken", "OutboxEvent", "PricingRule",
+]
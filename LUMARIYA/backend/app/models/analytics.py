@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime
+from app.database import Base
+
+
+class SalesDailyRollup(Base):
+    """Per-day sales aggregates by category and order status.
+    
+    Rows with category "*" hold order-level totals (order total incl. tax and
+    shipping); per-category rows hold line revenue (price x quantity) and the
+    number of distinct orders containing that category.
+    """
+    
+    __tablename__ = "sales_daily_rollup"
+    
+    day = Column(Date, primary_key=True)
+    category = Column(String, primary_key=True)
+    status = Column(String, primary_key=True)
+    revenue = Column(Float, nullable=False, default=0.0)
+    order_count = Column(Integer, nullable=False, default=0)
+
+
+class SalesRollupState(Base):
+    """Single-row record of when the sales rollup was last refreshed."""
+    
+    __tablename__ = "sales_rollup_state"
+    
+    id = Column(Integer, primary_key=True)
+    last_refreshed_at = Column(DateTime(timezone=True), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, literal_column
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -17,6 +17,17 @@ class Cart(Base):
     color = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    # One row per product, size and color in a user's cart; guest carts are
+    # merged into it with an upsert on this index
+    __table_args__ = (
+        Index(
+            "ux_cart_user_product_options",
+            user_id, product_id,
+            func.coalesce(size, literal_column("''")), func.coalesce(color, literal_column("''")),
+            unique=True,
+        ),
+    )
+    
     # Relationships
     user = relationship("User", back_populates="cart_items")
     product = relationship("Product", back_populates="cart_items")
@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class ProductView(Base):
+    """Raw product-view event, written in batches by the view event buffer."""
+    
+    __tablename__ = "product_views"
+    
+    id = Column(BigInteger, primary_key=True)
+    product_id = Column(String, nullable=False, index=True)
+    viewed_at = Column(DateTime(timezone=True), nullable=False)  # When the view happened
+    recorded_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)  # When it was flushed
+
+
+class ProductPopularity(Base):
+    """Exponentially decayed view popularity of a product.
+    
+    Scores use forward decay: each view contributes exp(rate * (viewed_at - epoch))
+    and the log of the sum is stored, so scores of products that were not viewed
+    recently stay comparable without rewriting them on every refresh.
+    """
+    
+    __tablename__ = "product_popularity"
+    __table_args__ = (
+        Index("ix_product_popularity_log_score", "log_score"),
+    )
+    
+    product_id = Column(String, primary_key=True)
+    log_score = Column(Float, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class PopularityState(Base):
+    """Single-row watermark of the last product view folded into popularity scores."""
+    
+    __tablename__ = "popularity_state"
+    
+    id = Column(Integer, primary_key=True)
+    last_view_id = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,24 +1,34 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, ForeignKeyConstraint, DateTime, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
 
 class Order(Base):
-    """Order model for purchase records."""
+    """Order model for purchase records.
+    
+    Range-partitioned by month on created_at (see app/utils/partitions.py),
+    so the primary key includes created_at. Queries that bound created_at
+    only touch the matching partitions.
+    """
     
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_user_id_created_at", "user_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     status = Column(String, nullable=False, default="pending")  # pending, processing, shipped, delivered, cancelled
     total = Column(Float, nullable=False)
     subtotal = Column(Float, nullable=False)
     tax = Column(Float, nullable=False)
     shipping = Column(Float, nullable=False, default=0.0)
+    discount = Column(Float, nullable=False, default=0.0, server_default="0")
     shipping_address = Column(JSON)  # Store address as JSON
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), index=True)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), index=True)
     
     # Relationships
     user = relationship("User", back_populates="orders")
@@ -26,12 +36,24 @@ class Order(Base):
 
 
 class OrderItem(Base):
-    """Order item model for individual products in an order."""
+    """Order item model for individual products in an order.
+    
+    Partitioned like orders; created_at is the order's creation time, so an
+    order and its items always live in the same month.
+    """
     
     __tablename__ = "order_items"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["order_id", "created_at"], ["orders.id", "orders.created_at"], ondelete="CASCADE"
+        ),
+        Index("ix_order_items_order_id", "order_id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    order_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), primary_key=True)
     product_id = Column(String, ForeignKey("products.id", ondelete="SET NULL"))
     quantity = Column(Integer, nullable=False)
     price = Column(Float, nullable=False)  # Price at time of order
@@ -41,3 +63,29 @@ class OrderItem(Base):
     # Relationships
     order = relationship("Order", back_populates="items")
     product = relationship("Product", back_populates="order_items")
+
+
+class OrderSummary(Base):
+    """Read model with one narrow row per order for list pages.
+    
+    Written in the same transaction as the order and its status changes
+    (see app/utils/order_summaries.py), so order history and admin lists
+    read neither order_items nor the full order rows.
+    """
+    
+    __tablename__ = "order_summaries"
+    # order_id breaks ties between orders created at the same instant, so
+    # list pages can use (created_at, order_id) as their cursor
+    __table_args__ = (
+        Index("ix_order_summaries_user_id_created_at", "user_id", "created_at", "order_id"),
+        Index("ix_order_summaries_status_created_at", "status", "created_at", "order_id"),
+        Index("ix_order_summaries_created_at", "created_at", "order_id"),
+    )
+    
+    order_id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    status = Column(String, nullable=False)
+    total = Column(Float, nullable=False)
+    item_count = Column(Integer, nullable=False)  # Units across all lines
+    first_product_name = Column(String)
+    created_at = Column(DateTime(timezone=True), nullable=False)
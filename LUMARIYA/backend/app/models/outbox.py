@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, JSON, Index, text
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class OutboxEvent(Base):
+    """Side effect of a change, written in the same transaction as the change.
+    
+    The outbox worker claims pending rows with FOR UPDATE SKIP LOCKED and
+    hands them to the registered handlers. available_at is both the retry
+    time after a failure and the lease of a claimed row: a worker that dies
+    mid-batch leaves its rows to be claimed again once the lease runs out.
+    """
+    
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        Index("ix_outbox_events_pending", "available_at", "id",
+              postgresql_where=text("status = 'pending'")),
+    )
+    
+    id = Column(BigInteger, primary_key=True)
+    event_type = Column(String, nullable=False)  # e.g. order.created
+    aggregate_id = Column(String, nullable=False)  # Id of the changed row
+    payload = Column(JSON, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    processed_at = Column(DateTime(timezone=True))
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class PricingRule(Base):
+    """Tax, shipping and promotion rules applied by app/utils/pricing.py.
+    
+    A rule applies to one product, one category, or (neither set) the whole
+    cart. kind decides how percent, amount and min_subtotal are read:
+    - tax: percent of the line amount after discounts
+    - shipping: amount per order, free when the subtotal exceeds min_subtotal
+    - promotion: percent off, or amount off, the matching lines when they add
+      up to at least min_subtotal; with a code it is a coupon
+    All active rules are kept in memory; changing one bumps the catalog version.
+    """
+    
+    __tablename__ = "pricing_rules"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)  # tax, shipping, promotion
+    name = Column(String, nullable=False)
+    code = Column(String, unique=True)  # Coupon code, stored upper-case
+    category = Column(String)
+    product_id = Column(String, ForeignKey("products.id", ondelete="CASCADE"))
+    percent = Column(Float)
+    amount = Column(Float)
+    min_subtotal = Column(Float)
+    priority = Column(Integer, nullable=False, default=0)  # Higher wins among rules of one scope
+    active = Column(Boolean, nullable=False, default=True)
+    starts_at = Column(DateTime(timezone=True))
+    ends_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
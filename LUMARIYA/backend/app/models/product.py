@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, JSON, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -8,6 +9,20 @@ class Product(Base):
     """Product model for e-commerce catalog."""
     
     __tablename__ = "products"
+    __table_args__ = (
+        # Containment (@>) lookups for material/color filters
+        Index("ix_products_materials", "materials", postgresql_using="gin",
+              postgresql_ops={"materials": "jsonb_path_ops"}),
+        Index("ix_products_colors", "colors", postgresql_using="gin",
+              postgresql_ops={"colors": "jsonb_path_ops"}),
+        Index("ix_products_details", "details", postgresql_using="gin",
+              postgresql_ops={"details": "jsonb_path_ops"}),
+        # Price range filters and sort options
+        Index("ix_products_price", "price", "id"),
+        Index("ix_products_category_price", "category", "price"),
+        Index("ix_products_created_at", "created_at"),
+        Index("ix_products_name", "name"),
+    )
     
     id = Column(String, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -17,10 +32,10 @@ class Product(Base):
     long_description = Column(Text)
     image = Column(String)
     hover_image = Column(String)
-    materials = Column(JSON)  # Array of materials
+    materials = Column(JSONB)  # Array of materials
     care = Column(JSON)  # Array of care instructions
-    details = Column(JSON)  # Array of detail points
-    colors = Column(JSON)  # Array of color objects with availability
+    details = Column(JSONB)  # Array of detail points
+    colors = Column(JSONB)  # Array of color objects with availability
     made_in = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class ProductCoPurchase(Base):
+    """Number of orders in which two products were bought together."""
+    
+    __tablename__ = "product_copurchases"
+    
+    product_id = Column(String, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    related_id = Column(String, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class ProductRecommendation(Base):
+    """Precomputed top-k "frequently bought together" products for a product."""
+    
+    __tablename__ = "product_recommendations"
+    
+    product_id = Column(String, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    related_ids = Column(ARRAY(String), nullable=False)  # Ordered by score, best first
+    scores = Column(ARRAY(Integer), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class RecommendationState(Base):
+    """Single-row watermark of the last order processed by the recommendation job."""
+    
+    __tablename__ = "recommendation_state"
+    
+    id = Column(Integer, primary_key=True)
+    last_order_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -16,6 +16,7 @@ class User(Base):
     oauth_provider = Column(String, nullable=True)  # 'google', 'facebook', or None for email
     oauth_id = Column(String, nullable=True)  # Provider's user ID
     is_admin = Column(Integer, default=0, nullable=False)  # 0 = normal user, 1 = admin
+    cart_version = Column(Integer, default=0, server_default="0", nullable=False)  # Bumped by cart changes
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
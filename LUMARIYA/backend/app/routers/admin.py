@@ -1,17 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from sqlalchemy.orm import selectinload
-from typing import List
+from typing import List, Optional
+from datetime import date, datetime, timedelta
+import asyncio
+import tempfile
 import os
 import uuid
 import shutil
+from zoneinfo import ZoneInfo
 
+from app.config import get_settings
 from app.database import get_db
 from app.models.user import User
-from app.models.order import Order, OrderItem
+from app.models.order import Order, OrderSummary
 from app.models.product import Product
-from app.utils.auth import get_current_user
+from app.models.pricing import PricingRule
+from app.utils.auth import get_stream_token, get_stream_user, require_admin, token_revoked
+from app.utils.analytics import sales_timeseries
+from app.utils.slow_queries import slow_query_log
+from app.utils.tracing import tracer, InMemoryExporter
+from app.utils.query_budget import query_budget
+from app.utils.live_updates import live_updates, event_stream, ADMIN_TOPIC
+from app.utils.order_events import admin_stat_deltas, ORDER_TRANSITIONS
+from app.utils.bulk_updates import bulk_update_order_status, bulk_update_prices
+from app.schemas.order import BulkOrderStatusUpdate
+from app.schemas.product import BulkPriceUpdate
+from app.schemas.pricing import PricingRuleCreate, PricingRuleResponse
+from app.utils.catalog import bump_catalog_version
+from app.utils.pricing import RULE_KINDS
+from app.utils.order_summaries import page_cursor
+from app.utils.product_import import detect_format
+from app.utils.import_jobs import import_jobs
+from app.routers.orders import SSE_HEADERS
+
+settings = get_settings()
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
 
@@ -20,17 +45,8 @@ UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
-async def require_admin(current_user: User = Depends(get_current_user)):
-    """Dependency that requires admin access."""
-    if current_user.is_admin != 1:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Admin access required"
-        )
-    return current_user
-
-
 @router.get("/stats")
+@query_budget(6)
 async def get_admin_stats(
     admin: User = Depends(require_admin),
     db: AsyncSession = Depends(get_db)
@@ -68,49 +84,424 @@ async def get_admin_stats(
     }
 
 
+@router.get("/stream")
+@query_budget(1)
+async def stream_admin_updates(
+    current_user: User = Depends(get_stream_user),
+    token: dict = Depends(get_stream_token),
+):
+    """Server-sent events for new orders and status changes, with statsDelta
+    holding the change to apply to the /stats counters."""
+    await require_admin(current_user)
+    return StreamingResponse(
+        event_stream(live_updates, ADMIN_TOPIC, settings.sse_heartbeat_seconds, transform=admin_stat_deltas,
+                     expires_at=token.get("exp"), revoked=lambda: token_revoked(token)),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+@router.get("/analytics")
+@query_budget(4)
+async def get_sales_analytics(
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    admin: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get revenue, order count and average order value over time."""
+    # Days are bucketed in the analytics timezone, so today is taken there too
+    end = end or datetime.now(ZoneInfo(settings.analytics_timezone)).date()
+    start = start or end - timedelta(days=30)
+    
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be on or before end"
+        )
+    
+    return await sales_timeseries(db, granularity, start, end)
+
+
+@router.get("/slow-queries")
+@query_budget(1)
+async def list_slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    sort: str = Query("total", pattern="^(total|mean|max)$"),
+    admin: User = Depends(require_admin)
+):
+    """Top query fingerprints by time spent, with captured plans."""
+    return {
+        "thresholdMs": slow_query_log.threshold * 1000,
+        "fingerprints": len(slow_query_log.stats),
+        "droppedFingerprints": slow_query_log.dropped_fingerprints,
+        "queries": slow_query_log.top(limit, sort),
+    }
+
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(1)
+async def reset_slow_queries(admin: User = Depends(require_admin)):
+    """Clear collected query statistics."""
+    slow_query_log.reset()
+
+
+@router.get("/traces")
+@query_budget(1)
+async def list_recent_traces(
+    limit: int = Query(20, ge=1, le=200),
+    admin: User = Depends(require_admin)
+):
+    """Most recent sampled request traces (in-memory exporter only)."""
+    if not isinstance(tracer.exporter, InMemoryExporter):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Traces are not kept in memory"
+        )
+    tracer.flush()
+    return tracer.exporter.traces(limit)
+
+
 @router.get("/orders")
+@query_budget(2)
 async def list_all_orders(
+    limit: int = Query(100, ge=1, le=500),
+    before: Optional[datetime] = None,
+    before_id: Optional[int] = None,
+    order_status: Optional[str] = Query(None, alias="status"),
     admin: User = Depends(require_admin),
     db: AsyncSession = Depends(get_db)
 ):
-    """List all orders for admin view."""
+    """List orders for admin view, newest first, from their summaries.
+    
+    Pages with before and before_id (the created_at and id of the last
+    order shown). Items, prices and the address are in
+    GET /api/admin/orders/{order_id}.
+    """
+    query = (
+        select(OrderSummary, User.full_name, User.email)
+        .outerjoin(User, User.id == OrderSummary.user_id)
+    )
+    if before is not None:
+        query = query.where(page_cursor(before, before_id))
+    if order_status is not None:
+        query = query.where(OrderSummary.status == order_status)
     result = await db.execute(
-        select(Order)
-        .options(selectinload(Order.items), selectinload(Order.user))
-        .order_by(Order.created_at.desc())
+        query
+        .order_by(OrderSummary.created_at.desc(), OrderSummary.order_id.desc())
+        .limit(limit)
     )
-    orders = result.scalars().all()
 
     return [
         {
-            "id": order.id,
-            "status": order.status,
-            "total": order.total,
-            "subtotal": order.subtotal,
-            "tax": order.tax,
-            "shipping": order.shipping,
-            "shipping_address": order.shipping_address,
-            "created_at": order.created_at.isoformat() if order.created_at else None,
-            "customer_name": order.user.full_name if order.user else "Unknown",
-            "customer_email": order.user.email if order.user else "Unknown",
-            "items": [
-                {
-                    "id": item.id,
-                    "product_id": item.product_id,
-                    "product_name": item.product_name,
-                    "quantity": item.quantity,
-                    "price": item.price,
-                    "size": item.size,
-                    "color": item.color
-                }
-                for item in order.items
-            ]
+            "id": summary.order_id,
+            "status": summary.status,
+            "total": summary.total,
+            "item_count": summary.item_count,
+            "first_product_name": summary.first_product_name,
+            "created_at": summary.created_at.isoformat(),
+            "customer_name": full_name or "Unknown",
+            "customer_email": email or "Unknown",
         }
-        for order in orders
+        for summary, full_name, email in result.all()
     ]
 
 
+@router.get("/orders/{order_id}")
+@query_budget(4)
+async def get_order_details(
+    order_id: int,
+    admin: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get an order with its items and customer for admin view."""
+    result = await db.execute(
+        select(Order)
+        .options(selectinload(Order.items), selectinload(Order.user))
+        .where(Order.id == order_id)
+    )
+    order = result.scalar_one_or_none()
+
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
+
+    return {
+        "id": order.id,
+        "status": order.status,
+        "total": order.total,
+        "subtotal": order.subtotal,
+        "tax": order.tax,
+        "shipping": order.shipping,
+        "discount": order.discount,
+        "shipping_address": order.shipping_address,
+        "created_at": order.created_at.isoformat(),
+        "customer_name": order.user.full_name if order.user else "Unknown",
+        "customer_email": order.user.email if order.user else "Unknown",
+        "items": [
+            {
+                "id": item.id,
+                "product_id": item.product_id,
+                "product_name": item.product_name,
+                "quantity": item.quantity,
+                "price": item.price,
+                "color": item.color
+            }
+            for item in order.items
+        ]
+    }
+
+
+@router.put("/orders/status")
+@query_budget(4)
+async def bulk_update_orders(
+    update_data: BulkOrderStatusUpdate,
+    admin: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Move a list of orders, or up to 1000 orders matching a filter, to a new status.
+    
+    Orders whose current status does not allow the transition are left
+    unchanged and reported per id. When "more" is true the filter matched
+    more orders; repeat the call to process them.
+    """
+    if update_data.new_status not in ORDER_TRANSITIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid status. Must be one of: {', '.join(ORDER_TRANSITIONS)}"
+        )
+    if update_data.order_ids is None and update_data.filter is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide order_ids or a filter"
+        )
+
+    order_filter = update_data.filter
+    if order_filter and update_data.new_status not in ORDER_TRANSITIONS.get(order_filter.status, ()):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Orders cannot move from {order_filter.status} to {update_data.new_status}"
+        )
+
+    summary = await bulk_update_order_status(
+        db,
+        update_data.new_status,
+        order_ids=update_data.order_ids,
+        from_status=order_filter.status if order_filter else None,
+        created_after=order_filter.created_after if order_filter else None,
+        created_before=order_filter.created_before if order_filter else None,
+    )
+    await db.commit()
+
+    return summary
+
+
+@router.put("/products/prices")
+@query_budget(3)
+async def bulk_update_product_prices(
+    update_data: BulkPriceUpdate,
+    admin: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Change the prices of a category and/or a set of products by a percentage or an amount."""
+    if update_data.category is None and update_data.product_ids is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide a category or product_ids"
+        )
+    if (update_data.percent is None) == (update_data.amount is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide exactly one of percent or amount"
+        )
+
+    summary = await bulk_update_prices(
+        db,
+        category=update_data.category,
+        product_ids=update_data.product_ids,
+        percent=update_data.percent,
+        amount=update_data.amount,
+    )
+    await db.commit()
+
+    return summary
+
+
+@router.post("/products/import", status_code=status.HTTP_202_ACCEPTED)
+@query_budget(1)
+async def import_products(
+    file: UploadFile = File(...),
+    admin: User = Depends(require_admin)
+):
+    """Queue an upsert of products from a CSV or NDJSON feed.
+    
+    The upload is saved and imported in the background; poll
+    GET /products/import/{job_id} for its progress and, once done, the
+    counts of inserted, updated, unchanged and failed rows and the first
+    row-level validation errors. For very large feeds use
+    import_products.py, which prints progress as it goes.
+    """
+    try:
+        fmt = detect_format(file.filename or "")
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    def save() -> str:
+        with tempfile.NamedTemporaryFile("wb", suffix=os.path.splitext(file.filename)[1], delete=False) as f:
+            shutil.copyfileobj(file.file, f)
+            return f.name
+
+    path = await asyncio.to_thread(save)
+    return import_jobs.submit(path, fmt, file.filename).to_dict()
+
+
+@router.get("/products/import/{job_id}")
+@query_budget(1)
+async def get_import_job(
+    job_id: str,
+    admin: User = Depends(require_admin)
+):
+    """Status and progress of a product import."""
+    job = import_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found"
+        )
+    return job.to_dict()
+
+
+async def _check_pricing_rule(db: AsyncSession, rule_data: PricingRuleCreate, rule_id: Optional[int] = None) -> None:
+    """Raise 400 for a rule whose fields do not fit its kind."""
+    problem = None
+    if rule_data.kind not in RULE_KINDS:
+        problem = f"Invalid kind. Must be one of: {', '.join(RULE_KINDS)}"
+    elif rule_data.category is not None and rule_data.product_id is not None:
+        problem = "Provide at most one of category or product_id"
+    elif rule_data.code is not None and rule_data.kind != "promotion":
+        problem = "Only promotions can have a coupon code"
+    elif rule_data.kind == "tax" and rule_data.percent is None:
+        problem = "Tax rules need a percent"
+    elif rule_data.kind == "shipping" and (rule_data.amount is None or rule_data.category or rule_data.product_id):
+        problem = "Shipping rules need an amount and cover the whole cart"
+    elif rule_data.kind == "promotion" and (rule_data.percent is None) == (rule_data.amount is None):
+        problem = "Promotions need exactly one of percent or amount"
+    elif rule_data.starts_at and rule_data.ends_at and rule_data.ends_at <= rule_data.starts_at:
+        problem = "ends_at must be after starts_at"
+    elif rule_data.product_id is not None:
+        result = await db.execute(select(Product.id).where(Product.id == rule_data.product_id))
+        if result.scalar() is None:
+            problem = f"Product {rule_data.product_id} not found"
+    if problem is None and rule_data.code is not None:
+        result = await db.execute(
+            select(PricingRule.id).where(PricingRule.code == rule_data.code, PricingRule.id != rule_id)
+        )
+        if result.scalar() is not None:
+            problem = f"Coupon code {rule_data.code} already exists"
+    if problem is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=problem
+        )
+
+
+@router.get("/pricing-rules", response_model=List[PricingRuleResponse])
+@query_budget(2)
+async def list_pricing_rules(
+    admin: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """List tax, shipping and promotion rules."""
+    result = await db.execute(
+        select(PricingRule).order_by(PricingRule.kind, PricingRule.priority.desc(), PricingRule.id)
+    )
+    return result.scalars().all()
+
+
+@router.post("/pricing-rules", response_model=PricingRuleResponse, status_code=status.HTTP_201_CREATED)
+@query_budget(6)
+async def create_pricing_rule(
+    rule_data: PricingRuleCreate,
+    admin: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Create a pricing rule; carts and checkout use it from the next request."""
+    if rule_data.code is not None:
+        rule_data.code = rule_data.code.strip().upper()
+    await _check_pricing_rule(db, rule_data)
+
+    rule = PricingRule(**rule_data.model_dump())
+    db.add(rule)
+    await bump_catalog_version(db)
+    await db.commit()
+    await db.refresh(rule)
+
+    return rule
+
+
+@router.put("/pricing-rules/{rule_id}", response_model=PricingRuleResponse)
+@query_budget(7)
+async def update_pricing_rule(
+    rule_id: int,
+    rule_data: PricingRuleCreate,
+    admin: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Replace a pricing rule."""
+    result = await db.execute(select(PricingRule).where(PricingRule.id == rule_id))
+    rule = result.scalar_one_or_none()
+
+    if not rule:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pricing rule not found"
+        )
+
+    if rule_data.code is not None:
+        rule_data.code = rule_data.code.strip().upper()
+    await _check_pricing_rule(db, rule_data, rule_id)
+
+    for field, value in rule_data.model_dump().items():
+        setattr(rule, field, value)
+    await bump_catalog_version(db)
+    await db.commit()
+    await db.refresh(rule)
+
+    return rule
+
+
+@router.delete("/pricing-rules/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(4)
+async def delete_pricing_rule(
+    rule_id: int,
+    admin: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Delete a pricing rule."""
+    result = await db.execute(select(PricingRule).where(PricingRule.id == rule_id))
+    rule = result.scalar_one_or_none()
+
+    if not rule:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pricing rule not found"
+        )
+
+    await db.delete(rule)
+    await bump_catalog_version(db)
+    await db.commit()
+
+    return None
+
+
 @router.get("/users")
+@query_budget(2)
 async def list_all_users(
     admin: User = Depends(require_admin),
     db: AsyncSession = Depends(get_db)
@@ -135,6 +526,7 @@ async def list_all_users(
 
 
 @router.put("/users/{user_id}/role")
+@query_budget(3)
 async def update_user_role(
     user_id: int,
     admin: User = Depends(require_admin),
@@ -164,6 +556,7 @@ async def update_user_role(
 
 
 @router.post("/upload-image")
+@query_budget(1)
 async def upload_image(
     file: UploadFile = File(...),
     admin: User = Depends(require_admin)
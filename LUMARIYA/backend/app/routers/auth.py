@@ -1,19 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from datetime import datetime, timezone
 
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin, UserResponse, Token
 from app.utils.security import verify_password, get_password_hash
-from app.utils.auth import create_access_token, get_current_user
+from app.utils.auth import create_access_token, get_current_user, decode_access_token, security
+from app.utils.revocation import revocations, revoke_token
+from app.utils.rate_limit import RateLimit
+from app.utils.query_budget import query_budget
+from app.utils.guest_cart import adopt_guest_cart
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
 
-@router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
-    """Register a new user and return access token."""
+@router.post(
+    "/register",
+    response_model=Token,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(RateLimit("register"))]
+)
+@query_budget(5)
+async def register(
+    user_data: UserCreate,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
+    """Register a new user and return access token.
+    
+    A guest cart kept in the visitor's cookie becomes the user's cart.
+    """
     # Check if user already exists
     result = await db.execute(select(User).where(User.email == user_data.email))
     existing_user = result.scalar_one_or_none()
@@ -36,15 +56,27 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     await db.commit()
     await db.refresh(new_user)
     
+    await adopt_guest_cart(request, response, db, new_user.id)
+    await db.commit()
+    
     # Create and return access token
     access_token = create_access_token(data={"sub": new_user.id})
     
     return {"access_token": access_token, "token_type": "bearer"}
 
 
-@router.post("/login", response_model=Token)
-async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
-    """Login and receive JWT token."""
+@router.post("/login", response_model=Token, dependencies=[Depends(RateLimit("login"))])
+@query_budget(3)
+async def login(
+    credentials: UserLogin,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
+    """Login and receive JWT token.
+    
+    A guest cart kept in the visitor's cookie is merged into the user's cart.
+    """
     # Find user by email
     result = await db.execute(select(User).where(User.email == credentials.email))
     user = result.scalar_one_or_none()
@@ -56,6 +88,9 @@ async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    await adopt_guest_cart(request, response, db, user.id)
+    await db.commit()
+    
     # Create access token
     access_token = create_access_token(data={"sub": user.id})
     
@@ -63,6 +98,26 @@ async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/me", response_model=UserResponse)
+@query_budget(1)
 async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user profile."""
     return current_user
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(2)
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Revoke the current access token."""
+    payload = decode_access_token(credentials.credentials)
+    
+    if payload.get("jti"):
+        expires_at = datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
+        await revoke_token(db, payload["jti"], expires_at, user_id=current_user.id)
+        await db.commit()
+        revocations.add(payload["jti"], expires_at.timestamp())
+    
+    return None
@@ -0,0 +1,59 @@
+import math
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.schemas.batch import BatchRequest
+from app.utils.admission import AdmissionRejected
+from app.utils.auth import optional_security
+from app.utils.batch import BatchDispatcher, BATCH_PATH
+from app.utils.query_budget import query_budget
+
+settings = get_settings()
+
+router = APIRouter(prefix=BATCH_PATH, tags=["Batch"])
+
+
+@router.post("")
+@query_budget(1)
+async def run_batch(
+    batch: BatchRequest,
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+):
+    """Run several API calls in one round trip.
+    
+    Sub-requests run in order and each gets its own status, headers and
+    body in the response. The Authorization header, if any, is checked once
+    and applies to all of them; each sub-request is still admitted, and
+    held to its route's query budget, on its own. The batch's session only
+    takes a pooled connection once admitted (see BatchDispatcher).
+    """
+    if len(batch.requests) > settings.batch_max_requests:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch can hold at most {settings.batch_max_requests} requests"
+        )
+    
+    dispatcher = getattr(request.app.state, "batch_dispatcher", None)
+    if dispatcher is None:
+        dispatcher = request.app.state.batch_dispatcher = BatchDispatcher(request.app)
+    
+    async with AsyncSessionLocal() as db:
+        try:
+            user = await dispatcher.authenticate(request, credentials, db) if credentials else None
+        except AdmissionRejected as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry shortly",
+                headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+            )
+        responses, cookies = await dispatcher.run(request.scope, batch.requests, db, user)
+    
+    response = JSONResponse({"responses": responses})
+    response.raw_headers.extend((b"set-cookie", cookie) for cookie in cookies)
+    return response
@@ -1,20 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import selectinload
-from typing import List
+from typing import Dict, List, Optional
+from datetime import datetime, timezone
 
 from app.database import get_db
 from app.models.user import User
 from app.models.cart import Cart
 from app.models.product import Product
-from app.schemas.cart import CartItemCreate, CartItemUpdate, CartItemResponse
+from app.schemas.cart import (
+    CartItemCreate,
+    CartItemUpdate,
+    CartItemResponse,
+    GuestCartItemResponse,
+    CartPriceSummary,
+)
+from app.schemas.product import ProductResponse
 from app.utils.auth import get_current_user
+from app.utils.query_budget import query_budget
+from app.utils.guest_cart import (
+    CART_LINE_KEY,
+    GuestCartFull,
+    GuestCartLine,
+    read_guest_cart,
+    write_guest_cart,
+    clear_guest_cart,
+    load_products,
+    merge_lines,
+    cart_option,
+)
+from app.utils.catalog import get_catalog_version
+from app.utils.pricing import InvalidCoupon, PricingLine, bump_cart_version, cart_summary, get_pricing_rules
 
 router = APIRouter(prefix="/api/cart", tags=["Cart"])
 
 
 @router.get("/", response_model=List[CartItemResponse])
+@query_budget(3)
 async def get_cart(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
@@ -30,63 +54,66 @@ async def get_cart(
     return cart_items
 
 
+@router.get("/summary", response_model=CartPriceSummary)
+@query_budget(4)
+async def get_cart_summary(
+    coupon: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the cart's subtotal, discount, tax, shipping and total.
+    
+    Summaries are cached until the cart, the catalog or the pricing rules
+    change, so repeated calls only check the catalog version.
+    """
+    try:
+        return await cart_summary(db, current_user, coupon)
+    except InvalidCoupon as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
 @router.post("/items", response_model=CartItemResponse, status_code=status.HTTP_201_CREATED)
+@query_budget(6)
 async def add_to_cart(
     item_data: CartItemCreate,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Add an item to cart."""
+    """Add an item to cart, or add to its quantity if the product, size and color are there."""
     # Verify product exists
-    result = await db.execute(select(Product).where(Product.id == item_data.product_id))
-    product = result.scalar_one_or_none()
+    result = await db.execute(select(Product.id).where(Product.id == item_data.product_id))
     
-    if not product:
+    if result.scalar_one_or_none() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
     
-    # Check if item already in cart with same size/color
-    result = await db.execute(
-        select(Cart).where(
-            Cart.user_id == current_user.id,
-            Cart.product_id == item_data.product_id,
-            Cart.size == item_data.size,
-            Cart.color == item_data.color
-        )
-    )
-    existing_item = result.scalar_one_or_none()
-    
-    if existing_item:
-        # Update quantity
-        existing_item.quantity += item_data.quantity
-        await db.commit()
-        await db.refresh(existing_item)
-        
-        # Load product relationship
-        result = await db.execute(
-            select(Cart)
-            .options(selectinload(Cart.product))
-            .where(Cart.id == existing_item.id)
-        )
-        cart_item = result.scalar_one()
-        return cart_item
-    
-    # Create new cart item
-    new_item = Cart(
+    # An upsert on the unique index, so concurrent adds of one line cannot both insert
+    stmt = insert(Cart).values(
         user_id=current_user.id,
-        **item_data.model_dump()
+        product_id=item_data.product_id,
+        quantity=item_data.quantity,
+        size=cart_option(item_data.size),
+        color=cart_option(item_data.color),
     )
-    db.add(new_item)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=CART_LINE_KEY,
+        set_={"quantity": Cart.quantity + stmt.excluded.quantity},
+    ).returning(Cart.id)
+    result = await db.execute(stmt)
+    item_id = result.scalar_one()
+    await bump_cart_version(db, current_user.id)
     await db.commit()
-    await db.refresh(new_item)
     
     # Load product relationship
     result = await db.execute(
         select(Cart)
         .options(selectinload(Cart.product))
-        .where(Cart.id == new_item.id)
+        .where(Cart.id == item_id)
     )
     cart_item = result.scalar_one()
     
@@ -94,6 +121,7 @@ async def add_to_cart(
 
 
 @router.put("/items/{item_id}", response_model=CartItemResponse)
+@query_budget(7)
 async def update_cart_item(
     item_id: int,
     item_data: CartItemUpdate,
@@ -116,6 +144,7 @@ async def update_cart_item(
         )
     
     cart_item.quantity = item_data.quantity
+    await bump_cart_version(db, current_user.id)
     await db.commit()
     await db.refresh(cart_item)
     
@@ -131,6 +160,7 @@ async def update_cart_item(
 
 
 @router.delete("/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(4)
 async def remove_from_cart(
     item_id: int,
     current_user: User = Depends(get_current_user),
@@ -152,25 +182,180 @@ async def remove_from_cart(
         )
     
     await db.delete(cart_item)
+    await bump_cart_version(db, current_user.id)
     await db.commit()
     
     return None
 
 
 @router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(3)
 async def clear_cart(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Clear all items from cart."""
-    result = await db.execute(
-        select(Cart).where(Cart.user_id == current_user.id)
+    await db.execute(delete(Cart).where(Cart.user_id == current_user.id))
+    await bump_cart_version(db, current_user.id)
+    await db.commit()
+    
+    return None
+
+
+# Guest cart endpoints: the cart of a visitor who is not signed in lives in a
+# signed cookie and is merged into the cart table on sign-in
+def _guest_items(lines: List[GuestCartLine], products: Dict[str, ProductResponse]) -> List[dict]:
+    return [
+        {"id": position, **line._asdict(), "product": products[line.product_id]}
+        for position, line in enumerate(lines)
+    ]
+
+
+def _save_guest_cart(response: Response, lines: List[GuestCartLine]) -> None:
+    try:
+        write_guest_cart(response, lines)
+    except GuestCartFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+async def _load_guest_cart(
+    request: Request,
+    db: AsyncSession,
+    *extra_product_ids: str,
+    version: Optional[int] = None
+):
+    """Lines of the guest cart whose products still exist, and those products."""
+    lines = read_guest_cart(request)
+    products = await load_products(db, [line.product_id for line in lines] + list(extra_product_ids), version)
+    return [line for line in lines if line.product_id in products], products
+
+
+@router.get("/guest", response_model=List[GuestCartItemResponse])
+@query_budget(2)
+async def get_guest_cart(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the items of the visitor's guest cart.
+    
+    Items whose product was removed from the catalog are dropped from the cart.
+    """
+    lines, products = await _load_guest_cart(request, db)
+    if len(lines) != len(read_guest_cart(request)):
+        _save_guest_cart(response, lines)
+    
+    return _guest_items(lines, products)
+
+
+@router.get("/guest/summary", response_model=CartPriceSummary)
+@query_budget(3)
+async def get_guest_cart_summary(
+    request: Request,
+    coupon: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the guest cart's subtotal, discount, tax, shipping and total."""
+    now = datetime.now(timezone.utc)
+    version = await get_catalog_version(db)
+    rules = await get_pricing_rules(db, version)
+    try:
+        coupon_rule = rules.coupon(coupon, now) if coupon else None
+    except InvalidCoupon as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    lines, products = await _load_guest_cart(request, db, version=version)
+    return rules.price(
+        [
+            PricingLine(line.product_id, products[line.product_id].category,
+                        products[line.product_id].price, line.quantity)
+            for line in lines
+        ],
+        coupon_rule,
+        now,
     )
-    cart_items = result.scalars().all()
+
+
+@router.post("/guest/items", response_model=List[GuestCartItemResponse], status_code=status.HTTP_201_CREATED)
+@query_budget(2)
+async def add_to_guest_cart(
+    item_data: CartItemCreate,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
+    """Add an item to the guest cart and return the whole cart."""
+    lines, products = await _load_guest_cart(request, db, item_data.product_id)
+    
+    if item_data.product_id not in products:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
     
-    for item in cart_items:
-        await db.delete(item)
+    lines = merge_lines(lines + [GuestCartLine(**item_data.model_dump())])
+    _save_guest_cart(response, lines)
     
-    await db.commit()
+    return _guest_items(lines, products)
+
+
+@router.put("/guest/items/{item_id}", response_model=List[GuestCartItemResponse])
+@query_budget(2)
+async def update_guest_cart_item(
+    item_id: int,
+    item_data: CartItemUpdate,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
+    """Update the quantity of a guest cart item and return the whole cart."""
+    lines, products = await _load_guest_cart(request, db)
+    
+    if not 0 <= item_id < len(lines):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Cart item not found"
+        )
+    
+    lines[item_id] = lines[item_id]._replace(quantity=item_data.quantity)
+    _save_guest_cart(response, lines)
+    
+    return _guest_items(lines, products)
+
+
+@router.delete("/guest/items/{item_id}", response_model=List[GuestCartItemResponse])
+@query_budget(2)
+async def remove_from_guest_cart(
+    item_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
+    """Remove an item from the guest cart and return the rest of the cart."""
+    lines, products = await _load_guest_cart(request, db)
+    
+    if not 0 <= item_id < len(lines):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Cart item not found"
+        )
+    
+    del lines[item_id]
+    _save_guest_cart(response, lines)
+    
+    return _guest_items(lines, products)
+
+
+@router.delete("/guest", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(0)
+async def clear_guest_cart_items(response: Response):
+    """Clear the guest cart."""
+    clear_guest_cart(response)
     
     return None
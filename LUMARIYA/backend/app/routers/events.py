@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import get_db
+from app.schemas.event import ProductViewEvent
+from app.utils.events import view_events
+from app.utils.guest_cart import load_products
+from app.utils.query_budget import query_budget
+from app.utils.rate_limit import RateLimit
+
+settings = get_settings()
+
+router = APIRouter(prefix="/api/events", tags=["Events"])
+
+
+@router.post(
+    "/view",
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(RateLimit("view", settings.rate_limit_view_burst, settings.rate_limit_view_per_minute))],
+)
+@query_budget(2)
+async def record_product_view(event: ProductViewEvent, db: AsyncSession = Depends(get_db)):
+    """Record a product view for popularity ranking.
+    
+    Views feed sort=popular, so only catalog products are accepted and each
+    IP is rate limited. The id is checked against the product cache (the
+    catalog version check only, once warm).
+    """
+    if event.product_id not in await load_products(db, [event.product_id]):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    
+    # Buffered in memory and written in batches
+    view_events.add(event.product_id)
+    
+    return {"status": "accepted"}
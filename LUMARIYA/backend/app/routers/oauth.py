@@ -4,17 +4,30 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from authlib.integrations.starlette_client import OAuth
 from starlette.requests import Request
+import time
 import httpx
 
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import Token
 from app.utils.auth import create_access_token
+from app.utils.http import http_client, CircuitOpenError
 from app.config import get_settings
+from app.utils.query_budget import query_budget
+from app.utils.guest_cart import adopt_guest_cart
 
 settings = get_settings()
 router = APIRouter(prefix="/api/auth", tags=["OAuth"])
 
+GOOGLE_METADATA_URL = 'https://accounts.google.com/.well-known/openid-configuration'
+
+# authlib creates a short-lived httpx client per call; handing it the shared
+# transport makes those calls reuse pooled connections and the circuit breaker
+provider_client_kwargs = {
+    'transport': http_client.transport,
+    'timeout': http_client.timeout,
+}
+
 # Initialize OAuth
 oauth = OAuth()
 
@@ -23,8 +36,8 @@ oauth.register(
     name='google',
     client_id=settings.google_client_id,
     client_secret=settings.google_client_secret,
-    server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
-    client_kwargs={'scope': 'openid email profile'}
+    server_metadata_url=GOOGLE_METADATA_URL,
+    client_kwargs={'scope': 'openid email profile', **provider_client_kwargs}
 )
 
 # Register Facebook OAuth
@@ -34,34 +47,70 @@ oauth.register(
     client_secret=settings.facebook_client_secret,
     authorize_url='https://www.facebook.com/v12.0/dialog/oauth',
     access_token_url='https://graph.facebook.com/v12.0/oauth/access_token',
-    client_kwargs={'scope': 'email public_profile'}
+    client_kwargs={'scope': 'email public_profile', **provider_client_kwargs}
 )
 
 
+async def load_google_metadata():
+    """Load Google's OIDC metadata and JWKS from the TTL cache into authlib.
+    
+    authlib otherwise fetches them once and keeps them forever; marking the
+    metadata as loaded stops it from fetching on its own.
+    """
+    metadata = await http_client.get_json_cached(GOOGLE_METADATA_URL, settings.oidc_metadata_ttl_seconds)
+    jwks = await http_client.get_json_cached(metadata['jwks_uri'], settings.oidc_metadata_ttl_seconds)
+    oauth.google.server_metadata.update(metadata, jwks=jwks, _loaded_at=time.time())
+
+
+def provider_unavailable(provider: str, error: Exception) -> HTTPException:
+    """Map an outbound provider failure to a 502/503/504 response."""
+    if isinstance(error, CircuitOpenError):
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{provider} login is temporarily unavailable",
+            headers={"Retry-After": str(int(error.retry_after) + 1)},
+        )
+    if isinstance(error, httpx.TimeoutException):
+        return HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=f"{provider} did not respond in time",
+        )
+    return HTTPException(
+        status_code=status.HTTP_502_BAD_GATEWAY,
+        detail=f"{provider} login failed: {str(error)}",
+    )
+
+
 @router.get("/google/login")
+@query_budget(0)
 async def google_login(request: Request):
     """Initiate Google OAuth login."""
     redirect_uri = f"{settings.frontend_url}/api/auth/google/callback"
+    try:
+        await load_google_metadata()
+    except (CircuitOpenError, httpx.HTTPError) as e:
+        raise provider_unavailable("Google", e)
     return await oauth.google.authorize_redirect(request, redirect_uri)
 
 
 @router.get("/google/callback")
+@query_budget(5)
 async def google_callback(request: Request, db: AsyncSession = Depends(get_db)):
     """Handle Google OAuth callback."""
     try:
         # Get token from Google
+        await load_google_metadata()
         token = await oauth.google.authorize_access_token(request)
         
         # Get user info from Google
         user_info = token.get('userinfo')
         if not user_info:
             # Fetch user info if not in token
-            async with httpx.AsyncClient() as client:
-                resp = await client.get(
-                    'https://www.googleapis.com/oauth2/v3/userinfo',
-                    headers={'Authorization': f'Bearer {token["access_token"]}'}
-                )
-                user_info = resp.json()
+            resp = await http_client.client.get(
+                'https://www.googleapis.com/oauth2/v3/userinfo',
+                headers={'Authorization': f'Bearer {token["access_token"]}'}
+            )
+            user_info = resp.json()
         
         email = user_info.get('email')
         name = user_info.get('name', email.split('@')[0])
@@ -98,11 +147,16 @@ async def google_callback(request: Request, db: AsyncSession = Depends(get_db)):
         # Generate JWT token
         access_token = create_access_token(data={"sub": user.id})
         
-        # Redirect to frontend with token
-        return RedirectResponse(
+        # Redirect to frontend with token, moving any guest cart to the user
+        response = RedirectResponse(
             url=f"{settings.frontend_url}/auth/callback?token={access_token}"
         )
+        await adopt_guest_cart(request, response, db, user.id)
+        await db.commit()
+        return response
         
+    except (CircuitOpenError, httpx.TimeoutException) as e:
+        raise provider_unavailable("Google", e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -111,6 +165,7 @@ async def google_callback(request: Request, db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/facebook/login")
+@query_budget(0)
 async def facebook_login(request: Request):
     """Initiate Facebook OAuth login."""
     redirect_uri = f"{settings.frontend_url}/api/auth/facebook/callback"
@@ -118,6 +173,7 @@ async def facebook_login(request: Request):
 
 
 @router.get("/facebook/callback")
+@query_budget(5)
 async def facebook_callback(request: Request, db: AsyncSession = Depends(get_db)):
     """Handle Facebook OAuth callback."""
     try:
@@ -125,15 +181,14 @@ async def facebook_callback(request: Request, db: AsyncSession = Depends(get_db)
         token = await oauth.facebook.authorize_access_token(request)
         
         # Get user info from Facebook
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                'https://graph.facebook.com/me',
-                params={
-                    'fields': 'id,name,email',
-                    'access_token': token['access_token']
-                }
-            )
-            user_info = resp.json()
+        resp = await http_client.client.get(
+            'https://graph.facebook.com/me',
+            params={
+                'fields': 'id,name,email',
+                'access_token': token['access_token']
+            }
+        )
+        user_info = resp.json()
         
         email = user_info.get('email')
         name = user_info.get('name', 'Facebook User')
@@ -170,11 +225,16 @@ async def facebook_callback(request: Request, db: AsyncSession = Depends(get_db)
         # Generate JWT token
         access_token = create_access_token(data={"sub": user.id})
         
-        # Redirect to frontend with token
-        return RedirectResponse(
+        # Redirect to frontend with token, moving any guest cart to the user
+        response = RedirectResponse(
             url=f"{settings.frontend_url}/auth/callback?token={access_token}"
         )
+        await adopt_guest_cart(request, response, db, user.id)
+        await db.commit()
+        return response
         
+    except (CircuitOpenError, httpx.TimeoutException) as e:
+        raise provider_unavailable("Facebook", e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -1,37 +1,96 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
-from typing import List
+from typing import List, Optional
+from datetime import datetime, timezone
 
 from app.database import get_db
 from app.models.user import User
-from app.models.order import Order, OrderItem
+from app.models.order import Order, OrderItem, OrderSummary
 from app.models.product import Product
-from app.schemas.order import OrderCreate, OrderResponse
-from app.utils.auth import get_current_user
+from app.schemas.order import OrderCreate, OrderResponse, OrderSummaryResponse
+from app.config import get_settings
+from app.utils.auth import (
+    get_current_user,
+    get_stream_token,
+    get_stream_user,
+    require_admin,
+    token_revoked,
+)
+from app.utils.query_budget import query_budget
+from app.utils.outbox import enqueue
+from app.utils.order_events import (
+    ORDER_CREATED,
+    ORDER_STATUS_CHANGED,
+    ORDER_TRANSITIONS,
+    order_created_payload,
+    status_changed_payload,
+    live_update,
+)
+from app.utils.live_updates import live_updates, event_stream, publish, user_topic
+from app.utils.order_summaries import page_cursor, summary_for, set_summary_status
+from app.utils.pricing import InvalidCoupon, PricingLine, load_pricing_rules
+
+settings = get_settings()
+
+# Headers that stop proxies from buffering or caching event streams
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
 
 router = APIRouter(prefix="/api/orders", tags=["Orders"])
 
 
-@router.get("/", response_model=List[OrderResponse])
+@router.get("/", response_model=List[OrderSummaryResponse])
+@query_budget(2)
 async def list_orders(
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[datetime] = None,
+    before_id: Optional[int] = None,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """List all orders for the current user."""
+    """List the current user's orders, newest first, from their summaries.
+    
+    Pass the created_at and id of the last order as before and before_id
+    to get the next page.
+    """
+    query = select(OrderSummary).where(OrderSummary.user_id == current_user.id)
+    if before is not None:
+        query = query.where(page_cursor(before, before_id))
     result = await db.execute(
-        select(Order)
-        .options(selectinload(Order.items))
-        .where(Order.user_id == current_user.id)
-        .order_by(Order.created_at.desc())
+        query
+        .order_by(OrderSummary.created_at.desc(), OrderSummary.order_id.desc())
+        .limit(limit)
     )
     orders = result.scalars().all()
     
     return orders
 
 
+@router.get("/stream")
+@query_budget(1)
+async def stream_order_updates(
+    current_user: User = Depends(get_stream_user),
+    token: dict = Depends(get_stream_token),
+):
+    """Server-sent events for status changes of the current user's orders.
+    
+    Replaces polling GET /api/orders. Reload the orders once after
+    connecting and on a "resync" event; "order.created" and
+    "order.status_changed" events follow. An "unauthorized" event ends the
+    stream when the token expires or is revoked.
+    """
+    return StreamingResponse(
+        event_stream(live_updates, user_topic(current_user.id), settings.sse_heartbeat_seconds,
+                     expires_at=token.get("exp"), revoked=lambda: token_revoked(token)),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
 @router.get("/{order_id}", response_model=OrderResponse)
+@query_budget(3)
 async def get_order(
     order_id: int,
     current_user: User = Depends(get_current_user),
@@ -58,28 +117,41 @@ async def get_order(
 
 
 @router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+@query_budget(11)
 async def create_order(
     order_data: OrderCreate,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Create a new order (checkout)."""
+    """Create a new order (checkout), priced with the current pricing rules."""
     if not order_data.items:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Order must contain at least one item"
         )
     
-    # Calculate totals
-    subtotal = 0.0
+    # Load all ordered products in one query
+    product_ids = {item_data.product_id for item_data in order_data.items}
+    result = await db.execute(select(Product).where(Product.id.in_(product_ids)))
+    products = {product.id: product for product in result.scalars().all()}
+    
+    now = datetime.now(timezone.utc)
+    rules = await load_pricing_rules(db)
+    coupon = None
+    if order_data.coupon_code:
+        try:
+            coupon = rules.coupon(order_data.coupon_code, now)
+        except InvalidCoupon as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    
+    lines = []
     order_items = []
     
     for item_data in order_data.items:
-        # Get product
-        result = await db.execute(
-            select(Product).where(Product.id == item_data.product_id)
-        )
-        product = result.scalar_one_or_none()
+        product = products.get(item_data.product_id)
         
         if not product:
             raise HTTPException(
@@ -87,52 +159,46 @@ async def create_order(
                 detail=f"Product {item_data.product_id} not found"
             )
         
-        item_total = product.price * item_data.quantity
-        subtotal += item_total
-        
-        order_items.append({
-            "product_id": product.id,
-            "product_name": product.name,
-            "quantity": item_data.quantity,
-            "price": product.price,
-            "size": item_data.size,
-            "color": item_data.color
-        })
-    
-    # Calculate tax and shipping
-    tax = subtotal * 0.18  # 18% GST for India
-    shipping = 0.0 if subtotal > 5000 else 200  # Free shipping over ₹5000
-    total = subtotal + tax + shipping
+        lines.append(PricingLine(product.id, product.category, product.price, item_data.quantity))
+        order_items.append(OrderItem(
+            product_id=product.id,
+            product_name=product.name,
+            quantity=item_data.quantity,
+            price=product.price,
+            color=item_data.color
+        ))
+    
+    # Tax, shipping and promotions come from the pricing rules
+    totals = rules.price(lines, coupon, now)
     
     # Create order
     new_order = Order(
         user_id=current_user.id,
         status="pending",
-        subtotal=subtotal,
-        tax=tax,
-        shipping=shipping,
-        total=total,
+        subtotal=totals["subtotal"],
+        tax=totals["tax"],
+        shipping=totals["shipping"],
+        discount=totals["discount"],
+        total=totals["total"],
         shipping_address=order_data.shipping_address
     )
     
+    # Items are inserted in one batch when the order is flushed
+    new_order.items = order_items
     db.add(new_order)
-    await db.flush()  # Get order ID
-    
-    # Create order items
-    for item_data in order_items:
-        order_item = OrderItem(
-            order_id=new_order.id,
-            **item_data
-        )
-        db.add(order_item)
+    await db.flush()
+    db.add(summary_for(new_order))
     
+    # Side effects (emails, warehouse) run in the outbox worker, not in checkout
+    enqueue(db, ORDER_CREATED, new_order.id, order_created_payload(new_order, current_user.email))
+    await publish(db, live_update(new_order, ORDER_CREATED))
     await db.commit()
     
-    # Reload with items
+    # Reload with items; created_at narrows the lookup to one partition
     result = await db.execute(
         select(Order)
         .options(selectinload(Order.items))
-        .where(Order.id == new_order.id)
+        .where(Order.id == new_order.id, Order.created_at == new_order.created_at)
     )
     created_order = result.scalar_one()
     
@@ -140,21 +206,21 @@ async def create_order(
 
 
 @router.put("/{order_id}/status")
+@query_budget(6)
 async def update_order_status(
     order_id: int,
     new_status: str = Query(...),
+    admin: User = Depends(require_admin),
     db: AsyncSession = Depends(get_db)
 ):
     """Update order status (admin only)."""
-    valid_statuses = ["pending", "processing", "shipped", "delivered", "cancelled"]
-    
-    if new_status not in valid_statuses:
+    if new_status not in ORDER_TRANSITIONS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid status. Must be one of: {', '.join(valid_statuses)}"
+            detail=f"Invalid status. Must be one of: {', '.join(ORDER_TRANSITIONS)}"
         )
     
-    result = await db.execute(select(Order).where(Order.id == order_id))
+    result = await db.execute(select(Order).where(Order.id == order_id).with_for_update())
     order = result.scalar_one_or_none()
     
     if not order:
@@ -163,7 +229,18 @@ async def update_order_status(
             detail="Order not found"
         )
     
-    order.status = new_status
-    await db.commit()
+    if order.status != new_status and new_status not in ORDER_TRANSITIONS[order.status]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Orders cannot move from {order.status} to {new_status}"
+        )
+    
+    if order.status != new_status:
+        old_status = order.status
+        order.status = new_status
+        await set_summary_status(db, [order.id], new_status)
+        enqueue(db, ORDER_STATUS_CHANGED, order.id, status_changed_payload(order, old_status))
+        await publish(db, live_update(order, ORDER_STATUS_CHANGED, old_status))
+        await db.commit()
     
     return {"message": "Order status updated successfully"}
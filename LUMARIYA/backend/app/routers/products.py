@@ -1,27 +1,92 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
 from typing import List, Optional
 
 from app.database import get_db
 from app.models.product import Product
-from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse
+from app.models.recommendation import ProductRecommendation
+from app.models.event import ProductPopularity
+from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse, ProductFacets
+from app.utils.cache import VersionedCache
+from app.utils.catalog import get_catalog_version, bump_catalog_version
+from app.utils.query_budget import query_budget
 
 router = APIRouter(prefix="/api/products", tags=["Products"])
 
+# Facets are cached per catalog version and invalidated by any product change
+facets_cache = VersionedCache(maxsize=128)
+
+
+# Sort options for product listings, each backed by an index on products
+SORT_OPTIONS = {
+    "price": (Product.price.asc(), Product.id.asc()),
+    "newest": (Product.created_at.desc(),),
+    "name": (Product.name.asc(),),
+    # Never-viewed products have no popularity row and sort last
+    "popular": (ProductPopularity.log_score.desc().nulls_last(), Product.id.asc()),
+}
+
+
+def build_product_query(
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    color: Optional[str] = None,
+    material: Optional[str] = None,
+    in_stock_color: Optional[str] = None,
+    sort: Optional[str] = None,
+):
+    """Build the product listing query for the given filters and sort option."""
+    query = select(Product)
+    
+    if category and category != "All":
+        query = query.where(Product.category == category)
+    if min_price is not None:
+        query = query.where(Product.price >= min_price)
+    if max_price is not None:
+        query = query.where(Product.price <= max_price)
+    
+    # JSONB containment so the GIN indexes on materials/colors can be used
+    if material:
+        query = query.where(Product.materials.contains([material]))
+    if color:
+        query = query.where(Product.colors.contains([{"name": color}]))
+    if in_stock_color:
+        query = query.where(Product.colors.contains([{"name": in_stock_color, "available": True}]))
+    
+    if sort == "popular":
+        query = query.outerjoin(ProductPopularity, ProductPopularity.product_id == Product.id)
+    if sort:
+        query = query.order_by(*SORT_OPTIONS[sort])
+    
+    return query
+
 
 @router.get("/", response_model=List[ProductResponse])
+@query_budget(1)
 async def list_products(
     category: Optional[str] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    color: Optional[str] = None,
+    material: Optional[str] = None,
+    in_stock_color: Optional[str] = None,
+    sort: Optional[str] = Query(None, pattern="^(price|newest|name|popular)$"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     db: AsyncSession = Depends(get_db)
 ):
-    """List all products with optional filtering."""
-    query = select(Product)
-    
-    if category and category != "All":
-        query = query.where(Product.category == category)
+    """List all products with optional filtering and sorting."""
+    query = build_product_query(
+        category=category,
+        min_price=min_price,
+        max_price=max_price,
+        color=color,
+        material=material,
+        in_stock_color=in_stock_color,
+        sort=sort,
+    )
     
     query = query.offset(skip).limit(limit)
     result = await db.execute(query)
@@ -30,7 +95,103 @@ async def list_products(
     return products
 
 
+@router.get("/facets", response_model=ProductFacets)
+@query_budget(6)
+async def get_facets(
+    category: Optional[str] = None,
+    buckets: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get category counts, price histogram and material/color counts for the catalog."""
+    if category == "All":
+        category = None
+    
+    version = await get_catalog_version(db)
+    cache_key = (category, buckets)
+    cached = facets_cache.get(cache_key, version)
+    if cached is not None:
+        return cached
+    
+    facets = await compute_facets(db, category, buckets)
+    facets_cache.set(cache_key, version, facets)
+    
+    return facets
+
+
+async def compute_facets(db: AsyncSession, category: Optional[str], buckets: int) -> dict:
+    """Aggregate facet counts with grouped SQL over the whole catalog."""
+    # Category counts always span the full catalog so every tab can be rendered
+    result = await db.execute(
+        select(Product.category, func.count())
+        .group_by(Product.category)
+        .order_by(Product.category)
+    )
+    categories = [{"value": value, "count": count} for value, count in result.all()]
+    
+    scope = [Product.category == category] if category else []
+    
+    result = await db.execute(
+        select(func.count(), func.min(Product.price), func.max(Product.price)).where(*scope)
+    )
+    total, min_price, max_price = result.one()
+    
+    price_histogram = []
+    if total:
+        if min_price == max_price:
+            price_histogram = [{"min": min_price, "max": max_price, "count": total}]
+        else:
+            width = (max_price - min_price) / buckets
+            # width_bucket puts the maximum price in bucket n + 1, fold it into the last one
+            bucket = func.least(func.width_bucket(Product.price, min_price, max_price, buckets), buckets)
+            result = await db.execute(
+                select(bucket.label("bucket"), func.count())
+                .where(*scope)
+                .group_by("bucket")
+            )
+            counts = dict(result.all())
+            price_histogram = [
+                {
+                    "min": round(min_price + width * i, 2),
+                    "max": round(min_price + width * (i + 1), 2),
+                    "count": counts.get(i + 1, 0),
+                }
+                for i in range(buckets)
+            ]
+    
+    material = func.jsonb_array_elements_text(Product.materials).column_valued("material")
+    result = await db.execute(
+        select(material, func.count())
+        .select_from(Product)
+        .where(func.jsonb_typeof(Product.materials) == "array", *scope)
+        .group_by(material)
+        .order_by(func.count().desc(), material)
+    )
+    materials = [{"value": value, "count": count} for value, count in result.all()]
+    
+    color = func.jsonb_array_elements(Product.colors).column_valued("color")
+    color_name = func.jsonb_extract_path_text(color, "name").label("color_name")
+    result = await db.execute(
+        select(color_name, func.count())
+        .select_from(Product)
+        .where(func.jsonb_typeof(Product.colors) == "array", *scope)
+        .group_by("color_name")
+        .order_by(func.count().desc(), "color_name")
+    )
+    colors = [{"value": value, "count": count} for value, count in result.all() if value]
+    
+    return {
+        "total": total,
+        "min_price": min_price,
+        "max_price": max_price,
+        "categories": categories,
+        "price_histogram": price_histogram,
+        "materials": materials,
+        "colors": colors,
+    }
+
+
 @router.get("/{product_id}", response_model=ProductResponse)
+@query_budget(1)
 async def get_product(product_id: str, db: AsyncSession = Depends(get_db)):
     """Get a single product by ID."""
     result = await db.execute(select(Product).where(Product.id == product_id))
@@ -45,7 +206,32 @@ async def get_product(product_id: str, db: AsyncSession = Depends(get_db)):
     return product
 
 
+@router.get("/{product_id}/related", response_model=List[ProductResponse])
+@query_budget(2)
+async def get_related_products(
+    product_id: str,
+    limit: int = Query(4, ge=1, le=12),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get products frequently bought together with a product."""
+    result = await db.execute(
+        select(ProductRecommendation.related_ids)
+        .where(ProductRecommendation.product_id == product_id)
+    )
+    related_ids = (result.scalar() or [])[:limit]
+    
+    if not related_ids:
+        return []
+    
+    result = await db.execute(select(Product).where(Product.id.in_(related_ids)))
+    products = {product.id: product for product in result.scalars().all()}
+    
+    # Keep the precomputed ranking; deleted products are skipped
+    return [products[related_id] for related_id in related_ids if related_id in products]
+
+
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
+@query_budget(4)
 async def create_product(product_data: ProductCreate, db: AsyncSession = Depends(get_db)):
     """Create a new product (admin only)."""
     # Check if product ID already exists
@@ -60,6 +246,7 @@ async def create_product(product_data: ProductCreate, db: AsyncSession = Depends
     
     new_product = Product(**product_data.model_dump())
     db.add(new_product)
+    await bump_catalog_version(db)
     await db.commit()
     await db.refresh(new_product)
     
@@ -67,6 +254,7 @@ async def create_product(product_data: ProductCreate, db: AsyncSession = Depends
 
 
 @router.put("/{product_id}", response_model=ProductResponse)
+@query_budget(4)
 async def update_product(
     product_id: str,
     product_data: ProductUpdate,
@@ -87,6 +275,7 @@ async def update_product(
     for field, value in update_data.items():
         setattr(product, field, value)
     
+    await bump_catalog_version(db)
     await db.commit()
     await db.refresh(product)
     
@@ -94,6 +283,7 @@ async def update_product(
 
 
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(7)
 async def delete_product(product_id: str, db: AsyncSession = Depends(get_db)):
     """Delete a product (admin only)."""
     result = await db.execute(select(Product).where(Product.id == product_id))
@@ -106,6 +296,7 @@ async def delete_product(product_id: str, db: AsyncSession = Depends(get_db)):
         )
     
     await db.delete(product)
+    await bump_catalog_version(db)
     await db.commit()
     
     return None
@@ -1,25 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from typing import List
 
 from app.database import get_db
 from app.models.user import User
 from app.models.address import Address
-from app.schemas.user import UserResponse, UserUpdate
+from app.schemas.user import UserResponse, UserUpdate, AccountOverview
 from app.schemas.address import AddressCreate, AddressUpdate, AddressResponse
 from app.utils.auth import get_current_user
+from app.utils.query_budget import query_budget
+from app.utils.overview import account_overview
+from app.utils.pricing import cart_summary
 
 router = APIRouter(prefix="/api/users", tags=["Users"])
 
 
 @router.get("/profile", response_model=UserResponse)
+@query_budget(1)
 async def get_profile(current_user: User = Depends(get_current_user)):
     """Get current user profile."""
     return current_user
 
 
+@router.get("/me/overview", response_model=AccountOverview)
+@query_budget(5)
+async def get_account_overview(
+    recent_orders: int = Query(5, ge=0, le=50),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Everything the account page shows, in one request.
+    
+    Replaces separate calls to /profile, /addresses, /api/cart and
+    /api/orders: the user is authenticated once, addresses and orders are
+    read by a single statement and the cart is priced like /api/cart/summary
+    (usually from its cache).
+    """
+    overview = await account_overview(db, current_user.id, recent_orders)
+    return {"profile": current_user, "cart": await cart_summary(db, current_user), **overview}
+
+
 @router.put("/profile", response_model=UserResponse)
+@query_budget(4)
 async def update_profile(
     user_data: UserUpdate,
     current_user: User = Depends(get_current_user),
@@ -55,6 +78,7 @@ async def update_profile(
 
 # Address endpoints
 @router.get("/addresses", response_model=List[AddressResponse])
+@query_budget(2)
 async def list_addresses(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
@@ -69,6 +93,7 @@ async def list_addresses(
 
 
 @router.post("/addresses", response_model=AddressResponse, status_code=status.HTTP_201_CREATED)
+@query_budget(4)
 async def create_address(
     address_data: AddressCreate,
     current_user: User = Depends(get_current_user),
@@ -77,15 +102,11 @@ async def create_address(
     """Create a new address."""
     # If this is set as default, unset other defaults
     if address_data.is_default:
-        result = await db.execute(
-            select(Address).where(
-                Address.user_id == current_user.id,
-                Address.is_default == True
-            )
+        await db.execute(
+            update(Address)
+            .where(Address.user_id == current_user.id, Address.is_default == True)
+            .values(is_default=False)
         )
-        existing_defaults = result.scalars().all()
-        for addr in existing_defaults:
-            addr.is_default = False
     
     new_address = Address(
         user_id=current_user.id,
@@ -100,6 +121,7 @@ async def create_address(
 
 
 @router.put("/addresses/{address_id}", response_model=AddressResponse)
+@query_budget(5)
 async def update_address(
     address_id: int,
     address_data: AddressUpdate,
@@ -125,16 +147,15 @@ async def update_address(
     
     # If setting as default, unset other defaults
     if update_data.get("is_default"):
-        result = await db.execute(
-            select(Address).where(
+        await db.execute(
+            update(Address)
+            .where(
                 Address.user_id == current_user.id,
                 Address.is_default == True,
                 Address.id != address_id
             )
+            .values(is_default=False)
         )
-        existing_defaults = result.scalars().all()
-        for addr in existing_defaults:
-            addr.is_default = False
     
     for field, value in update_data.items():
         setattr(address, field, value)
@@ -146,6 +167,7 @@ async def update_address(
 
 
 @router.delete("/addresses/{address_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(3)
 async def delete_address(
     address_id: int,
     current_user: User = Depends(get_current_user),
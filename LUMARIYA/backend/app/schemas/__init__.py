@@ -1,14 +1,22 @@
 """Pydantic schemas package."""
 from app.schemas.user import UserCreate, UserLogin, UserResponse, UserUpdate
-from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse
-from app.schemas.cart import CartItemCreate, CartItemUpdate, CartItemResponse
-from app.schemas.order import OrderCreate, OrderResponse, OrderItemResponse
+from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse, ProductFacets
+from app.schemas.cart import (
+    CartItemCreate, CartItemUpdate, CartItemResponse, GuestCartItemResponse, CartPriceSummary,
+)
+from app.schemas.order import OrderCreate, OrderResponse, OrderItemResponse, OrderSummaryResponse
 from app.schemas.address import AddressCreate, AddressUpdate, AddressResponse
+from app.schemas.event import ProductViewEvent
+from app.schemas.batch import SubRequest, BatchRequest
+from app.schemas.pricing import PricingRuleCreate, PricingRuleResponse
 
 __all__ = [
     "UserCreate", "UserLogin", "UserResponse", "UserUpdate",
-    "ProductCreate", "ProductUpdate", "ProductResponse",
-    "CartItemCreate", "CartItemUpdate", "CartItemResponse",
-    "OrderCreate", "OrderResponse", "OrderItemResponse",
+    "ProductCreate", "ProductUpdate", "ProductResponse", "ProductFacets",
+    "CartItemCreate", "CartItemUpdate", "CartItemResponse", "GuestCartItemResponse", "CartPriceSummary",
+    "OrderCreate", "OrderResponse", "OrderItemResponse", "OrderSummaryResponse",
     "AddressCreate", "AddressUpdate", "AddressResponse",
+    "ProductViewEvent",
+    "SubRequest", "BatchRequest",
+    "PricingRuleCreate", "PricingRuleResponse",
 ]
@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+from typing import Any, List, Optional
+
+
+class SubRequest(BaseModel):
+    """Schema for one call inside a batch."""
+    id: Optional[str] = Field(None, max_length=100)  # Echoed back to match responses
+    method: str = Field(..., pattern="^(GET|POST|PUT|PATCH|DELETE)$")
+    path: str = Field(..., min_length=1, max_length=2000)  # e.g. "/api/cart/" or "/api/products/?category=Rings"
+    body: Optional[Any] = None  # Sent as the JSON request body
+
+
+class BatchRequest(BaseModel):
+    """Schema for POST /api/batch."""
+    requests: List[SubRequest] = Field(..., min_length=1)
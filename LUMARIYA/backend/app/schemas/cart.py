@@ -29,3 +29,31 @@ class CartItemResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class GuestCartItemResponse(BaseModel):
+    """Schema for an item of a guest cart; id is its position in the cart."""
+    id: int
+    product_id: str
+    quantity: int
+    size: Optional[str]
+    color: Optional[str]
+    product: ProductResponse
+
+
+class AppliedPromotion(BaseModel):
+    """Promotion or coupon applied to a cart."""
+    id: int
+    name: str
+    code: Optional[str]
+
+
+class CartPriceSummary(BaseModel):
+    """Schema for the totals of a cart, priced by the server."""
+    item_count: int
+    subtotal: float
+    discount: float
+    tax: float
+    shipping: float
+    total: float
+    promotion: Optional[AppliedPromotion]
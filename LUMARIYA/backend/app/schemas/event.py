@@ -0,0 +1,6 @@
+from pydantic import BaseModel, Field
+
+
+class ProductViewEvent(BaseModel):
+    """Schema for a product view analytics event."""
+    product_id: str = Field(..., min_length=1, max_length=255)
@@ -27,6 +27,7 @@ class OrderCreate(BaseModel):
     """Schema for creating an order (checkout)."""
     items: List[OrderItemCreate]
     shipping_address: Any  # JSON object with address details
+    coupon_code: Optional[str] = None
     
 
 class OrderResponse(BaseModel):
@@ -37,9 +38,37 @@ class OrderResponse(BaseModel):
     subtotal: float
     tax: float
     shipping: float
+    discount: float
     shipping_address: Any
     created_at: datetime
     items: List[OrderItemResponse]
     
     class Config:
         from_attributes = True
+
+
+class OrderSummaryResponse(BaseModel):
+    """Schema for an order in order lists; GET /api/orders/{id} has the items."""
+    id: int = Field(..., validation_alias="order_id")
+    status: str
+    total: float
+    item_count: int
+    first_product_name: Optional[str]
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class OrderStatusFilter(BaseModel):
+    """Orders in one status, optionally placed within a time range."""
+    status: str
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+
+class BulkOrderStatusUpdate(BaseModel):
+    """Schema for moving a list of orders, or the orders matching a filter, to a new status."""
+    new_status: str
+    order_ids: Optional[List[int]] = Field(None, min_length=1, max_length=1000)
+    filter: Optional[OrderStatusFilter] = None
@@ -0,0 +1,35 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional
+
+
+class PricingRuleCreate(BaseModel):
+    """Schema for creating or replacing a pricing rule.
+    
+    At most one of category or product_id is set; with neither the rule
+    covers the whole cart. tax rules take percent, shipping rules take
+    amount and optionally min_subtotal (free shipping above it), promotions
+    take exactly one of percent or amount and become coupons with a code.
+    """
+    kind: str
+    name: str = Field(..., min_length=1)
+    code: Optional[str] = Field(None, min_length=1, max_length=64)
+    category: Optional[str] = None
+    product_id: Optional[str] = None
+    percent: Optional[float] = Field(None, ge=0, le=100)
+    amount: Optional[float] = Field(None, ge=0)
+    min_subtotal: Optional[float] = Field(None, ge=0)
+    priority: int = 0
+    active: bool = True
+    starts_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
+
+
+class PricingRuleResponse(PricingRuleCreate):
+    """Schema for pricing rule response."""
+    id: int
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
@@ -55,3 +55,39 @@ class ProductResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class FacetCount(BaseModel):
+    """A facet value and the number of products carrying it."""
+    value: str
+    count: int
+
+
+class PriceBucket(BaseModel):
+    """A price histogram bucket covering [min, max)."""
+    min: float
+    max: float
+    count: int
+
+
+class ProductFacets(BaseModel):
+    """Schema for catalog facets used to build shop filters."""
+    total: int
+    min_price: Optional[float]
+    max_price: Optional[float]
+    categories: List[FacetCount]
+    price_histogram: List[PriceBucket]
+    materials: List[FacetCount]
+    colors: List[FacetCount]
+
+
+class BulkPriceUpdate(BaseModel):
+    """Schema for repricing a category and/or a set of products.
+    
+    Exactly one of percent (e.g. -20 for 20% off) or amount (added to the
+    price, may be negative) is given.
+    """
+    category: Optional[str] = None
+    product_ids: Optional[List[str]] = Field(None, min_length=1, max_length=5000)
+    percent: Optional[float] = Field(None, gt=-100)
+    amount: Optional[float] = None
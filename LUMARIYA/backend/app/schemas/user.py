@@ -1,6 +1,10 @@
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+
+from app.schemas.address import AddressResponse
+from app.schemas.cart import CartPriceSummary
+from app.schemas.order import OrderSummaryResponse
 
 
 class UserCreate(BaseModel):
@@ -34,6 +38,14 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
+class AccountOverview(BaseModel):
+    """Schema for the account page: profile, addresses, cart and latest orders."""
+    profile: UserResponse
+    addresses: List[AddressResponse]
+    cart: CartPriceSummary
+    recent_orders: List[OrderSummaryResponse]
+
+
 class Token(BaseModel):
     """Schema for JWT token response."""
     access_token: str
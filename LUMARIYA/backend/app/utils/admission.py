@@ -0,0 +1,225 @@
+import asyncio
+import heapq
+import itertools
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from app.config import get_settings
+from app.utils.live_updates import STREAM_PATHS
+
+settings = get_settings()
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted within its deadline."""
+
+    def __init__(self, group: str, retry_after: float):
+        super().__init__(f"{group} is overloaded")
+        self.group = group
+        self.retry_after = retry_after
+
+
+@dataclass
+class RouteGroup:
+    """Concurrency budget for one family of routes."""
+    name: str
+    limit: int  # Requests of this group running at once
+    max_queue: int  # Requests of this group allowed to wait for a slot
+    max_wait: float  # Seconds a request may wait before it is rejected
+    priority: int  # Lower is served first when slots free up
+    active: int = 0
+    waiting: int = 0
+    # Moving average of how long a request of this group holds its slot
+    service_time: float = 0.05
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    group: RouteGroup = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class AdmissionController:
+    """Admit requests against a shared capacity (the DB pool size).
+
+    Each route group has its own concurrency limit and bounded wait queue.
+    Waiting requests are woken in priority order, so checkout gets freed
+    slots before browsing. A request whose estimated wait exceeds its
+    group's deadline is rejected immediately instead of holding a queue
+    position it would time out in anyway.
+    """
+
+    def __init__(self, capacity: int, groups: List[RouteGroup]):
+        self.capacity = capacity
+        self.groups: Dict[str, RouteGroup] = {group.name: group for group in groups}
+        self.active = 0
+        self.rejected: Dict[str, int] = {group.name: 0 for group in groups}
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+
+    def _can_start(self, group: RouteGroup) -> bool:
+        return self.active < self.capacity and group.active < group.limit
+
+    def _start(self, group: RouteGroup) -> None:
+        self.active += 1
+        group.active += 1
+
+    def _estimated_wait(self, group: RouteGroup) -> float:
+        # Requests ahead of us in this group drain `limit` at a time
+        return (group.waiting + 1) * group.service_time / max(1, group.limit)
+
+    def _reject(self, group: RouteGroup, retry_after: float) -> AdmissionRejected:
+        self.rejected[group.name] += 1
+        return AdmissionRejected(group.name, retry_after)
+
+    async def acquire(self, group_name: str) -> RouteGroup:
+        """Wait for a slot for the group; raise AdmissionRejected if none in time."""
+        group = self.groups[group_name]
+        if not self._waiters and self._can_start(group):
+            self._start(group)
+            return group
+
+        if group.waiting >= group.max_queue:
+            raise self._reject(group, self._estimated_wait(group))
+        estimated = self._estimated_wait(group)
+        if estimated > group.max_wait:
+            raise self._reject(group, estimated)
+
+        waiter = _Waiter(group.priority, next(self._seq), group, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, waiter)
+        # A slot may be free for us already, e.g. when only stale waiters or
+        # waiters of groups at their own limit are queued
+        self._dispatch()
+        if waiter.future.done():
+            return group
+
+        group.waiting += 1
+        try:
+            await asyncio.wait_for(waiter.future, timeout=group.max_wait)
+        except asyncio.TimeoutError:
+            raise self._reject(group, self._estimated_wait(group))
+        except asyncio.CancelledError:
+            # Client went away; give back a slot that was handed over meanwhile
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(group, 0.0)
+            raise
+        finally:
+            group.waiting -= 1
+        return group
+
+    def release(self, group: RouteGroup, elapsed: float) -> None:
+        """Free the group's slot and hand free slots to the best waiters."""
+        self.active -= 1
+        group.active -= 1
+        if elapsed:
+            group.service_time += 0.1 * (elapsed - group.service_time)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        blocked = []
+        while self._waiters and self.active < self.capacity:
+            waiter = heapq.heappop(self._waiters)
+            if waiter.future.done():
+                continue  # Timed out or cancelled
+            if self._can_start(waiter.group):
+                self._start(waiter.group)
+                waiter.future.set_result(None)
+            else:
+                blocked.append(waiter)
+        for waiter in blocked:
+            heapq.heappush(self._waiters, waiter)
+
+    def snapshot(self) -> dict:
+        """Active, waiting and rejected counts per group."""
+        return {
+            name: {
+                "active": group.active,
+                "waiting": group.waiting,
+                "rejected": self.rejected[name],
+                "service_ms": round(group.service_time * 1000, 2),
+            }
+            for name, group in self.groups.items()
+        }
+
+
+def default_route_groups(capacity: int) -> List[RouteGroup]:
+    """Route groups sized as shares of the DB pool; checkout is served first."""
+    return [
+        RouteGroup("checkout", limit=capacity, max_queue=4 * capacity, max_wait=5.0, priority=0),
+        RouteGroup("cart", limit=max(1, capacity * 2 // 3), max_queue=2 * capacity, max_wait=2.0, priority=1),
+        RouteGroup("account", limit=max(1, capacity // 2), max_queue=2 * capacity, max_wait=2.0, priority=2),
+        RouteGroup("admin", limit=max(1, capacity // 3), max_queue=capacity, max_wait=5.0, priority=2),
+        RouteGroup("catalog", limit=max(1, capacity * 2 // 3), max_queue=2 * capacity, max_wait=1.0, priority=3),
+    ]
+
+
+def classify_route(method: str, path: str) -> Optional[str]:
+    """Route group of a request, or None for routes that skip admission."""
+    if path in STREAM_PATHS:
+        return None  # Long-lived event streams hold no DB connection
+    if path.rstrip("/") == "/api/batch":
+        return None  # Its sub-requests are admitted one by one (app/utils/batch.py)
+    if path in ("/api/orders", "/api/orders/") and method == "POST":
+        return "checkout"
+    if path.startswith("/api/cart"):
+        return "cart"
+    if path.startswith("/api/admin"):
+        return "admin"
+    if path.startswith("/api/products") or path.startswith("/api/events"):
+        return "catalog"
+    if path.startswith("/api/"):
+        return "account"
+    return None  # Health checks, docs and static files
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an AdmissionController to HTTP requests."""
+
+    def __init__(self, app, controller: AdmissionController,
+                 classify: Callable[[str, str], Optional[str]] = classify_route):
+        self.app = app
+        self.controller = controller
+        self.classify = classify
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        group_name = self.classify(scope["method"], scope["path"])
+        if group_name is None:
+            return await self.app(scope, receive, send)
+
+        try:
+            group = await self.controller.acquire(group_name)
+        except AdmissionRejected as e:
+            return await self._send_rejection(send, e)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(group, time.perf_counter() - started)
+
+    @staticmethod
+    async def _send_rejection(send, error: AdmissionRejected) -> None:
+        body = json.dumps({"detail": "Server is busy, please retry shortly"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, int(error.retry_after + 0.999))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+admission = AdmissionController(
+    settings.admission_capacity,
+    default_route_groups(settings.admission_capacity),
+)
@@ -0,0 +1,205 @@
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select, delete, func, cast, literal, text, distinct, or_, and_, Date
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.analytics import SalesDailyRollup, SalesRollupState
+from app.models.order import Order, OrderItem
+from app.models.product import Product
+
+settings = get_settings()
+
+# Category value of the order-level total rows
+ALL_CATEGORIES = "*"
+
+# Category for order lines whose product has been deleted
+UNCATEGORIZED = "Uncategorized"
+
+# Orders changed this long before the previous refresh are re-checked, so
+# transactions that committed late are still picked up
+SETTLE_DELAY = timedelta(minutes=5)
+
+STATE_ID = 1
+
+# Lets only one worker refresh the rollup at a time
+ADVISORY_LOCK_KEY = 0x73616C65  # "sale"
+
+
+def _order_day():
+    """Local calendar day an order was placed on."""
+    return cast(func.timezone(settings.analytics_timezone, Order.created_at), Date)
+
+
+def _created_range(column, days: Optional[List[date]]) -> list:
+    """Bounds on a created_at column covering the given local days (None = all).
+    
+    They let the index narrow the scan before the day match, and limit it
+    to the partitions of those months.
+    """
+    if days is None:
+        return []
+    tz = ZoneInfo(settings.analytics_timezone)
+    lower = datetime.combine(min(days), time.min, tzinfo=tz)
+    upper = datetime.combine(max(days) + timedelta(days=1), time.min, tzinfo=tz)
+    return [column >= lower, column < upper]
+
+
+def _day_filters(days: Optional[List[date]]) -> list:
+    """WHERE clauses restricting orders to the given local days (None = all)."""
+    if days is None:
+        return []
+    return _created_range(Order.created_at, days) + [_order_day().in_(days)]
+
+
+async def _changed_days(db: AsyncSession, since: datetime) -> List[date]:
+    """Local days that have orders created or updated since the given time."""
+    result = await db.execute(
+        select(distinct(_order_day()))
+        .where(or_(Order.created_at >= since, Order.updated_at >= since))
+    )
+    return [day for day in result.scalars().all() if day is not None]
+
+
+async def refresh_sales_rollup(db: AsyncSession, full: bool = False) -> dict:
+    """Recompute rollup rows for days whose orders changed since the last refresh.
+    
+    Only the affected days are deleted and re-aggregated from orders and
+    order_items, so each refresh costs in proportion to recent activity.
+    The first refresh (or full=True) rebuilds every day that still has
+    orders.
+    """
+    result = await db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+    if not result.scalar():
+        return {"skipped": True, "days": 0}
+    
+    result = await db.execute(select(func.now()))
+    refreshed_at = result.scalar()
+    
+    result = await db.execute(
+        select(SalesRollupState.last_refreshed_at).where(SalesRollupState.id == STATE_ID)
+    )
+    last_refreshed_at = result.scalar()
+    
+    if full or last_refreshed_at is None:
+        days = None
+        # Days before the oldest order left are archived partitions; their
+        # rollup rows are all that remains of them
+        first_day = select(
+            cast(func.timezone(settings.analytics_timezone, func.min(Order.created_at)), Date)
+        ).scalar_subquery()
+        await db.execute(delete(SalesDailyRollup).where(SalesDailyRollup.day >= first_day))
+    else:
+        days = await _changed_days(db, last_refreshed_at - SETTLE_DELAY)
+        if days:
+            await db.execute(delete(SalesDailyRollup).where(SalesDailyRollup.day.in_(days)))
+    
+    if days is None or days:
+        day = _order_day().label("day")
+        await db.execute(
+            insert(SalesDailyRollup).from_select(
+                ["day", "category", "status", "revenue", "order_count"],
+                select(
+                    day,
+                    literal(ALL_CATEGORIES),
+                    Order.status,
+                    func.sum(Order.total),
+                    func.count(Order.id),
+                )
+                .where(*_day_filters(days))
+                .group_by(day, Order.status),
+            )
+        )
+        
+        category = func.coalesce(Product.category, UNCATEGORIZED).label("category_name")
+        await db.execute(
+            insert(SalesDailyRollup).from_select(
+                ["day", "category", "status", "revenue", "order_count"],
+                select(
+                    day,
+                    category,
+                    Order.status,
+                    func.sum(OrderItem.price * OrderItem.quantity),
+                    func.count(distinct(Order.id)),
+                )
+                .join(OrderItem, and_(OrderItem.order_id == Order.id,
+                                      OrderItem.created_at == Order.created_at))
+                .outerjoin(Product, Product.id == OrderItem.product_id)
+                .where(*_day_filters(days), *_created_range(OrderItem.created_at, days))
+                .group_by(day, category, Order.status),
+            )
+        )
+    
+    stmt = insert(SalesRollupState).values(id=STATE_ID, last_refreshed_at=refreshed_at)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SalesRollupState.id],
+        set_={"last_refreshed_at": refreshed_at},
+    )
+    await db.execute(stmt)
+    
+    return {"skipped": False, "days": "all" if days is None else len(days)}
+
+
+def _period_rows(rows, key: Optional[str] = None) -> list:
+    """Format (period, [key,] revenue, orders) rows for the API response."""
+    formatted = []
+    for row in rows:
+        revenue = float(row.revenue or 0)
+        entry = {"period": row.period.isoformat()}
+        if key:
+            entry[key] = getattr(row, key)
+        entry.update({
+            "revenue": round(revenue, 2),
+            "orders": row.orders,
+            "averageOrderValue": round(revenue / row.orders, 2) if row.orders else 0,
+        })
+        formatted.append(entry)
+    return formatted
+
+
+async def sales_timeseries(db: AsyncSession, granularity: str, start: date, end: date) -> dict:
+    """Revenue, order count and AOV per period, overall and by category/status.
+    
+    Reads only sales_daily_rollup, so the cost depends on the number of days
+    in the range rather than on the number of orders.
+    """
+    period = cast(func.date_trunc(granularity, SalesDailyRollup.day), Date).label("period")
+    revenue = func.sum(SalesDailyRollup.revenue).label("revenue")
+    orders = func.sum(SalesDailyRollup.order_count).label("orders")
+    in_range = [SalesDailyRollup.day >= start, SalesDailyRollup.day <= end]
+    
+    result = await db.execute(
+        select(period, revenue, orders)
+        .where(*in_range, SalesDailyRollup.category == ALL_CATEGORIES)
+        .group_by(period)
+        .order_by(period)
+    )
+    series = _period_rows(result.all())
+    
+    result = await db.execute(
+        select(period, SalesDailyRollup.status, revenue, orders)
+        .where(*in_range, SalesDailyRollup.category == ALL_CATEGORIES)
+        .group_by(period, SalesDailyRollup.status)
+        .order_by(period, SalesDailyRollup.status)
+    )
+    by_status = _period_rows(result.all(), "status")
+    
+    result = await db.execute(
+        select(period, SalesDailyRollup.category, revenue, orders)
+        .where(*in_range, SalesDailyRollup.category != ALL_CATEGORIES)
+        .group_by(period, SalesDailyRollup.category)
+        .order_by(period, SalesDailyRollup.category)
+    )
+    by_category = _period_rows(result.all(), "category")
+    
+    return {
+        "granularity": granularity,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "series": series,
+        "byStatus": by_status,
+        "byCategory": by_category,
+    }
@@ -1,18 +1,28 @@
 from datetime import datetime, timedelta
 from typing import Optional
+import hashlib
+import uuid
 from jose import JWTError, jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.config import get_settings
-from app.database import get_db
+from app.database import get_db, AsyncSessionLocal
 from app.models.user import User
 from app.schemas.user import TokenData
+from app.utils.cache import TTLCache
+from app.utils.revocation import revocations
+from app.utils.tracing import traced
 
 settings = get_settings()
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+# Claims of tokens whose signature was already verified, keyed by token digest
+# and dropped when the token expires
+verified_tokens = TTLCache(maxsize=settings.token_cache_size)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -28,48 +38,145 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
     
-    to_encode.update({"exp": expire})
+    # Unique token ID so a single token can be revoked
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db)
-) -> User:
-    """Get the current authenticated user from JWT token."""
-    credentials_exception = HTTPException(
+def decode_access_token(token: str) -> dict:
+    """Verify a JWT and return its claims, skipping re-verification of known tokens.
+    
+    Raises JWTError if the token is invalid or expired.
+    """
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = verified_tokens.get(digest)
+    if payload is not None:
+        return payload
+    
+    payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    # Tokens without exp are verified every time rather than cached forever
+    if isinstance(payload.get("exp"), (int, float)):
+        verified_tokens.set(digest, payload, expires_at=payload["exp"])
+    return payload
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+
+def token_revoked(payload: dict) -> bool:
+    """Whether the token with these claims was revoked (checked in memory)."""
+    jti = payload.get("jti")
+    return bool(jti) and revocations.is_revoked(jti)
+
+
+def _verified_claims(token: str) -> dict:
+    """Claims of a valid, unrevoked token."""
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        user_id_str = payload.get("sub")
-        if user_id_str is None:
-            raise credentials_exception
-        # Convert to integer (JWT stores as string)
-        try:
-            user_id = int(user_id_str)
-        except (ValueError, TypeError):
-            raise credentials_exception
-        token_data = TokenData(user_id=user_id)
+        payload = decode_access_token(token)
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    if token_revoked(payload):
+        raise _credentials_exception()
+    return payload
+
+
+def _user_id_from_token(token: str) -> int:
+    """Id of the user a valid, unrevoked token belongs to."""
+    return _user_id_from_claims(_verified_claims(token))
+
+
+def _user_id_from_claims(payload: dict) -> int:
+    """Id of the user in a token's sub claim."""
+    user_id_str = payload.get("sub")
+    if user_id_str is None:
+        raise _credentials_exception()
+    # Convert to integer (JWT stores as string)
+    try:
+        user_id = int(user_id_str)
+    except (ValueError, TypeError):
+        raise _credentials_exception()
+    return TokenData(user_id=user_id).user_id
+
+
+# Scope key of the user a batch authenticated once for all its sub-requests
+AUTHENTICATED_USER_KEY = "authenticated_user"
+
+
+@traced("get_current_user")
+async def get_current_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """Get the current authenticated user from JWT token."""
+    user = request.scope.get(AUTHENTICATED_USER_KEY)
+    if user is not None:
+        return user
+    
+    user_id = _user_id_from_token(credentials.credentials)
     
     # Get user from database
-    result = await db.execute(select(User).where(User.id == token_data.user_id))
+    result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
     
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    
+    return user
+
+
+async def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    """Dependency that requires admin access."""
+    if current_user.is_admin != 1:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
+
+
+async def get_stream_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    access_token: Optional[str] = Query(None),
+) -> dict:
+    """Claims of the token that opens a long-lived stream.
+    
+    Browsers' EventSource cannot send headers, so the token may also be
+    passed as the access_token query parameter. Streams end at the token's
+    exp and when it is revoked (see event_stream).
+    """
+    token = credentials.credentials if credentials else access_token
+    if not token:
+        raise _credentials_exception()
+    return _verified_claims(token)
+
+
+async def get_stream_user(token: dict = Depends(get_stream_token)) -> User:
+    """Current user of a long-lived stream.
+    
+    The user is loaded in a short session of its own, so an open stream
+    holds no pooled connection.
+    """
+    user_id = _user_id_from_claims(token)
+    
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+    
+    if user is None:
+        raise _credentials_exception()
     
     return user
 
 
 async def get_current_user_optional(
+    request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: AsyncSession = Depends(get_db)
 ) -> Optional[User]:
@@ -78,6 +185,6 @@ async def get_current_user_optional(
         return None
     
     try:
-        return await get_current_user(credentials, db)
+        return await get_current_user(request, credentials, db)
     except HTTPException:
         return None
@@ -0,0 +1,240 @@
+import asyncio
+import json
+import logging
+import time
+from http.cookies import CookieError, SimpleCookie
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from fastapi import FastAPI, Request
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.middleware.exceptions import ExceptionMiddleware
+from starlette.requests import cookie_parser
+
+from app.config import get_settings
+from app.database import SHARED_SESSION_KEY
+from app.models.user import User
+from app.schemas.batch import SubRequest
+from app.utils.admission import AdmissionMiddleware, admission, classify_route
+from app.utils.auth import AUTHENTICATED_USER_KEY, get_current_user
+from app.utils.live_updates import STREAM_PATHS
+from app.utils.query_budget import QueryBudgetMiddleware
+from app.utils.timeouts import route_statement_timeout
+from app.utils.tracing import tracer
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+BATCH_PATH = "/api/batch"
+
+# Parts of the batch's scope that sub-requests inherit
+_INHERITED_SCOPE = ("asgi", "http_version", "scheme", "server", "client", "root_path", "app")
+
+# Headers describing the batch's own body, or its cookies, replaced for each sub-request
+_REPLACED_HEADERS = (b"content-length", b"content-type", b"cookie")
+
+# The batch's user is loaded like GET /api/auth/me would load it
+_AUTH_ROUTE = ("GET", "/api/auth/me")
+
+_INTERNAL_ERROR = json.dumps({"detail": "Internal Server Error"}).encode()
+
+
+def unbatchable_reason(path: str) -> Optional[str]:
+    """Why a path cannot be part of a batch, None if it can."""
+    url = urlsplit(path)
+    if url.scheme or url.netloc or not url.path.startswith("/api/"):
+        return "Only /api/ paths can be batched"
+    if url.path.rstrip("/") == BATCH_PATH:
+        return "Batches cannot be nested"
+    if url.path.rstrip("/") in STREAM_PATHS:
+        return "Event streams cannot be batched"
+    return None
+
+
+def _decode_body(headers: List[Tuple[bytes, bytes]], body: bytes):
+    if not body:
+        return None
+    content_type = dict(headers).get(b"content-type", b"")
+    if content_type.startswith(b"application/json"):
+        return json.loads(body)
+    return body.decode("utf-8", "replace")
+
+
+def _parent_cookies(headers: List[Tuple[bytes, bytes]]) -> Dict[str, str]:
+    cookies = {}
+    for name, value in headers:
+        if name == b"cookie":
+            cookies.update(cookie_parser(value.decode("latin-1")))
+    return cookies
+
+
+def _apply_set_cookie(cookies: Dict[str, str], header: bytes) -> None:
+    """Update a cookie jar from a Set-Cookie value, as a browser would."""
+    parsed = SimpleCookie()
+    try:
+        parsed.load(header.decode("latin-1"))
+    except CookieError:
+        return
+    for name, morsel in parsed.items():
+        if morsel["max-age"] in ("0", "-1"):
+            cookies.pop(name, None)
+        else:
+            cookies[name] = morsel.value
+
+
+class BatchDispatcher:
+    """Runs the sub-requests of a batch against the app's routes in-process.
+
+    Each sub-request is admitted in its own route group, and goes through
+    routing, validation, dependencies (rate limits included) and exception
+    handlers, so it gets the status code and body it would get on its own,
+    503 and 429 included. Metrics, tracing and CORS apply to the batch as a
+    whole. Sub-requests run one after another on the batch's session and
+    user, so the user is authenticated once and writes are seen by the
+    sub-requests after them. Cookies set by one sub-request are sent with
+    the ones after it, as a browser would.
+
+    The session holds a pooled connection only while an admitted
+    sub-request uses it: its transaction is ended before the next
+    sub-request waits for admission, and each sub-request's transaction
+    runs under its own route's statement timeout.
+    """
+
+    def __init__(self, app: FastAPI):
+        handler = ExceptionMiddleware(app.router, handlers=app.exception_handlers)
+        # Each sub-request is held to its own route's query budget
+        if settings.environment == "development":
+            handler = QueryBudgetMiddleware(handler)
+        self._routes = handler
+        handler = self._refresh_user
+        # The batch itself skips admission (see classify_route), so the
+        # sub-requests take the slots a client calling them one by one would
+        if settings.admission_enabled:
+            handler = AdmissionMiddleware(handler, controller=admission)
+        self.app = handler
+
+    async def _refresh_user(self, scope, receive, send):
+        """Reload the batch's user once admitted, if a failed sub-request's rollback expired it."""
+        user = scope.get(AUTHENTICATED_USER_KEY)
+        if user is not None and inspect(user).expired:
+            await scope[SHARED_SESSION_KEY].refresh(user)
+        await self._routes(scope, receive, send)
+
+    def _scope(self, parent: dict, method: str, path: str, payload: Optional[bytes], shared: dict,
+               cookies: Dict[str, str]) -> dict:
+        url = urlsplit(path)
+        headers = [(name, value) for name, value in parent["headers"] if name not in _REPLACED_HEADERS]
+        if payload is not None:
+            headers += [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())]
+        if cookies:
+            headers.append((b"cookie", "; ".join(f"{name}={value}" for name, value in cookies.items()).encode("latin-1")))
+        scope = {key: parent[key] for key in _INHERITED_SCOPE if key in parent}
+        if "state" in parent:
+            # Request state is per request; start from the lifespan state like the server does
+            scope["state"] = dict(parent["state"])
+        scope.update({
+            "type": "http",
+            "method": method,
+            "path": url.path,
+            "raw_path": url.path.encode(),
+            "query_string": url.query.encode(),
+            "headers": headers,
+        })
+        scope.update(shared)
+        return scope
+
+    async def _call(self, scope: dict, payload: Optional[bytes]) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+        finished = asyncio.Event()
+        received = False
+        start = {}
+        chunks = []
+
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": payload or b"", "more_body": False}
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            finished.set()
+        return start["status"], list(start.get("headers", [])), b"".join(chunks)
+
+    async def authenticate(self, request: Request, credentials: HTTPAuthorizationCredentials,
+                           db: AsyncSession) -> User:
+        """Load the batch's user in an account admission slot, then release the connection.
+
+        Raises AdmissionRejected when no slot frees up in time.
+        """
+        group = await admission.acquire(classify_route(*_AUTH_ROUTE)) if settings.admission_enabled else None
+        started = time.perf_counter()
+        try:
+            db.info["statement_timeout_ms"] = route_statement_timeout(*_AUTH_ROUTE)
+            return await get_current_user(request, credentials, db)
+        finally:
+            await db.commit()
+            if group is not None:
+                admission.release(group, time.perf_counter() - started)
+
+    async def run(self, parent: dict, requests: List[SubRequest], db: AsyncSession,
+                  user: Optional[User]) -> Tuple[List[dict], List[bytes]]:
+        """Responses in request order, and the Set-Cookie values to pass on."""
+        shared = {SHARED_SESSION_KEY: db}
+        if user is not None:
+            shared[AUTHENTICATED_USER_KEY] = user
+        cookies = _parent_cookies(parent["headers"])
+
+        responses = []
+        set_cookies = []
+        for request in requests:
+            reason = unbatchable_reason(request.path)
+            if reason is not None:
+                responses.append({"id": request.id, "status": 400, "headers": {}, "body": {"detail": reason}})
+                continue
+
+            # Give the connection back before waiting for admission; the
+            # sub-request's first statement begins a transaction under its
+            # own route's timeout
+            await db.commit()
+            db.info["statement_timeout_ms"] = route_statement_timeout(request.method, urlsplit(request.path).path)
+
+            payload = None if request.body is None else json.dumps(request.body).encode()
+            with tracer.span("batch.request", method=request.method, path=request.path):
+                try:
+                    status_code, headers, body = await self._call(
+                        self._scope(parent, request.method, request.path, payload, shared, cookies), payload
+                    )
+                except Exception:
+                    logger.exception("Batched %s %s failed", request.method, request.path)
+                    status_code, headers, body = 500, [(b"content-type", b"application/json")], _INTERNAL_ERROR
+
+            if status_code >= 400:
+                # Drop whatever the failed call left in the shared session
+                await db.rollback()
+
+            for name, value in headers:
+                if name == b"set-cookie":
+                    set_cookies.append(value)
+                    _apply_set_cookie(cookies, value)
+            responses.append({
+                "id": request.id,
+                "status": status_code,
+                "headers": {
+                    name.decode("latin-1"): value.decode("latin-1")
+                    for name, value in headers
+                    if name not in (b"content-length", b"set-cookie")
+                },
+                "body": _decode_body(headers, body),
+            })
+        return responses, set_cookies
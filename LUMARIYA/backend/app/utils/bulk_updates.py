@@ -0,0 +1,175 @@
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List, Optional
+
+from sqlalchemy import select, update, func, cast, Numeric, Float
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.order import Order, OrderSummary
+from app.models.product import Product
+from app.utils.catalog import bump_catalog_version
+from app.utils.live_updates import publish_many
+from app.utils.order_events import (
+    ORDER_STATUS_CHANGED,
+    ORDER_TRANSITIONS,
+    status_changed_payload,
+    live_update,
+)
+from app.utils.outbox import enqueue
+
+# Orders changed by one filter-based status update; repeat the call for more
+MAX_FILTERED_ORDERS = 1000
+
+
+async def bulk_update_order_status(
+    db: AsyncSession,
+    new_status: str,
+    order_ids: Optional[List[int]] = None,
+    from_status: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> dict:
+    """Move orders to new_status in one UPDATE ... RETURNING.
+
+    Orders are picked by id and/or by current status and creation time.
+    Each order either moves or is reported with the reason it did not: it
+    was already in the status, the transition is not allowed, or (ids only)
+    it does not exist. Allowed transitions are checked in the UPDATE itself
+    against the locked current status, and the moved orders' summaries are
+    updated by the same statement. Moved orders get the same outbox event
+    and live update as single status changes.
+    """
+    conditions = []
+    if order_ids is not None:
+        conditions.append(Order.id.in_(order_ids))
+    if from_status is not None:
+        conditions.append(Order.status == from_status)
+    if created_after is not None:
+        conditions.append(Order.created_at >= created_after)
+    if created_before is not None:
+        conditions.append(Order.created_at < created_before)
+
+    target = select(
+        Order.id, Order.created_at, Order.status.label("old_status"), Order.user_id, Order.total
+    ).where(*conditions)
+    if order_ids is None:
+        target = target.order_by(Order.id).limit(MAX_FILTERED_ORDERS)
+    target = target.with_for_update().cte("target")
+
+    allowed_from = [status for status, allowed in ORDER_TRANSITIONS.items() if new_status in allowed]
+    updated = (
+        update(Order)
+        .where(
+            Order.id == target.c.id,
+            Order.created_at == target.c.created_at,
+            target.c.old_status.in_(allowed_from),
+        )
+        .values(status=new_status, updated_at=func.now())
+        .returning(Order.id)
+        .cte("updated")
+    )
+    summaries = (
+        update(OrderSummary)
+        .where(OrderSummary.order_id == updated.c.id)
+        .values(status=new_status)
+        .returning(OrderSummary.order_id)
+        .cte("summaries")
+    )
+    result = await db.execute(
+        select(target, updated.c.id.is_not(None).label("updated"))
+        .select_from(target.outerjoin(updated, updated.c.id == target.c.id))
+        .add_cte(summaries)
+        .order_by(target.c.id)
+    )
+    rows = result.all()
+
+    results = []
+    events = []
+    for row in rows:
+        if row.updated:
+            outcome = "updated"
+            order = SimpleNamespace(id=row.id, user_id=row.user_id, status=new_status, total=row.total)
+            enqueue(db, ORDER_STATUS_CHANGED, row.id, status_changed_payload(order, row.old_status))
+            events.append(live_update(order, ORDER_STATUS_CHANGED, row.old_status))
+        elif row.old_status == new_status:
+            outcome = "unchanged"
+        else:
+            outcome = "invalid_transition"
+        results.append({"id": row.id, "result": outcome, "fromStatus": row.old_status})
+
+    if order_ids is not None:
+        found = {row.id for row in rows}
+        results.extend({"id": order_id, "result": "not_found", "fromStatus": None}
+                       for order_id in sorted(set(order_ids) - found))
+
+    await publish_many(db, events)
+    return {
+        "updated": len(events),
+        "more": order_ids is None and len(rows) == MAX_FILTERED_ORDERS,
+        "results": results,
+    }
+
+
+async def bulk_update_prices(
+    db: AsyncSession,
+    category: Optional[str] = None,
+    product_ids: Optional[List[str]] = None,
+    percent: Optional[float] = None,
+    amount: Optional[float] = None,
+) -> dict:
+    """Change the price of a category and/or set of products in one UPDATE ... RETURNING.
+
+    The new price is the old one scaled by percent or shifted by amount,
+    rounded to 2 decimals. Products whose new price would not be positive
+    are left unchanged and reported as invalid_price.
+    """
+    conditions = []
+    if category is not None:
+        conditions.append(Product.category == category)
+    if product_ids is not None:
+        conditions.append(Product.id.in_(product_ids))
+
+    if percent is not None:
+        new_price = Product.price * (1 + percent / 100)
+    else:
+        new_price = Product.price + amount
+    new_price = cast(func.round(cast(new_price, Numeric), 2), Float)
+
+    target = (
+        select(Product.id, Product.price.label("old_price"), new_price.label("new_price"))
+        .where(*conditions)
+        .with_for_update()
+        .cte("target")
+    )
+    updated = (
+        update(Product)
+        .where(Product.id == target.c.id, target.c.new_price > 0)
+        .values(price=target.c.new_price, updated_at=func.now())
+        .returning(Product.id)
+        .cte("updated")
+    )
+    result = await db.execute(
+        select(target, updated.c.id.is_not(None).label("updated"))
+        .select_from(target.outerjoin(updated, updated.c.id == target.c.id))
+        .order_by(target.c.id)
+    )
+    rows = result.all()
+
+    results = [
+        {
+            "id": row.id,
+            "result": "updated" if row.updated else "invalid_price",
+            "oldPrice": row.old_price,
+            "newPrice": row.new_price if row.updated else row.old_price,
+        }
+        for row in rows
+    ]
+    if product_ids is not None:
+        found = {row.id for row in rows}
+        results.extend({"id": product_id, "result": "not_found", "oldPrice": None, "newPrice": None}
+                       for product_id in sorted(set(product_ids) - found))
+
+    updated_count = sum(1 for row in rows if row.updated)
+    if updated_count:
+        await bump_catalog_version(db)
+    return {"updated": updated_count, "results": results}
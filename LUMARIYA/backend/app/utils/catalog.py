@@ -0,0 +1,30 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.catalog import CatalogVersion
+
+# The catalog version lives in a single row
+CATALOG_VERSION_ID = 1
+
+
+async def get_catalog_version(db: AsyncSession) -> int:
+    """Return the current catalog version (0 if the catalog was never changed)."""
+    result = await db.execute(
+        select(CatalogVersion.version).where(CatalogVersion.id == CATALOG_VERSION_ID)
+    )
+    return result.scalar() or 0
+
+
+async def bump_catalog_version(db: AsyncSession) -> None:
+    """Increment the catalog version inside the caller's transaction.
+    
+    Call this before committing any change to the products table so cached
+    catalog aggregates (facets, etc.) are recomputed on the next request.
+    """
+    stmt = insert(CatalogVersion).values(id=CATALOG_VERSION_ID, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CatalogVersion.id],
+        set_={"version": CatalogVersion.version + 1},
+    )
+    await db.execute(stmt)
@@ -0,0 +1,107 @@
+import asyncio
+from collections import deque
+from typing import Optional
+
+# ASGI scope key under which DisconnectMiddleware exposes the monitor
+SCOPE_KEY = "disconnect_monitor"
+
+
+class DisconnectMonitor:
+    """Notices when the client of one HTTP request goes away.
+
+    ASGI only reports a disconnect to whoever calls receive(), so once
+    watch() is called a background task keeps receiving on the app's behalf.
+    The app's own receive() calls are then answered from the messages it
+    buffered, so a late body read or a streaming response still works.
+    """
+
+    def __init__(self, receive):
+        self._receive = receive
+        self.disconnected = asyncio.Event()
+        self.cancelled_request = False
+        self._task: Optional[asyncio.Task] = None
+        self._buffered = deque()
+        self._arrived = asyncio.Event()
+
+    async def receive(self):
+        if self._task is not None:
+            while not self._buffered and not self.disconnected.is_set():
+                self._arrived.clear()
+                await self._arrived.wait()
+            if self._buffered:
+                return self._buffered.popleft()
+            return {"type": "http.disconnect"}
+        message = await self._receive()
+        if message["type"] == "http.disconnect":
+            self.disconnected.set()
+        return message
+
+    def watch(self) -> None:
+        """Start listening for a disconnect in the background."""
+        if self._task is None and not self.disconnected.is_set():
+            self._task = asyncio.create_task(self._watch())
+
+    async def _watch(self) -> None:
+        while True:
+            message = await self._receive()
+            if message["type"] == "http.disconnect":
+                self.disconnected.set()
+                self._arrived.set()
+                return
+            self._buffered.append(message)
+            self._arrived.set()
+
+    def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+
+class DisconnectGuard:
+    """Cancels the current request task if its client disconnects.
+
+    Cancelling the task while it awaits a query makes asyncpg send a cancel
+    request, so the server stops working on the statement and the pooled
+    connection is released.
+    """
+
+    def __init__(self, monitor: DisconnectMonitor):
+        self.monitor = monitor
+        self.triggered = False
+        self._request_task = asyncio.current_task()
+        monitor.watch()
+        self._task = asyncio.create_task(self._wait())
+
+    async def _wait(self) -> None:
+        await self.monitor.disconnected.wait()
+        self.triggered = True
+        self.monitor.cancelled_request = True
+        self._request_task.cancel()
+
+    def stop(self) -> None:
+        if not self._task.done():
+            self._task.cancel()
+
+
+class DisconnectMiddleware:
+    """ASGI middleware that installs a DisconnectMonitor for each HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        monitor = DisconnectMonitor(receive)
+        scope[SCOPE_KEY] = monitor
+        try:
+            await self.app(scope, monitor.receive, send)
+        except asyncio.CancelledError:
+            if not monitor.cancelled_request:
+                raise
+            # Cancelled by a DisconnectGuard: nobody is left to answer
+            task = asyncio.current_task()
+            if hasattr(task, "uncancel"):
+                task.uncancel()
+        finally:
+            monitor.stop()
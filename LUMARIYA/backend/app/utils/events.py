@@ -0,0 +1,102 @@
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from app.config import get_settings
+from app.database import engine
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class ViewEventBuffer:
+    """In-process ring buffer of product-view events flushed to Postgres in batches.
+    
+    Requests only append to a deque; a background task writes the buffered
+    events with COPY once batch_size events are waiting or every
+    flush_interval seconds. When the buffer is full the oldest events are
+    dropped (and counted) rather than blocking the request path. A failed
+    flush puts the events back so the next attempt retries them, and stop()
+    flushes whatever is left on graceful shutdown.
+    """
+    
+    def __init__(self, capacity: int, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._events: deque = deque(maxlen=capacity)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+    
+    def __len__(self) -> int:
+        return len(self._events)
+    
+    def add(self, product_id: str) -> None:
+        """Record a view without doing any I/O."""
+        if len(self._events) == self._events.maxlen:
+            self.dropped += 1
+        self._events.append((product_id, datetime.now(timezone.utc)))
+        if len(self._events) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+    
+    async def flush(self) -> int:
+        """Write all buffered events and return how many were written."""
+        if not self._events:
+            return 0
+        
+        records = [self._events.popleft() for _ in range(len(self._events))]
+        try:
+            await self._write(records)
+        except Exception:
+            logger.exception("Failed to flush %d product view events", len(records))
+            # Put the events back ahead of newer ones for the next attempt
+            space = self._events.maxlen - len(self._events)
+            self.dropped += max(0, len(records) - space)
+            self._events.extendleft(reversed(records[-space:] if space else []))
+            return 0
+        return len(records)
+    
+    async def _write(self, records: List[Tuple[str, datetime]]) -> None:
+        """COPY the records into product_views."""
+        async with engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                "product_views",
+                records=records,
+                columns=["product_id", "viewed_at"],
+            )
+    
+    async def _run(self) -> None:
+        """Flush on the size threshold or the timer until stopped."""
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+    
+    def start(self) -> None:
+        """Start the background flush task on the running event loop."""
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Stop the flush task and write any remaining events."""
+        self._stopping = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+
+view_events = ViewEventBuffer(
+    capacity=settings.view_buffer_size,
+    batch_size=settings.view_flush_batch_size,
+    flush_interval=settings.view_flush_interval_seconds,
+)
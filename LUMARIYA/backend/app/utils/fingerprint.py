@@ -0,0 +1,26 @@
+import re
+from functools import lru_cache
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"(?<![\w$.])\d+(?:\.\d+)?\b")
+_PARAMS = re.compile(r"\$\d+|%\(\w+\)s|%s|(?<!:):\w+|\?")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_ROWS = re.compile(r"(\((?:\?|\.\.\.)\))(?:, \((?:\?|\.\.\.)\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """Normalize a statement so executions with different values group together.
+
+    Literals and bind parameters become ?, lists of them collapse to (...),
+    and multi-row VALUES collapse to one row.
+    """
+    statement = _COMMENTS.sub(" ", statement)
+    statement = _STRINGS.sub("?", statement)
+    statement = _PARAMS.sub("?", statement)
+    statement = _NUMBERS.sub("?", statement)
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _LISTS.sub("(...)", statement)
+    return _VALUES_ROWS.sub(r"\1, ...", statement)
@@ -0,0 +1,224 @@
+import base64
+import hashlib
+import hmac
+import json
+import zlib
+from typing import Dict, List, NamedTuple, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import select, func, literal, literal_column, bindparam, Integer, String
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.cart import Cart
+from app.models.product import Product
+from app.schemas.product import ProductResponse
+from app.utils.cache import VersionedCache
+from app.utils.catalog import get_catalog_version
+from app.utils.pricing import bump_cart_version
+
+settings = get_settings()
+
+COOKIE_NAME = "guest_cart"
+
+# Browsers drop cookies over 4KB; stay clear of it with the name and attributes
+MAX_COOKIE_BYTES = 3800
+
+# Largest decompressed payload accepted, so a forged cookie cannot inflate
+MAX_PAYLOAD_BYTES = 16384
+
+# Signing key of guest carts, derived so it differs from the JWT key
+_KEY = hmac.new(settings.secret_key.encode(), b"guest-cart", hashlib.sha256).digest()
+_SIGNATURE_BYTES = 16
+
+# Products of guest carts, per catalog version
+product_cache = VersionedCache(maxsize=4096)
+
+# Cached for ids that are not in the catalog
+_UNKNOWN = object()
+
+# Conflict target of the cart's unique index on user, product, size and color
+CART_LINE_KEY = [
+    Cart.user_id,
+    Cart.product_id,
+    func.coalesce(Cart.size, literal_column("''")),
+    func.coalesce(Cart.color, literal_column("''")),
+]
+
+
+def cart_option(value: Optional[str]) -> Optional[str]:
+    """Size or color as stored: the unique index treats "" and NULL alike, so "" is stored as NULL."""
+    return value or None
+
+
+class GuestCartFull(ValueError):
+    """Raised when a guest cart would not fit in its cookie."""
+
+
+class GuestCartLine(NamedTuple):
+    product_id: str
+    quantity: int
+    size: Optional[str]
+    color: Optional[str]
+
+    @property
+    def options(self):
+        return self.product_id, self.size, self.color
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(_KEY, payload, hashlib.sha256).digest()[:_SIGNATURE_BYTES]
+
+
+def encode_cart(lines: List[GuestCartLine]) -> str:
+    """Signed, compressed cookie value holding the lines."""
+    if len(lines) > settings.guest_cart_max_items:
+        raise GuestCartFull(f"A guest cart can hold at most {settings.guest_cart_max_items} items")
+    payload = zlib.compress(json.dumps([list(line) for line in lines], separators=(",", ":")).encode(), 9)
+    value = f"{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+    if len(value) > MAX_COOKIE_BYTES:
+        raise GuestCartFull("The guest cart is full, sign in to add more items")
+    return value
+
+
+def _valid_line(line) -> bool:
+    return (
+        isinstance(line, list) and len(line) == 4
+        and isinstance(line[0], str) and 0 < len(line[0]) <= 255
+        and type(line[1]) is int and line[1] > 0
+        and all(part is None or isinstance(part, str) for part in line[2:])
+    )
+
+
+def decode_cart(value: Optional[str]) -> List[GuestCartLine]:
+    """Lines of a cookie value; an empty cart if it is missing, forged or malformed."""
+    if not value:
+        return []
+    try:
+        payload_text, signature_text = value.split(".", 1)
+        payload = _b64decode(payload_text)
+        if not hmac.compare_digest(_sign(payload), _b64decode(signature_text)):
+            return []
+        decompressor = zlib.decompressobj()
+        data = decompressor.decompress(payload, MAX_PAYLOAD_BYTES)
+        if decompressor.unconsumed_tail:
+            return []
+        lines = json.loads(data)
+    except (ValueError, zlib.error):
+        return []
+    if not isinstance(lines, list) or not all(_valid_line(line) for line in lines):
+        return []
+    return merge_lines([GuestCartLine(*line) for line in lines[:settings.guest_cart_max_items]])
+
+
+def merge_lines(lines: List[GuestCartLine]) -> List[GuestCartLine]:
+    """Lines with the same product, size and color combined, in first-seen order."""
+    merged: Dict[tuple, GuestCartLine] = {}
+    for line in lines:
+        line = line._replace(size=cart_option(line.size), color=cart_option(line.color))
+        existing = merged.get(line.options)
+        merged[line.options] = line if existing is None else existing._replace(
+            quantity=existing.quantity + line.quantity
+        )
+    return list(merged.values())
+
+
+def read_guest_cart(request: Request) -> List[GuestCartLine]:
+    return decode_cart(request.cookies.get(COOKIE_NAME))
+
+
+def write_guest_cart(response: Response, lines: List[GuestCartLine]) -> None:
+    """Store the lines in the response's cookie, or drop the cookie when empty."""
+    if not lines:
+        clear_guest_cart(response)
+        return
+    response.set_cookie(
+        COOKIE_NAME,
+        encode_cart(lines),
+        max_age=settings.guest_cart_max_age_days * 86400,
+        httponly=True,
+        secure=settings.environment == "production",
+        samesite="lax",
+    )
+
+
+def clear_guest_cart(response: Response) -> None:
+    response.delete_cookie(COOKIE_NAME, httponly=True, secure=settings.environment == "production",
+                           samesite="lax")
+
+
+async def load_products(db: AsyncSession, product_ids, version: Optional[int] = None) -> Dict[str, ProductResponse]:
+    """Catalog entries of the given ids that exist.
+
+    Entries are cached per catalog version, so a warm lookup costs only
+    the version check (none when the caller passes the version); ids not
+    cached yet are loaded with one IN query.
+    """
+    if version is None:
+        version = await get_catalog_version(db)
+    products = {}
+    missing = []
+    for product_id in set(product_ids):
+        cached = product_cache.get(product_id, version)
+        if cached is None:
+            missing.append(product_id)
+        elif cached is not _UNKNOWN:
+            products[product_id] = cached
+
+    if missing:
+        result = await db.execute(select(Product).where(Product.id.in_(missing)))
+        for product in result.scalars().all():
+            products[product.id] = ProductResponse.model_validate(product)
+        for product_id in missing:
+            product_cache.set(product_id, version, products.get(product_id, _UNKNOWN))
+    return products
+
+
+async def merge_guest_cart(db: AsyncSession, user_id: int, lines: List[GuestCartLine]) -> None:
+    """Add guest cart lines to a user's cart in one INSERT ... ON CONFLICT.
+
+    Quantities of lines already in the cart (same product, size and color)
+    are added up; lines of products that no longer exist are skipped.
+    """
+    # One row per conflict key, or the upsert would update a row twice
+    lines = merge_lines(lines)
+    if not lines:
+        return
+    guest = func.unnest(
+        bindparam("product_ids", [line.product_id for line in lines], type_=ARRAY(String)),
+        bindparam("quantities", [line.quantity for line in lines], type_=ARRAY(Integer)),
+        bindparam("sizes", [line.size for line in lines], type_=ARRAY(String)),
+        bindparam("colors", [line.color for line in lines], type_=ARRAY(String)),
+    ).table_valued("product_id", "quantity", "size", "color").render_derived(name="guest")
+
+    stmt = insert(Cart).from_select(
+        ["user_id", "product_id", "quantity", "size", "color"],
+        select(literal(user_id), guest.c.product_id, guest.c.quantity, guest.c.size, guest.c.color)
+        .where(guest.c.product_id.in_(select(Product.id))),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=CART_LINE_KEY,
+        set_={"quantity": Cart.quantity + stmt.excluded.quantity},
+    )
+    await db.execute(stmt)
+    await bump_cart_version(db, user_id)
+
+
+async def adopt_guest_cart(request: Request, response: Response, db: AsyncSession, user_id: int) -> None:
+    """Merge the request's guest cart into the user's cart and drop the cookie.
+
+    Call after login, registration or an OAuth sign-in; the caller commits.
+    """
+    if COOKIE_NAME not in request.cookies:
+        return
+    await merge_guest_cart(db, user_id, read_guest_cart(request))
+    clear_guest_cart(response)
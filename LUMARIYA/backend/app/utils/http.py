@@ -0,0 +1,240 @@
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+
+import httpx
+
+from app.config import get_settings
+from app.utils.cache import TTLCache
+from app.utils.tracing import tracer, inject_traceparent
+
+settings = get_settings()
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose circuit breaker is open."""
+
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"Circuit open for {host}, retry in {retry_after:.0f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one upstream host.
+
+    After failure_threshold failures in a row the circuit opens and calls fail
+    immediately for reset_timeout seconds; then a single trial call is let
+    through, which closes the circuit on success or re-opens it on failure.
+    """
+
+    def __init__(self, host: str, failure_threshold: int, reset_timeout: float):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self) -> bool:
+        """Raise CircuitOpenError unless a call may go out now.
+
+        Returns True when the call is the half-open trial.
+        """
+        state = self.state
+        if state == "closed":
+            return False
+        if state == "half-open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        retry_after = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+        raise CircuitOpenError(self.host, retry_after)
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Let another trial through after a call that ended without an outcome.
+
+        A cancelled or timed-out trial records neither success nor failure,
+        and would otherwise keep the circuit open for good.
+        """
+        self._trial_in_flight = False
+
+
+class HostStats:
+    """Call count, error count and latency totals for one upstream host."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float, error: bool) -> None:
+        self.calls += 1
+        self.errors += int(error)
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def snapshot(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_ms": round(self.total_seconds / self.calls * 1000, 2) if self.calls else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 2),
+        }
+
+
+class SharedTransport(httpx.AsyncBaseTransport):
+    """Transport that routes requests through the shared connection pool.
+
+    Short-lived clients (such as the ones authlib creates per OAuth call) can
+    be given this transport: their requests reuse pooled keep-alive
+    connections, go through the per-host circuit breaker and are timed, and
+    closing the client does not close the shared pool. Each call gets a client
+    span, and the trace context is forwarded in a traceparent header.
+    """
+
+    def __init__(self, owner: "SharedHTTPClient"):
+        self.owner = owner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        breaker = self.owner.breaker(host)
+        trial = breaker.before_call()
+
+        try:
+            return await self._send(request, host, breaker)
+        finally:
+            if trial:
+                # No-op once the trial recorded its outcome
+                breaker.release_trial()
+
+    async def _send(self, request: httpx.Request, host: str, breaker: CircuitBreaker) -> httpx.Response:
+        with tracer.span(f"HTTP {request.method} {host}", "client") as span:
+            inject_traceparent(request.headers)
+            span.set("http.method", request.method)
+            span.set("http.url", str(request.url.copy_with(query=None)))
+
+            started = time.perf_counter()
+            try:
+                response = await self.owner.pool.handle_async_request(request)
+            except Exception:
+                breaker.record_failure()
+                self.owner.stats[host].record(time.perf_counter() - started, error=True)
+                raise
+
+            failed = response.status_code >= 500
+            if failed:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            self.owner.stats[host].record(time.perf_counter() - started, error=failed)
+            span.set("http.status_code", response.status_code)
+            return response
+
+    async def aclose(self) -> None:
+        # The pool is owned by SharedHTTPClient and closed on shutdown
+        pass
+
+
+class SharedHTTPClient:
+    """Process-wide pooled HTTP client for calls to external providers.
+
+    Opened lazily and closed from the application lifespan. Also caches JSON
+    documents such as OIDC discovery metadata and JWKS with a TTL.
+    """
+
+    def __init__(self, timeout: float, max_connections: int,
+                 failure_threshold: int, reset_timeout: float):
+        self.timeout = httpx.Timeout(timeout, connect=min(timeout, 5.0))
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=60.0,
+        )
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.transport = SharedTransport(self)
+        self.stats: Dict[str, HostStats] = defaultdict(HostStats)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._pool: Optional[httpx.AsyncHTTPTransport] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._documents = TTLCache(maxsize=64)
+        self._document_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    @property
+    def pool(self) -> httpx.AsyncHTTPTransport:
+        if self._pool is None:
+            self._pool = httpx.AsyncHTTPTransport(limits=self.limits, retries=1)
+        return self._pool
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared client for direct provider calls."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(transport=self.transport, timeout=self.timeout)
+        return self._client
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(host, self.failure_threshold, self.reset_timeout)
+        return self._breakers[host]
+
+    async def get_json_cached(self, url: str, ttl: float) -> dict:
+        """GET a JSON document, served from cache for ttl seconds."""
+        document = self._documents.get(url)
+        if document is not None:
+            return document
+
+        # One fetch per URL at a time; concurrent callers wait for its result
+        async with self._document_locks[url]:
+            document = self._documents.get(url)
+            if document is None:
+                response = await self.client.get(url)
+                response.raise_for_status()
+                document = response.json()
+                self._documents.set(url, document, ttl=ttl)
+        return document
+
+    def snapshot(self) -> dict:
+        """Per-host call statistics and circuit breaker states."""
+        return {
+            host: {**stats.snapshot(), "circuit": self.breaker(host).state}
+            for host, stats in self.stats.items()
+        }
+
+    async def close(self) -> None:
+        """Close pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._pool is not None:
+            await self._pool.aclose()
+            self._pool = None
+
+
+http_client = SharedHTTPClient(
+    timeout=settings.oauth_http_timeout_seconds,
+    max_connections=settings.oauth_http_max_connections,
+    failure_threshold=settings.circuit_breaker_failure_threshold,
+    reset_timeout=settings.circuit_breaker_reset_seconds,
+)
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.config import get_settings
+from app.database import engine
+from app.utils.admission import AdmissionRejected, admission
+from app.utils.product_import import ProductImport
+from app.utils.timeouts import STATEMENT_TIMEOUTS_MS
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class ImportJob:
+    """An uploaded product feed, imported in the background and polled for progress."""
+
+    def __init__(self, path: str, fmt: str, filename: str):
+        self.id = uuid.uuid4().hex
+        self.path = path
+        self.fmt = fmt
+        self.filename = filename
+        self.status = "queued"  # queued, running, done, failed
+        self.summary: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "summary": self.summary,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ImportJobQueue:
+    """Runs uploaded product imports one at a time in a background task.
+
+    An upload is saved to a temp file and queued, and the request returns
+    at once. The worker imports each feed on a connection from the app's
+    pool, holding an admin admission slot for as long as it does, and its
+    batches run under the admin statement timeout. The most recent `keep`
+    jobs can be looked up by id.
+    """
+
+    def __init__(self, keep: int = 100):
+        self.keep = keep
+        self.jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def submit(self, path: str, fmt: str, filename: str) -> ImportJob:
+        """Queue the feed at path, which the job deletes once imported."""
+        job = ImportJob(path, fmt, filename)
+        self.jobs[job.id] = job
+        while len(self.jobs) > self.keep:
+            oldest = next(iter(self.jobs.values()))
+            if oldest.status in ("queued", "running"):
+                break
+            self.jobs.popitem(last=False)
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        return self.jobs.get(job_id)
+
+    async def _admit(self):
+        """Wait for an admin slot, like a request that keeps retrying after 503."""
+        while True:
+            try:
+                return await admission.acquire("admin")
+            except AdmissionRejected as e:
+                await asyncio.sleep(max(1.0, e.retry_after))
+
+    async def _import(self, job: ImportJob) -> None:
+        group = await self._admit() if settings.admission_enabled else None
+        job.status = "running"
+        try:
+            with open(job.path, encoding="utf-8-sig", newline="") as stream:
+                product_import = ProductImport(
+                    stream, job.fmt, settings.product_import_batch_size, settings.product_import_max_errors,
+                    statement_timeout_ms=STATEMENT_TIMEOUTS_MS["admin"],
+                )
+                job.summary = product_import.summary()
+
+                def progress(summary: dict) -> None:
+                    job.summary = summary
+
+                async with engine.connect() as conn:
+                    job.summary = await product_import.run(conn, on_progress=progress)
+            job.status = "done"
+        finally:
+            if group is not None:
+                # An import's duration says nothing about admin requests' service time
+                admission.release(group, 0.0)
+
+    async def _run(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._import(job)
+            except asyncio.CancelledError:
+                job.status, job.error = "failed", "Interrupted by shutdown"
+                raise
+            except Exception as e:
+                logger.exception("Product import %s failed", job.id)
+                job.status, job.error = "failed", str(e)
+            finally:
+                job.finished_at = datetime.now(timezone.utc)
+                os.unlink(job.path)
+
+    def start(self) -> None:
+        """Start the worker on the running event loop."""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the running import (its committed batches stay) and drop queued ones."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._queue is not None and not self._queue.empty():
+            job = self._queue.get_nowait()
+            job.status, job.error = "failed", "Interrupted by shutdown"
+            os.unlink(job.path)
+
+
+import_jobs = ImportJobQueue()
@@ -0,0 +1,53 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    """Run a database job in the background every `interval` seconds.
+    
+    Each run gets its own session and is committed when the job returns;
+    failures are logged and retried on the next tick. Jobs must be safe to run
+    from several workers at once (e.g. guarded by an advisory lock).
+    """
+    
+    def __init__(self, name: str, job: Callable[[AsyncSession], Awaitable[object]], interval: float):
+        self.name = name
+        self.job = job
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+    
+    async def run_once(self) -> None:
+        """Run the job a single time in its own transaction."""
+        async with AsyncSessionLocal() as session:
+            await self.job(session)
+            await session.commit()
+    
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Background job %s failed", self.name)
+            await asyncio.sleep(self.interval)
+    
+    def start(self) -> None:
+        """Start running the job on the current event loop."""
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Cancel the job; an interrupted run is rolled back and redone next time."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -0,0 +1,231 @@
+import asyncio
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set
+
+import asyncpg
+from sqlalchemy import select, func, bindparam, Text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Postgres channel order changes are announced on
+CHANNEL = "order_updates"
+
+# Long-lived SSE endpoints; they skip admission control, request metrics and tracing
+STREAM_PATHS = ("/api/orders/stream", "/api/admin/stream")
+
+ADMIN_TOPIC = "admin"
+
+# Put in a subscriber's queue to end its stream
+_CLOSED = object()
+
+
+def user_topic(user_id) -> str:
+    return f"user:{user_id}"
+
+
+async def publish(db: AsyncSession, event: dict) -> None:
+    """NOTIFY listeners of an order change; delivered only if the caller commits.
+
+    event needs "type" and "user_id"; it goes to that user's streams and to
+    every admin stream.
+    """
+    await db.execute(select(func.pg_notify(CHANNEL, json.dumps(event, default=str))))
+
+
+async def publish_many(db: AsyncSession, events: List[dict]) -> None:
+    """publish() for several events in a single statement."""
+    if not events:
+        return
+    payloads = func.unnest(bindparam("payloads", [json.dumps(event, default=str) for event in events],
+                                     type_=ARRAY(Text))).table_valued("payload").render_derived()
+    await db.execute(select(func.pg_notify(CHANNEL, payloads.c.payload)))
+
+
+class Subscription:
+    """Queue of events for one open stream."""
+
+    def __init__(self, topic: str, maxsize: int):
+        self.topic = topic
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.closed = False
+
+    def put(self, event) -> bool:
+        """Queue an event without blocking; False if the stream is too far behind."""
+        if self.closed:
+            return True
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def close(self) -> None:
+        # Make room for the sentinel; the client resyncs when it reconnects anyway
+        if self.closed:
+            return
+        while not self.put(_CLOSED):
+            self.queue.get_nowait()
+        self.closed = True
+
+
+class LiveUpdateHub:
+    """Fans Postgres notifications out to the SSE streams of this worker.
+
+    Each worker holds a single dedicated LISTEN connection, outside the
+    SQLAlchemy pool, however many streams are open. Every notification is
+    copied to the queues of the streams subscribed to its topics. An idle
+    stream is only a queue and a suspended coroutine. A stream that falls
+    queue_size events behind is closed, and its client reconnects and
+    reloads. After the LISTEN connection is lost and re-established, every
+    stream gets a "resync" event, since notifications sent in between are
+    lost.
+    """
+
+    def __init__(self, queue_size: int, reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0):
+        self.queue_size = queue_size
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.subscribers: Dict[str, Set[Subscription]] = {}
+        self.overflows = 0
+        self._connection: Optional[asyncpg.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def subscriber_counts(self) -> Dict[str, int]:
+        """Open streams by kind of topic ("user" or "admin")."""
+        counts = {"user": 0, ADMIN_TOPIC: 0}
+        for topic, subscriptions in self.subscribers.items():
+            counts[topic.split(":", 1)[0]] += len(subscriptions)
+        return counts
+
+    @asynccontextmanager
+    async def subscribe(self, topic: str) -> AsyncIterator[Subscription]:
+        subscription = Subscription(topic, self.queue_size)
+        self.subscribers.setdefault(topic, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscriptions = self.subscribers.get(topic)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscribers[topic]
+
+    def deliver(self, event: dict) -> None:
+        """Copy an event to the streams of its user and of admins."""
+        for topic in (user_topic(event.get("user_id")), ADMIN_TOPIC):
+            for subscription in list(self.subscribers.get(topic, ())):
+                if not subscription.put(event):
+                    self.overflows += 1
+                    subscription.close()
+
+    def _broadcast(self, event: dict) -> None:
+        for subscriptions in list(self.subscribers.values()):
+            for subscription in list(subscriptions):
+                if not subscription.put(event):
+                    subscription.close()
+
+    def _on_notification(self, connection, pid, channel, payload) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed %s notification: %r", channel, payload)
+            return
+        self.deliver(event)
+
+    async def _listen(self, lost: asyncio.Event) -> None:
+        dsn = make_url(settings.database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._connection = await asyncpg.connect(dsn)
+        self._connection.add_termination_listener(lambda connection: lost.set())
+        await self._connection.add_listener(CHANNEL, self._on_notification)
+
+    async def _run(self) -> None:
+        delay = self.reconnect_delay
+        connected_before = False
+        while True:
+            lost = asyncio.Event()
+            try:
+                await self._listen(lost)
+            except Exception:
+                logger.exception("Could not LISTEN on %s, retrying in %.0fs", CHANNEL, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+            delay = self.reconnect_delay
+            if connected_before:
+                self._broadcast({"type": "resync"})
+            connected_before = True
+            await lost.wait()
+            logger.warning("Lost the LISTEN connection on %s, reconnecting", CHANNEL)
+
+    def start(self) -> None:
+        """Start listening on the current event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop listening and end every open stream."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+        for subscriptions in list(self.subscribers.values()):
+            for subscription in list(subscriptions):
+                subscription.close()
+
+
+def format_event(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+async def event_stream(hub: LiveUpdateHub, topic: str, heartbeat: float,
+                       transform: Optional[Callable[[dict], dict]] = None,
+                       expires_at: Optional[float] = None,
+                       revoked: Optional[Callable[[], bool]] = None) -> AsyncIterator[str]:
+    """Server-sent events for a topic, optionally rewritten by transform.
+
+    A comment line is sent every heartbeat seconds so proxies keep idle
+    connections open. The stream ends with an "unauthorized" event at
+    expires_at, the Unix time its token expires, or at the first heartbeat
+    after revoked() turns true; the client reconnects with a fresh token.
+    """
+    async with hub.subscribe(topic) as subscription:
+        yield f"retry: {int(settings.sse_retry_ms)}\n\n"
+        while True:
+            timeout = heartbeat
+            if expires_at is not None:
+                remaining = expires_at - time.time()
+                if remaining <= 0:
+                    yield format_event({"type": "unauthorized"})
+                    return
+                timeout = min(timeout, remaining)
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                if expires_at is not None and time.time() >= expires_at:
+                    continue
+                if revoked is not None and revoked():
+                    yield format_event({"type": "unauthorized"})
+                    return
+                yield ": keepalive\n\n"
+                continue
+            if event is _CLOSED:
+                return
+            yield format_event(transform(event) if transform is not None else event)
+
+
+live_updates = LiveUpdateHub(queue_size=settings.sse_queue_size)
@@ -0,0 +1,82 @@
+import logging
+from typing import Optional
+
+from app.models.order import Order
+from app.models.outbox import OutboxEvent
+from app.utils.outbox import outbox_handler
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATED = "order.created"
+ORDER_STATUS_CHANGED = "order.status_changed"
+
+# Statuses an order may move to from each status (enforced by status updates)
+ORDER_TRANSITIONS = {
+    "pending": ("processing", "cancelled"),
+    "processing": ("shipped", "cancelled"),
+    "shipped": ("delivered",),
+    "delivered": (),
+    "cancelled": (),
+}
+
+
+def order_created_payload(order: Order, email: str) -> dict:
+    return {
+        "order_id": order.id,
+        "user_id": order.user_id,
+        "email": email,
+        "total": order.total,
+        "items": [
+            {"product_id": item.product_id, "quantity": item.quantity, "price": item.price}
+            for item in order.items
+        ],
+    }
+
+
+def status_changed_payload(order: Order, old_status: str) -> dict:
+    return {
+        "order_id": order.id,
+        "user_id": order.user_id,
+        "old_status": old_status,
+        "new_status": order.status,
+    }
+
+
+def live_update(order: Order, event_type: str, old_status: Optional[str] = None) -> dict:
+    """Order change pushed to the owner's and admins' live streams."""
+    return {
+        "type": event_type,
+        "order_id": order.id,
+        "user_id": order.user_id,
+        "status": order.status,
+        "old_status": old_status,
+        "total": order.total,
+    }
+
+
+def admin_stat_deltas(event: dict) -> dict:
+    """Add the change to the admin dashboard counters implied by an order event."""
+    deltas = {}
+    if event["type"] == ORDER_CREATED:
+        deltas = {"totalOrders": 1, "revenue": round(event["total"], 2)}
+        if event["status"] == "pending":
+            deltas["pendingOrders"] = 1
+    elif event["type"] == ORDER_STATUS_CHANGED:
+        pending = (event["status"] == "pending") - (event["old_status"] == "pending")
+        if pending:
+            deltas["pendingOrders"] = pending
+    return {**event, "statsDelta": deltas}
+
+
+# Confirmation emails, the warehouse feed and analytics register handlers
+# for these events; until they exist the events are only logged
+
+@outbox_handler(ORDER_CREATED)
+async def log_order_created(event: OutboxEvent) -> None:
+    logger.info("Order %s created (total %.2f)", event.aggregate_id, event.payload["total"])
+
+
+@outbox_handler(ORDER_STATUS_CHANGED)
+async def log_order_status_changed(event: OutboxEvent) -> None:
+    logger.info("Order %s moved from %s to %s", event.aggregate_id,
+                event.payload["old_status"], event.payload["new_status"])
@@ -0,0 +1,74 @@
+from typing import Iterable, Optional
+from datetime import datetime
+
+from sqlalchemy import select, update, func, and_, tuple_
+from sqlalchemy.dialects.postgresql import insert, array_agg, aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.order import Order, OrderItem, OrderSummary
+
+
+def summary_for(order: Order) -> OrderSummary:
+    """Summary row of a new order whose items are loaded."""
+    return OrderSummary(
+        order_id=order.id,
+        user_id=order.user_id,
+        status=order.status,
+        total=order.total,
+        item_count=sum(item.quantity for item in order.items),
+        first_product_name=order.items[0].product_name if order.items else None,
+        created_at=order.created_at,
+    )
+
+
+def page_cursor(before: datetime, before_id: Optional[int] = None):
+    """Condition for the list page after the order with this created_at and id.
+    
+    Lists are ordered by (created_at, order_id) descending, so orders
+    created at the same instant are neither skipped nor repeated. Without
+    before_id, every order created at before is skipped.
+    """
+    if before_id is None:
+        return OrderSummary.created_at < before
+    return tuple_(OrderSummary.created_at, OrderSummary.order_id) < tuple_(before, before_id)
+
+
+async def set_summary_status(db: AsyncSession, order_ids: Iterable[int], status: str) -> None:
+    """Mirror a status change onto the orders' summaries."""
+    await db.execute(
+        update(OrderSummary).where(OrderSummary.order_id.in_(list(order_ids))).values(status=status)
+    )
+
+
+async def rebuild_order_summaries(db: AsyncSession, created_after: Optional[datetime] = None) -> int:
+    """(Re)write the summaries of all orders, or those created after a time, from orders and order_items.
+    
+    Used to backfill the table; the API keeps it current as orders change.
+    Returns the number of rows written.
+    """
+    query = (
+        select(
+            Order.id,
+            Order.user_id,
+            Order.status,
+            Order.total,
+            func.coalesce(func.sum(OrderItem.quantity), 0),
+            array_agg(aggregate_order_by(OrderItem.product_name, OrderItem.id))[1],
+            Order.created_at,
+        )
+        .outerjoin(OrderItem, and_(OrderItem.order_id == Order.id, OrderItem.created_at == Order.created_at))
+        .group_by(Order.id, Order.created_at, Order.user_id, Order.status, Order.total)
+    )
+    if created_after is not None:
+        query = query.where(Order.created_at >= created_after)
+    
+    stmt = insert(OrderSummary).from_select(
+        ["order_id", "user_id", "status", "total", "item_count", "first_product_name", "created_at"],
+        query,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[OrderSummary.order_id],
+        set_={column: stmt.excluded[column] for column in ("status", "total", "item_count", "first_product_name")},
+    )
+    result = await db.execute(stmt)
+    return result.rowcount
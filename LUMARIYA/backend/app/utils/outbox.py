@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List
+
+from sqlalchemy import select, update, func, literal_column, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import get_settings
+from app.models.outbox import OutboxEvent
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Inlined rather than bound so the planner can use the partial pending index
+_PENDING = literal_column("'pending'")
+
+Handler = Callable[[OutboxEvent], Awaitable[None]]
+
+# Handlers by event type, registered with @outbox_handler
+_handlers: Dict[str, List[Handler]] = {}
+
+
+def enqueue(db: AsyncSession, event_type: str, aggregate_id, payload: dict) -> OutboxEvent:
+    """Add an event to the session, to be written when the caller commits.
+
+    The event is only ever seen by the worker if the change it describes
+    was committed with it.
+    """
+    event = OutboxEvent(event_type=event_type, aggregate_id=str(aggregate_id), payload=payload)
+    db.add(event)
+    return event
+
+
+def outbox_handler(event_type: str):
+    """Register an async handler for an event type.
+
+    Delivery is at least once: a failed or interrupted event is handed to
+    every handler of its type again, so handlers must be idempotent.
+    """
+    def decorator(func: Handler) -> Handler:
+        _handlers.setdefault(event_type, []).append(func)
+        return func
+    return decorator
+
+
+def handlers_for(event_type: str) -> List[Handler]:
+    return _handlers.get(event_type, [])
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds to wait before the next attempt: exponential backoff with jitter."""
+    delay = min(settings.outbox_backoff_max_seconds,
+                settings.outbox_backoff_base_seconds * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+async def dispatch(event: OutboxEvent) -> None:
+    """Run every handler registered for the event; raises on the first failure."""
+    handlers = handlers_for(event.event_type)
+    if not handlers:
+        raise LookupError(f"No handler registered for {event.event_type}")
+    for handler in handlers:
+        await handler(event)
+
+
+class OutboxWorker:
+    """Claims pending outbox events in batches and dispatches them.
+
+    A batch is claimed in a short transaction with FOR UPDATE SKIP LOCKED,
+    so several workers never claim the same rows, and leased by moving
+    available_at forward. Handlers then run outside any transaction. Each
+    event is marked done, or rescheduled with backoff until max_attempts
+    is reached and it is marked failed, but only while the row still holds
+    this worker's lease: if the lease ran out and another worker claimed
+    the event again, that worker's outcome stands.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker, batch_size: int, lease_seconds: float,
+                 max_attempts: int, poll_interval: float):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self._stopping = False
+
+    async def claim(self) -> List[OutboxEvent]:
+        """Lease up to batch_size due events to this worker.
+
+        The returned events carry the incremented attempts and, in
+        available_at, the lease that the final update checks for.
+        """
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(OutboxEvent.id)
+                .where(OutboxEvent.status == _PENDING, OutboxEvent.available_at <= func.now())
+                .order_by(OutboxEvent.available_at, OutboxEvent.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            ids = result.scalars().all()
+            events = []
+            if ids:
+                lease_until = func.now() + timedelta(seconds=self.lease_seconds)
+                result = await session.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.id.in_(ids))
+                    .values(attempts=OutboxEvent.attempts + 1, available_at=lease_until)
+                    .returning(OutboxEvent)
+                )
+                by_id = {event.id: event for event in result.scalars()}
+                events = [by_id[event_id] for event_id in ids]
+            await session.commit()
+        return events
+
+    @staticmethod
+    def _leased(events: List[OutboxEvent]):
+        """Condition matching the events only while they still hold the lease they were claimed with."""
+        return tuple_(OutboxEvent.id, OutboxEvent.available_at).in_(
+            [(event.id, event.available_at) for event in events]
+        )
+
+    async def _reschedule(self, session: AsyncSession, event: OutboxEvent, error: Exception) -> None:
+        now = datetime.now(timezone.utc)
+        if event.attempts >= self.max_attempts:
+            logger.error("Outbox event %d (%s) failed after %d attempts: %s",
+                         event.id, event.event_type, event.attempts, error)
+            values = {"status": "failed", "processed_at": now, "last_error": repr(error)}
+        else:
+            delay = retry_delay(event.attempts)
+            logger.warning("Outbox event %d (%s) failed, retrying in %.0fs: %s",
+                           event.id, event.event_type, delay, error)
+            values = {"available_at": now + timedelta(seconds=delay), "last_error": repr(error)}
+        result = await session.execute(
+            update(OutboxEvent).where(self._leased([event]), OutboxEvent.status == _PENDING).values(**values)
+        )
+        if not result.rowcount:
+            logger.warning("Outbox event %d lost its lease before its failure was recorded", event.id)
+
+    async def run_once(self) -> int:
+        """Claim and dispatch one batch; returns how many events were claimed."""
+        events = await self.claim()
+        if not events:
+            return 0
+        done = []
+        failed = []
+        for event in events:
+            try:
+                await dispatch(event)
+                done.append(event)
+            except Exception as e:
+                failed.append((event, e))
+        async with self.session_factory() as session:
+            if done:
+                result = await session.execute(
+                    update(OutboxEvent)
+                    .where(self._leased(done), OutboxEvent.status == _PENDING)
+                    .values(status="done", processed_at=func.now(), last_error=None)
+                )
+                if result.rowcount < len(done):
+                    logger.warning("%d outbox events lost their lease before they were marked done",
+                                   len(done) - result.rowcount)
+            for event, error in failed:
+                await self._reschedule(session, event, error)
+            await session.commit()
+        return len(events)
+
+    async def drain(self) -> int:
+        """Dispatch batches until no event is due; returns how many were claimed."""
+        total = 0
+        while True:
+            claimed = await self.run_once()
+            total += claimed
+            if claimed < self.batch_size:
+                return total
+
+    async def run(self) -> None:
+        """Dispatch events until stop() is called, polling when the outbox is empty."""
+        while not self._stopping:
+            try:
+                claimed = await self.drain()
+            except Exception:
+                logger.exception("Outbox worker iteration failed")
+                claimed = 0
+            if not claimed:
+                await asyncio.sleep(self.poll_interval)
+
+    def stop(self) -> None:
+        """Finish the current batch and exit run()."""
+        self._stopping = True
@@ -0,0 +1,66 @@
+from sqlalchemy import select, func, literal_column, JSON
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.address import Address
+from app.models.order import OrderSummary
+
+ADDRESS_FIELDS = ("id", "full_name", "address_line1", "address_line2", "city", "state", "zip_code",
+                  "country", "is_default", "created_at")
+ORDER_FIELDS = ("order_id", "status", "total", "item_count", "first_product_name", "created_at")
+
+_EMPTY_LIST = literal_column("'[]'::json")
+
+
+def _json_object(fields):
+    """json_build_object over (key, column) pairs.
+    
+    Keys are inlined: parameters of its "any" arguments have no type.
+    """
+    return func.json_build_object(
+        *[part for key, column in fields for part in (literal_column(f"'{key}'"), column)],
+        type_=JSON,
+    )
+
+
+async def account_overview(db: AsyncSession, user_id: int, recent_orders: int) -> dict:
+    """Addresses and the latest order summaries of a user in one statement.
+    
+    Each part is a JSON-aggregating scalar subquery of the same SELECT, so
+    the whole overview costs one round trip on one connection.
+    """
+    addresses = (
+        select(func.coalesce(
+            func.json_agg(aggregate_order_by(
+                _json_object((name, getattr(Address, name)) for name in ADDRESS_FIELDS),
+                Address.is_default.desc(), Address.id,
+            ), type_=JSON),
+            _EMPTY_LIST,
+        ))
+        .where(Address.user_id == user_id)
+        .scalar_subquery()
+    )
+    
+    latest = (
+        select(OrderSummary)
+        .where(OrderSummary.user_id == user_id)
+        .order_by(OrderSummary.created_at.desc())
+        .limit(recent_orders)
+        .subquery()
+    )
+    orders = (
+        select(func.coalesce(
+            func.json_agg(aggregate_order_by(
+                _json_object((name, latest.c[name]) for name in ORDER_FIELDS),
+                latest.c.created_at.desc(),
+            ), type_=JSON),
+            _EMPTY_LIST,
+        ))
+        .scalar_subquery()
+    )
+    
+    result = await db.execute(select(
+        addresses.label("addresses"),
+        orders.label("recent_orders"),
+    ))
+    return result.one()._asdict()
@@ -0,0 +1,194 @@
+import gzip
+import logging
+import os
+import re
+from datetime import date, datetime, time, timezone
+from typing import List, Optional
+
+from sqlalchemy import text, delete
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.config import get_settings
+from app.models.order import OrderSummary
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Range-partitioned by month on created_at, parent before child
+PARTITIONED_TABLES = ("orders", "order_items")
+
+# Serializes partition creation and archival across workers
+ADVISORY_LOCK_KEY = 0x70617274  # "part"
+
+# DDL on a partitioned table waits for its lock no longer than this, so a
+# long transaction delays maintenance instead of queueing all order traffic
+LOCK_TIMEOUT = "5s"
+
+_PARTITION_NAME = re.compile(r"^(?P<table>[a-z_]+)_p(?P<year>\d{4})_(?P<month>\d{2})$")
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def current_month() -> date:
+    return month_start(datetime.now(timezone.utc).date())
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Month a partition name stands for, None for other tables."""
+    match = _PARTITION_NAME.match(name)
+    if match is None or match["table"] not in PARTITIONED_TABLES:
+        return None
+    return date(int(match["year"]), int(match["month"]), 1)
+
+
+def _utc(month: date) -> datetime:
+    return datetime.combine(month, time.min, tzinfo=timezone.utc)
+
+
+def _bound(month: date) -> str:
+    # Partitions cover whole UTC months
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+
+async def ensure_partitions(db: AsyncSession, first_month: date, last_month: date) -> List[str]:
+    """Create the missing monthly partitions from first_month through last_month.
+
+    Existing partitions are skipped without touching the parent tables'
+    locks, so calling this often is cheap. Returns the created names.
+    """
+    months = []
+    month = month_start(first_month)
+    while month <= last_month:
+        months.append(month)
+        month = add_months(month, 1)
+
+    names = [partition_name(table, month) for month in months for table in PARTITIONED_TABLES]
+    result = await db.execute(
+        text("SELECT relname FROM pg_class WHERE relname = ANY(:names) AND relkind = 'r'"),
+        {"names": names},
+    )
+    existing = set(result.scalars().all())
+    if len(existing) == len(names):
+        return []
+
+    await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+    await db.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+    created = []
+    for month in months:
+        for table in PARTITIONED_TABLES:
+            name = partition_name(table, month)
+            if name in existing:
+                continue
+            await db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                f"FOR VALUES FROM ({_bound(month)}) TO ({_bound(add_months(month, 1))})"
+            ))
+            created.append(name)
+    if created:
+        logger.info("Created order partitions: %s", ", ".join(created))
+    return created
+
+
+async def create_upcoming_partitions(db: AsyncSession) -> List[str]:
+    """Partitions for this month and the configured number of months ahead."""
+    month = current_month()
+    return await ensure_partitions(db, month, add_months(month, settings.order_partitions_ahead))
+
+
+async def _attached_months(conn: AsyncConnection) -> List[date]:
+    result = await conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'orders'::regclass"
+    ))
+    return sorted(month for month in map(partition_month, result.scalars().all()) if month is not None)
+
+
+async def _detached_tables(conn: AsyncConnection) -> List[str]:
+    """Partitions detached by an earlier run that were not dropped yet."""
+    result = await conn.execute(text(
+        "SELECT relname FROM pg_class WHERE relkind = 'r' AND NOT relispartition "
+        "AND relnamespace = current_schema()::regnamespace"
+    ))
+    names = [name for name in result.scalars().all() if partition_month(name) is not None]
+    # Items first, mirroring the detach order
+    return sorted(names, key=lambda name: (partition_month(name), name.startswith("orders_")))
+
+
+async def _detach(conn: AsyncConnection, month: date) -> bool:
+    """Detach one month from both tables and drop its order summaries, in one transaction."""
+    result = await conn.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+    if not result.scalar():
+        await conn.rollback()
+        return False
+    await conn.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+
+    items = partition_name("order_items", month)
+    await conn.execute(text(f"ALTER TABLE order_items DETACH PARTITION {items}"))
+    # The detached items still reference orders, which would block detaching
+    # their orders partition
+    result = await conn.execute(text(
+        "SELECT conname FROM pg_constraint "
+        "WHERE conrelid = CAST(:table AS regclass) AND contype = 'f' AND confrelid = 'orders'::regclass"
+    ), {"table": items})
+    for constraint in result.scalars().all():
+        await conn.execute(text(f'ALTER TABLE {items} DROP CONSTRAINT "{constraint}"'))
+    await conn.execute(text(f"ALTER TABLE orders DETACH PARTITION {partition_name('orders', month)}"))
+    await conn.execute(
+        delete(OrderSummary)
+        .where(OrderSummary.created_at >= _utc(month), OrderSummary.created_at < _utc(add_months(month, 1)))
+    )
+    await conn.commit()
+    return True
+
+
+async def _export_and_drop(conn: AsyncConnection, table: str, archive_dir: str) -> str:
+    """Write a detached partition to archive_dir as gzipped CSV, then drop it."""
+    path = os.path.join(archive_dir, f"{table}.csv.gz")
+    partial = path + ".partial"
+    raw = await conn.get_raw_connection()
+    with gzip.open(partial, "wb") as output:
+        await raw.driver_connection.copy_from_table(table, output=output, format="csv", header=True)
+    os.replace(partial, path)
+
+    await conn.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+    await conn.execute(text(f"DROP TABLE {table}"))
+    await conn.commit()
+    return path
+
+
+async def archive_partitions(conn: AsyncConnection, retention_months: int, archive_dir: str) -> List[str]:
+    """Move months older than retention_months out of the database.
+
+    Each expired month is detached from order_items and orders (instantly,
+    without scanning or locking the live months for long), written to
+    archive_dir as <partition>.csv.gz and dropped. A month whose export
+    failed stays detached and is picked up by the next run. Returns the
+    written files.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    cutoff = add_months(current_month(), -retention_months)
+    for month in await _attached_months(conn):
+        if month >= cutoff:
+            break
+        if not await _detach(conn, month):
+            logger.info("Another worker is maintaining order partitions, skipping archival")
+            return []
+        logger.info("Detached order partitions for %s", month.strftime("%Y-%m"))
+
+    files = []
+    for table in await _detached_tables(conn):
+        await conn.commit()
+        files.append(await _export_and_drop(conn, table, archive_dir))
+        logger.info("Archived %s to %s", table, files[-1])
+    return files
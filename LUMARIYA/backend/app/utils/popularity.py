@@ -0,0 +1,106 @@
+import math
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.event import ProductView, PopularityState
+
+settings = get_settings()
+
+# Fixed reference time for forward-decayed scores; never change it without
+# recomputing product_popularity from scratch
+DECAY_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+# Views flushed more recently than this are left for the next run, so batches
+# that committed out of id order are not skipped by the watermark
+SETTLE_DELAY = timedelta(minutes=1)
+
+# Raw view events are kept this long after being folded into scores
+VIEW_RETENTION = timedelta(days=30)
+
+STATE_ID = 1
+
+# Held by the running refresh; other workers skip their run
+ADVISORY_LOCK_KEY = 0x706F7075  # "popu"
+
+FOLD_VIEWS_SQL = text("""
+    WITH new_views AS (
+        SELECT product_id,
+               CAST(:rate AS double precision)
+                   * extract(epoch FROM viewed_at - CAST(:epoch AS timestamptz)) AS x
+        FROM product_views
+        WHERE id > :last_view_id AND id <= :up_to_view_id
+    ),
+    scores AS (
+        SELECT product_id, max(mx) + ln(sum(exp(x - mx))) AS log_score
+        FROM (
+            SELECT product_id, x, max(x) OVER (PARTITION BY product_id) AS mx
+            FROM new_views
+        ) v
+        GROUP BY product_id
+    )
+    INSERT INTO product_popularity (product_id, log_score, updated_at)
+    SELECT product_id, log_score, now() FROM scores
+    ON CONFLICT (product_id) DO UPDATE SET
+        log_score = greatest(product_popularity.log_score, excluded.log_score)
+            + ln(1 + exp(-abs(product_popularity.log_score - excluded.log_score))),
+        updated_at = now()
+""")
+
+
+def decay_rate() -> float:
+    """Decay rate per second for the configured half-life."""
+    return math.log(2) / (settings.popularity_half_life_hours * 3600)
+
+
+async def refresh_popularity(db: AsyncSession) -> dict:
+    """Fold product views recorded since the last run into decayed popularity scores.
+    
+    Runs in the caller's transaction: the score update, the watermark and the
+    cleanup of old raw events commit together. Skipped while another
+    worker is refreshing.
+    """
+    result = await db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+    if not result.scalar():
+        return {"skipped": True, "views": 0, "products_updated": 0}
+    
+    result = await db.execute(
+        select(PopularityState.last_view_id).where(PopularityState.id == STATE_ID)
+    )
+    last_view_id = result.scalar() or 0
+    
+    cutoff = datetime.now(timezone.utc) - SETTLE_DELAY
+    result = await db.execute(
+        select(func.max(ProductView.id), func.count())
+        .where(ProductView.id > last_view_id, ProductView.recorded_at < cutoff)
+    )
+    up_to_view_id, views = result.one()
+    if up_to_view_id is None:
+        return {"last_view_id": last_view_id, "views": 0, "products_updated": 0}
+    
+    result = await db.execute(FOLD_VIEWS_SQL, {
+        "rate": decay_rate(),
+        "epoch": DECAY_EPOCH,
+        "last_view_id": last_view_id,
+        "up_to_view_id": up_to_view_id,
+    })
+    products_updated = result.rowcount
+    
+    stmt = insert(PopularityState).values(id=STATE_ID, last_view_id=up_to_view_id)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PopularityState.id],
+        set_={"last_view_id": up_to_view_id, "updated_at": func.now()},
+    )
+    await db.execute(stmt)
+    
+    await db.execute(
+        ProductView.__table__.delete().where(
+            ProductView.id <= up_to_view_id,
+            ProductView.viewed_at < datetime.now(timezone.utc) - VIEW_RETENTION,
+        )
+    )
+    
+    return {"last_view_id": up_to_view_id, "views": views, "products_updated": products_updated}
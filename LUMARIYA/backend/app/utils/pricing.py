@@ -0,0 +1,223 @@
+import bisect
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.cart import Cart
+from app.models.pricing import PricingRule
+from app.models.product import Product
+from app.models.user import User
+from app.utils.cache import VersionedCache
+from app.utils.catalog import get_catalog_version
+
+settings = get_settings()
+
+RULE_KINDS = ("tax", "shipping", "promotion")
+
+# Active rules of the current catalog version; rule changes bump the version
+rules_cache = VersionedCache(maxsize=1)
+_RULES_KEY = "rules"
+
+# Cart summaries per user and coupon, valid for one catalog version, cart
+# version and rule window, so any product, rule or cart change invalidates them
+summary_cache = VersionedCache(maxsize=settings.cart_summary_cache_size)
+
+
+class InvalidCoupon(ValueError):
+    """Raised for a coupon code that does not exist or is not running."""
+
+
+class Rule(NamedTuple):
+    id: int
+    kind: str
+    name: str
+    code: Optional[str]
+    category: Optional[str]
+    product_id: Optional[str]
+    percent: Optional[float]
+    amount: Optional[float]
+    min_subtotal: Optional[float]
+    priority: int
+    starts_at: Optional[datetime]
+    ends_at: Optional[datetime]
+
+    def live(self, now: datetime) -> bool:
+        return (self.starts_at is None or self.starts_at <= now) and (self.ends_at is None or now < self.ends_at)
+
+
+class PricingLine(NamedTuple):
+    product_id: str
+    category: str
+    price: float
+    quantity: int
+
+
+class PricingRules:
+    """Active pricing rules indexed by kind and product, category or cart scope.
+
+    Pricing a line looks its rules up by product id and category in dicts,
+    so a summary costs a few dict lookups per line whatever the rule count.
+    """
+
+    def __init__(self, rules: Iterable[Rule]):
+        self._by_product: Dict[tuple, List[Rule]] = {}
+        self._by_category: Dict[tuple, List[Rule]] = {}
+        self._cart_wide: Dict[str, List[Rule]] = {}
+        self._coupons: Dict[str, Rule] = {}
+        boundaries = set()
+        # Highest priority first within each scope
+        for rule in sorted(rules, key=lambda rule: (-rule.priority, rule.id)):
+            if rule.product_id is not None:
+                self._by_product.setdefault((rule.kind, rule.product_id), []).append(rule)
+            elif rule.category is not None:
+                self._by_category.setdefault((rule.kind, rule.category), []).append(rule)
+            else:
+                self._cart_wide.setdefault(rule.kind, []).append(rule)
+            if rule.code is not None:
+                self._coupons[rule.code] = rule
+            boundaries.update(moment for moment in (rule.starts_at, rule.ends_at) if moment is not None)
+        self._boundaries = sorted(boundaries)
+
+    def window(self, now: datetime) -> int:
+        """Number of rule start/end times passed; changes only when a rule starts or ends."""
+        return bisect.bisect_right(self._boundaries, now)
+
+    def coupon(self, code: str, now: datetime) -> Rule:
+        """The running promotion with the given code."""
+        rule = self._coupons.get(code.strip().upper())
+        if rule is None or not rule.live(now):
+            raise InvalidCoupon(f"Coupon {code} is not valid")
+        return rule
+
+    def _scoped(self, kind: str, product_id: Optional[str], category: Optional[str]) -> Iterator[Rule]:
+        """Rules of a kind for a line, most specific scope first."""
+        yield from self._by_product.get((kind, product_id), ())
+        yield from self._by_category.get((kind, category), ())
+        yield from self._cart_wide.get(kind, ())
+
+    def _first(self, kind: str, product_id: Optional[str], category: Optional[str], now: datetime) -> Optional[Rule]:
+        for rule in self._scoped(kind, product_id, category):
+            if rule.live(now):
+                return rule
+        return None
+
+    def price(self, lines: List[PricingLine], coupon: Optional[Rule] = None,
+              now: Optional[datetime] = None) -> dict:
+        """Subtotal, discount, tax, shipping and total of the lines.
+
+        Promotions do not combine: of the running automatic promotions and
+        the coupon, the one giving the largest discount applies. Its discount
+        is shared over its lines by amount, and each line is taxed after its
+        share. Shipping is waived when the discounted subtotal exceeds the
+        shipping rule's min_subtotal.
+        """
+        now = now or datetime.now(timezone.utc)
+        amounts = [line.price * line.quantity for line in lines]
+        subtotal = sum(amounts)
+
+        line_promotions = []
+        matched: Dict[int, float] = {}
+        promotions: Dict[int, Rule] = {}
+        for line, amount in zip(lines, amounts):
+            ids = []
+            for rule in self._scoped("promotion", line.product_id, line.category):
+                if (rule.code is None or rule is coupon) and rule.live(now):
+                    ids.append(rule.id)
+                    matched[rule.id] = matched.get(rule.id, 0.0) + amount
+                    promotions[rule.id] = rule
+            line_promotions.append(ids)
+
+        best, discount = None, 0.0
+        for rule_id, rule in promotions.items():
+            total = matched[rule_id]
+            if rule.min_subtotal is not None and total < rule.min_subtotal:
+                continue
+            value = total * rule.percent / 100 if rule.percent is not None else min(rule.amount or 0.0, total)
+            if value > discount or (best is not None and value == discount and rule.priority > best.priority):
+                best, discount = rule, value
+
+        tax = 0.0
+        for line, amount, ids in zip(lines, amounts, line_promotions):
+            if best is not None and best.id in ids:
+                amount -= discount * amount / matched[best.id]
+            rule = self._first("tax", line.product_id, line.category, now)
+            tax += amount * (rule.percent if rule is not None else settings.default_tax_percent) / 100
+
+        rule = self._first("shipping", None, None, now)
+        if rule is not None:
+            fee, free_over = rule.amount or 0.0, rule.min_subtotal
+        else:
+            fee, free_over = settings.default_shipping_fee, settings.free_shipping_over
+        if not lines or (free_over is not None and subtotal - discount > free_over):
+            fee = 0.0
+
+        subtotal, discount, tax, fee = (round(value, 2) for value in (subtotal, discount, tax, fee))
+        return {
+            "item_count": sum(line.quantity for line in lines),
+            "subtotal": subtotal,
+            "discount": discount,
+            "tax": tax,
+            "shipping": fee,
+            "total": round(subtotal - discount + tax + fee, 2),
+            "promotion": None if best is None else {"id": best.id, "name": best.name, "code": best.code},
+        }
+
+
+async def get_pricing_rules(db: AsyncSession, version: int) -> PricingRules:
+    """Active rules for a catalog version, loaded with one query when it changed."""
+    rules = rules_cache.get(_RULES_KEY, version)
+    if rules is None:
+        result = await db.execute(
+            select(*(getattr(PricingRule, field) for field in Rule._fields))
+            .where(PricingRule.active.is_(True))
+        )
+        rules = PricingRules(Rule(*row) for row in result.all())
+        rules_cache.set(_RULES_KEY, version, rules)
+    return rules
+
+
+async def load_pricing_rules(db: AsyncSession) -> PricingRules:
+    return await get_pricing_rules(db, await get_catalog_version(db))
+
+
+async def bump_cart_version(db: AsyncSession, user_id: int) -> None:
+    """Mark the user's cart as changed inside the caller's transaction.
+
+    Call this with every change to a user's cart rows so cached summaries
+    are recomputed. The user loaded in the session is updated too.
+    """
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        # A cart change is not a profile change, so updated_at stays as is
+        .values(cart_version=User.cart_version + 1, updated_at=User.updated_at)
+    )
+
+
+async def cart_summary(db: AsyncSession, user: User, coupon_code: Optional[str] = None) -> dict:
+    """Priced summary of a user's cart, from cache unless something changed.
+
+    A cached summary costs the catalog version check only. Raises
+    InvalidCoupon for an unknown or expired coupon code.
+    """
+    now = datetime.now(timezone.utc)
+    version = await get_catalog_version(db)
+    rules = await get_pricing_rules(db, version)
+    coupon = rules.coupon(coupon_code, now) if coupon_code else None
+
+    key = (user.id, coupon.code if coupon else None)
+    summary_version = (version, user.cart_version, rules.window(now))
+    summary = summary_cache.get(key, summary_version)
+    if summary is None:
+        result = await db.execute(
+            select(Product.id, Product.category, Product.price, Cart.quantity)
+            .join(Cart, Cart.product_id == Product.id)
+            .where(Cart.user_id == user.id)
+            .order_by(Cart.id)
+        )
+        summary = rules.price([PricingLine(*row) for row in result.all()], coupon, now)
+        summary_cache.set(key, summary_version, summary)
+    return summary
@@ -0,0 +1,214 @@
+import asyncio
+import csv
+import json
+import logging
+from typing import Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.schemas.product import ProductCreate
+from app.utils.catalog import bump_catalog_version
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+COLUMNS = ("id", "name", "price", "category", "description", "long_description", "image",
+           "hover_image", "materials", "care", "details", "colors", "made_in")
+JSON_COLUMNS = ("materials", "care", "details", "colors")
+
+STAGING_TABLE = "product_import_staging"
+
+# Rows are written only when something changed, so re-importing the same
+# feed leaves products (and their updated_at) untouched. care is JSON,
+# which has no equality operator, so it is compared as JSONB.
+UPSERT = text(f"""
+    WITH upserted AS (
+        INSERT INTO products ({", ".join(COLUMNS)})
+        SELECT {", ".join(COLUMNS)} FROM {STAGING_TABLE}
+        ON CONFLICT (id) DO UPDATE SET
+            {", ".join(f"{column} = EXCLUDED.{column}" for column in COLUMNS[1:])},
+            updated_at = now()
+        WHERE (products.name, products.price, products.category, products.description,
+               products.long_description, products.image, products.hover_image, products.materials,
+               products.care::jsonb, products.details, products.colors, products.made_in)
+            IS DISTINCT FROM
+              (EXCLUDED.name, EXCLUDED.price, EXCLUDED.category, EXCLUDED.description,
+               EXCLUDED.long_description, EXCLUDED.image, EXCLUDED.hover_image, EXCLUDED.materials,
+               EXCLUDED.care::jsonb, EXCLUDED.details, EXCLUDED.colors, EXCLUDED.made_in)
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM upserted
+""")
+
+
+def detect_format(filename: str) -> str:
+    """"csv" or "ndjson" from a file name's extension."""
+    for extension, fmt in FORMATS.items():
+        if filename.lower().endswith(extension):
+            return fmt
+    raise ValueError(f"Unsupported file type, expected one of: {', '.join(FORMATS)}")
+
+
+def _csv_row(row: dict) -> dict:
+    """Product fields from a CSV record.
+
+    Empty cells are left out so schema defaults apply. List columns hold
+    either a JSON array or values separated by "|".
+    """
+    fields = {}
+    for key, value in row.items():
+        if key is None or value is None or value.strip() == "":
+            continue
+        value = value.strip()
+        if key in JSON_COLUMNS:
+            value = json.loads(value) if value.startswith("[") else [part.strip() for part in value.split("|")]
+        fields[key] = value
+    return fields
+
+
+def read_rows(stream: TextIO, fmt: str) -> Iterator[Tuple[int, object]]:
+    """(row number, fields) for each record; fields is an error message for unparseable records."""
+    if fmt == "csv":
+        for number, row in enumerate(csv.DictReader(stream), start=1):
+            try:
+                yield number, _csv_row(row)
+            except ValueError as e:
+                yield number, f"Invalid JSON list: {e}"
+    else:
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError as e:
+                yield number, f"Invalid JSON: {e}"
+
+
+class ProductImport:
+    """Validates a product feed in batches and upserts it through a staging table.
+
+    The feed is read and validated batch_size rows at a time in a worker
+    thread, so memory stays flat and the event loop is not blocked. Each
+    batch is COPYed into a temporary staging table and merged into products
+    with one INSERT ... ON CONFLICT in its own transaction, which also bumps
+    the catalog version when anything changed. A failing batch stops the
+    import; the batches before it stay committed.
+
+    The first max_errors row errors are kept for the summary; on_error, if
+    given, receives every one of them, from the worker thread.
+    """
+
+    def __init__(self, stream: TextIO, fmt: str, batch_size: int, max_errors: int,
+                 on_error: Optional[Callable[[dict], None]] = None,
+                 statement_timeout_ms: Optional[int] = None):
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.on_error = on_error
+        self.statement_timeout_ms = statement_timeout_ms
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.batches = 0
+        self.errors: List[dict] = []
+        self._rows = read_rows(stream, fmt)
+        self._exhausted = False
+
+    def _error(self, number: int, product_id, message) -> None:
+        self.failed += 1
+        error = {"row": number, "id": product_id, "errors": message}
+        if self.on_error is not None:
+            self.on_error(error)
+        if len(self.errors) < self.max_errors:
+            self.errors.append(error)
+
+    def _next_batch(self) -> Optional[Dict[str, tuple]]:
+        """Next batch of valid records by id; None once the feed is exhausted."""
+        if self._exhausted:
+            return None
+        records: Dict[str, tuple] = {}
+        count = 0
+        for number, fields in self._rows:
+            self.rows += 1
+            count += 1
+            if isinstance(fields, str):
+                self._error(number, None, [fields])
+            elif not isinstance(fields, dict):
+                self._error(number, None, ["Expected an object"])
+            else:
+                try:
+                    product = ProductCreate.model_validate(fields)
+                except ValidationError as e:
+                    self._error(number, fields.get("id"), [
+                        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+                    ])
+                else:
+                    # The last row of an id wins; one statement cannot upsert a row twice
+                    if product.id in records:
+                        self.duplicates += 1
+                    data = product.model_dump()
+                    records[product.id] = tuple(
+                        json.dumps(data[column]) if column in JSON_COLUMNS and data[column] is not None
+                        else data[column]
+                        for column in COLUMNS
+                    )
+            if count >= self.batch_size:
+                return records
+        self._exhausted = True
+        return records
+
+    async def _upsert(self, conn: AsyncConnection, records: List[tuple]) -> None:
+        # The first statement also opens the transaction the COPY below joins
+        if self.statement_timeout_ms:
+            await conn.execute(text(f"SET LOCAL statement_timeout = {int(self.statement_timeout_ms)}"))
+        await conn.execute(text(f"TRUNCATE {STAGING_TABLE}"))
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(STAGING_TABLE, records=records, columns=COLUMNS)
+        result = await conn.execute(UPSERT)
+        inserted, updated = result.one()
+        if inserted or updated:
+            await bump_catalog_version(conn)
+        await conn.commit()
+        self.inserted += inserted
+        self.updated += updated
+
+    async def run(self, conn: AsyncConnection, on_progress: Optional[Callable[[dict], None]] = None) -> dict:
+        """Import the whole feed on conn and return the summary."""
+        await conn.execute(text(
+            f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} "
+            f"(LIKE products INCLUDING DEFAULTS)"
+        ))
+        await conn.commit()
+        try:
+            while True:
+                records = await asyncio.to_thread(self._next_batch)
+                if records is None:
+                    break
+                if records:
+                    await self._upsert(conn, list(records.values()))
+                    self.batches += 1
+                logger.info("Product import: %d rows read, %d inserted, %d updated, %d failed",
+                            self.rows, self.inserted, self.updated, self.failed)
+                if on_progress is not None:
+                    on_progress(self.summary())
+        finally:
+            await conn.rollback()
+            await conn.execute(text(f"DROP TABLE IF EXISTS {STAGING_TABLE}"))
+            await conn.commit()
+        return self.summary()
+
+    def summary(self) -> dict:
+        return {
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "unchanged": self.rows - self.failed - self.duplicates - self.inserted - self.updated,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "batches": self.batches,
+            "errors": self.errors,
+        }
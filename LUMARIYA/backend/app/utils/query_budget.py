@@ -0,0 +1,182 @@
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+
+from app.utils.fingerprint import fingerprint
+
+logger = logging.getLogger(__name__)
+
+# A statement shape repeated this many times in one request is reported as N+1
+REPEAT_THRESHOLD = 3
+
+# Session setup such as SET LOCAL statement_timeout is not counted
+_SETUP = re.compile(r"^\s*SET\b", re.IGNORECASE)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block or route issues more statements than its budget."""
+
+
+def query_budget(max_queries: int):
+    """Declare how many statements an endpoint may issue per request.
+
+    Dependencies count too, e.g. get_current_user loads the user. Place it
+    below the router decorator:
+
+        @router.get("/")
+        @query_budget(2)
+        async def list_things(...): ...
+    """
+    def decorator(endpoint):
+        endpoint.query_budget = max_queries
+        return endpoint
+    return decorator
+
+
+class QueryLog:
+    """Fingerprints of the statements issued by a block of code or a request."""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def repeated(self, threshold: int = REPEAT_THRESHOLD) -> Dict[str, int]:
+        """Statement shapes issued at least threshold times (likely N+1 loops)."""
+        return {
+            statement: count
+            for statement, count in Counter(self.statements).items()
+            if count >= threshold
+        }
+
+    def describe(self) -> str:
+        return "\n".join(f"  {i + 1}. {statement}" for i, statement in enumerate(self.statements))
+
+    def assert_within(self, budget: int, label: str = "block") -> None:
+        if self.count > budget:
+            raise QueryBudgetExceeded(
+                f"{label} issued {self.count} statements, budget is {budget}:\n{self.describe()}"
+            )
+
+    def assert_no_repeats(self, threshold: int = REPEAT_THRESHOLD, label: str = "block") -> None:
+        repeated = self.repeated(threshold)
+        if repeated:
+            details = "\n".join(f"  {count}x {statement}" for statement, count in repeated.items())
+            raise QueryBudgetExceeded(f"{label} repeated statements (N+1):\n{details}")
+
+
+# Log of the request being handled by QueryBudgetMiddleware
+_request_log: ContextVar[Optional[QueryLog]] = ContextVar("query_budget_request_log", default=None)
+
+# Logs opened with count_queries(); not context-bound, so statements issued
+# by an app running in TestClient's worker thread are seen as well
+_active_logs: List[QueryLog] = []
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    log = _request_log.get()
+    if log is None and not _active_logs:
+        return
+    if _SETUP.match(statement):
+        return
+    key = fingerprint(statement)
+    if log is not None:
+        log.statements.append(key)
+    for active in _active_logs:
+        active.statements.append(key)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Feed the engine's statements to query logs."""
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryLog]:
+    """Collect every statement issued while the block runs.
+
+        with count_queries() as log:
+            client.get("/api/cart/", headers=auth)
+        log.assert_within(route_budget(app, "GET", "/api/cart/"))
+    """
+    log = QueryLog()
+    _active_logs.append(log)
+    try:
+        yield log
+    finally:
+        _active_logs.remove(log)
+
+
+def route_budget(app: FastAPI, method: str, path: str) -> int:
+    """Declared query budget of the route that handles method and path."""
+    scope = {"type": "http", "method": method, "path": path}
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.matches(scope)[0] == Match.FULL:
+            budget = getattr(route.endpoint, "query_budget", None)
+            if budget is None:
+                raise QueryBudgetExceeded(f"{method} {route.path} declares no query budget")
+            return budget
+    raise LookupError(f"No route for {method} {path}")
+
+
+def routes_without_budget(app: FastAPI) -> List[Tuple[str, str]]:
+    """(methods, path) of API routes that declare no query budget."""
+    return [
+        (",".join(sorted(route.methods)), route.path)
+        for route in app.routes
+        if isinstance(route, APIRoute)
+        and route.include_in_schema
+        and getattr(route.endpoint, "query_budget", None) is None
+    ]
+
+
+class QueryBudgetMiddleware:
+    """Development middleware that logs budget overruns and N+1 patterns.
+
+    Responses are not changed; every request whose route goes over its
+    declared budget or repeats a statement shape is logged with its
+    statements.
+    """
+
+    def __init__(self, app, repeat_threshold: int = REPEAT_THRESHOLD):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+        self.violations: Counter = Counter()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        log = QueryLog()
+        token = _request_log.set(log)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_log.reset(token)
+            self._check(scope, log)
+
+    def _check(self, scope, log: QueryLog) -> None:
+        route = scope.get("route")
+        if route is None:
+            return
+        label = f"{scope['method']} {route.path}"
+        budget = getattr(route.endpoint, "query_budget", None)
+        if budget is not None and log.count > budget:
+            self.violations[label] += 1
+            logger.warning("%s issued %d statements, budget is %d:\n%s",
+                           label, log.count, budget, log.describe())
+        repeated = log.repeated(self.repeat_threshold)
+        if repeated:
+            self.violations[label] += 1
+            logger.warning("%s repeated statements (possible N+1): %s", label, repeated)
@@ -0,0 +1,144 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class MemoryBucketStore:
+    """Token buckets kept in this process; for single-node deployments.
+    
+    Holds at most maxsize buckets, evicting the least recently used one.
+    An evicted bucket simply starts full again.
+    """
+    
+    def __init__(self, maxsize: int = 100000):
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+    
+    async def consume(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> Tuple[bool, float]:
+        """Take cost tokens from the bucket; return (allowed, retry_after_seconds)."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [capacity, now]
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            return True, 0.0
+        return False, (cost - bucket[0]) / rate
+    
+    async def close(self) -> None:
+        pass
+
+
+# Refill and consume atomically on the Redis server, using its clock
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(retry_after)}
+"""
+
+
+class RedisBucketStore:
+    """Token buckets shared by every node through a Redis-protocol server.
+    
+    `client` is any asyncio client exposing `eval(script, numkeys, *args)`
+    (redis.asyncio.Redis, or a local fake in tests).
+    """
+    
+    def __init__(self, client, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+    
+    async def consume(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> Tuple[bool, float]:
+        """Take cost tokens from the bucket; return (allowed, retry_after_seconds)."""
+        allowed, retry_after = await self.client.eval(
+            TOKEN_BUCKET_LUA, 1, self.prefix + key, capacity, rate, cost
+        )
+        return bool(int(allowed)), float(retry_after)
+    
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def create_bucket_store():
+    """Build the store selected by RATE_LIMIT_BACKEND."""
+    if settings.rate_limit_backend == "redis":
+        # Only needed for clustered deployments
+        from redis.asyncio import Redis
+        return RedisBucketStore(Redis.from_url(settings.redis_url))
+    return MemoryBucketStore()
+
+
+bucket_store = create_bucket_store()
+
+
+class RateLimit:
+    """Dependency enforcing per-IP and per-email token buckets on an endpoint.
+    
+    The email is read from the JSON body so credential-stuffing against one
+    account is limited even when it is spread over many IPs.
+    """
+    
+    def __init__(self, scope: str, ip_burst: Optional[int] = None, ip_per_minute: Optional[float] = None):
+        self.scope = scope
+        self.ip_capacity = ip_burst or settings.rate_limit_ip_burst
+        self.ip_rate = (ip_per_minute or settings.rate_limit_ip_per_minute) / 60
+        self.email_capacity = settings.rate_limit_email_burst
+        self.email_rate = settings.rate_limit_email_per_minute / 60
+    
+    async def __call__(self, request: Request) -> None:
+        client_ip = request.client.host if request.client else "unknown"
+        await self._check(f"{self.scope}:ip:{client_ip}", self.ip_capacity, self.ip_rate)
+        
+        email = await self._email_from_body(request)
+        if email:
+            await self._check(f"{self.scope}:email:{email}", self.email_capacity, self.email_rate)
+    
+    @staticmethod
+    async def _email_from_body(request: Request) -> Optional[str]:
+        try:
+            body = await request.json()
+        except ValueError:
+            return None
+        email = body.get("email") if isinstance(body, dict) else None
+        return email.strip().lower() if isinstance(email, str) else None
+    
+    @staticmethod
+    async def _check(key: str, capacity: float, rate: float) -> None:
+        allowed, retry_after = await bucket_store.consume(key, capacity, rate)
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts, please try again later",
+                headers={"Retry-After": str(int(retry_after) + 1)},
+            )
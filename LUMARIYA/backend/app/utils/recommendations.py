@@ -0,0 +1,207 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.order import Order, OrderItem
+from app.models.recommendation import ProductCoPurchase, ProductRecommendation, RecommendationState
+
+# Number of neighbours kept per product
+TOP_K = 12
+
+# Orders younger than this are left for the next run, so transactions that
+# committed out of id order are not skipped by the watermark
+SETTLE_DELAY = timedelta(minutes=1)
+
+# Order lines streamed from the database per chunk
+FETCH_CHUNK = 50_000
+
+# Rows per multi-row upsert
+WRITE_CHUNK = 5_000
+
+STATE_ID = 1
+
+
+def co_purchase_matrix(order_keys: np.ndarray, product_keys: np.ndarray, n_products: int) -> sparse.csr_matrix:
+    """Build a symmetric product x product matrix of co-purchase counts.
+
+    order_keys and product_keys are parallel arrays with one entry per order
+    line; product_keys must already be dense indices in [0, n_products).
+    A product bought twice in one order only counts once for that order.
+    """
+    if len(order_keys) == 0:
+        return sparse.csr_matrix((n_products, n_products), dtype=np.int32)
+
+    _, order_index = np.unique(order_keys, return_inverse=True)
+    incidence = sparse.csr_matrix(
+        (np.ones(len(order_index), dtype=np.int32), (order_index, product_keys)),
+        shape=(order_index.max() + 1, n_products),
+    )
+    incidence.sum_duplicates()
+    incidence.data[:] = 1
+
+    matrix = (incidence.T @ incidence).tocsr()
+    matrix.setdiag(0)
+    matrix.eliminate_zeros()
+    return matrix
+
+
+def top_k_neighbours(matrix: sparse.csr_matrix, k: int = TOP_K) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return (rows, cols, scores) of the k highest-scoring entries of each row.
+
+    Entries are ordered by row, then by descending score (ties broken by
+    column), without a Python-level loop over rows.
+    """
+    coo = matrix.tocoo()
+    order = np.lexsort((coo.col, -coo.data, coo.row))
+    rows, cols, scores = coo.row[order], coo.col[order], coo.data[order]
+
+    # Position of each entry within its row
+    row_starts = np.searchsorted(rows, rows, side="left")
+    rank = np.arange(len(rows)) - row_starts
+    keep = rank < k
+    return rows[keep], cols[keep], scores[keep]
+
+
+def group_neighbours(rows: np.ndarray, cols: np.ndarray, scores: np.ndarray,
+                     product_ids: Sequence[str]) -> List[dict]:
+    """Turn top-k triples into one recommendation row per product."""
+    if len(rows) == 0:
+        return []
+
+    boundaries = np.flatnonzero(np.diff(rows)) + 1
+    starts = np.concatenate(([0], boundaries))
+    return [
+        {
+            "product_id": product_ids[rows[start]],
+            "related_ids": [product_ids[col] for col in row_cols],
+            "scores": row_scores.tolist(),
+        }
+        for start, row_cols, row_scores in zip(
+            starts, np.split(cols, boundaries), np.split(scores, boundaries)
+        )
+    ]
+
+
+async def _load_order_lines(db: AsyncSession, after_order_id: int, up_to_order_id: int):
+    """Stream (order_id, product_id) pairs for the order range into numpy arrays."""
+    order_chunks, product_chunks = [], []
+    result = await db.stream(
+        select(OrderItem.order_id, OrderItem.product_id)
+        .where(
+            OrderItem.order_id > after_order_id,
+            OrderItem.order_id <= up_to_order_id,
+            OrderItem.product_id.isnot(None),
+        )
+        .execution_options(yield_per=FETCH_CHUNK)
+    )
+    async for partition in result.partitions():
+        order_ids, product_ids = zip(*partition)
+        order_chunks.append(np.array(order_ids, dtype=np.int64))
+        product_chunks.append(np.array(product_ids, dtype=object))
+
+    if not order_chunks:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=object)
+    return np.concatenate(order_chunks), np.concatenate(product_chunks)
+
+
+async def _upsert_pair_counts(db: AsyncSession, delta: sparse.csr_matrix, product_ids: np.ndarray) -> int:
+    """Add the delta co-purchase counts onto product_copurchases."""
+    coo = delta.tocoo()
+    stmt = insert(ProductCoPurchase)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ProductCoPurchase.product_id, ProductCoPurchase.related_id],
+        set_={"count": ProductCoPurchase.count + stmt.excluded.count},
+    )
+    for start in range(0, coo.nnz, WRITE_CHUNK):
+        end = start + WRITE_CHUNK
+        await db.execute(stmt, [
+            {"product_id": product_ids[row], "related_id": product_ids[col], "count": int(count)}
+            for row, col, count in zip(coo.row[start:end], coo.col[start:end], coo.data[start:end])
+        ])
+    return coo.nnz
+
+
+async def _rebuild_top_k(db: AsyncSession, touched_ids: Sequence[str], k: int) -> int:
+    """Recompute the stored top-k neighbours for the given products."""
+    stmt = insert(ProductRecommendation)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ProductRecommendation.product_id],
+        set_={
+            "related_ids": stmt.excluded.related_ids,
+            "scores": stmt.excluded.scores,
+            "updated_at": func.now(),
+        },
+    )
+    updated = 0
+    for start in range(0, len(touched_ids), WRITE_CHUNK):
+        chunk = touched_ids[start:start + WRITE_CHUNK]
+        result = await db.execute(
+            select(ProductCoPurchase.product_id, ProductCoPurchase.related_id, ProductCoPurchase.count)
+            .where(ProductCoPurchase.product_id.in_(chunk), ProductCoPurchase.count > 0)
+        )
+        pairs = result.all()
+        if not pairs:
+            continue
+
+        sources, targets, counts = zip(*pairs)
+        ids, index = np.unique(np.array(sources + targets, dtype=object), return_inverse=True)
+        matrix = sparse.csr_matrix(
+            (np.array(counts, dtype=np.int64), (index[:len(sources)], index[len(sources):])),
+            shape=(len(ids), len(ids)),
+        )
+        recommendations = group_neighbours(*top_k_neighbours(matrix, k), ids)
+        await db.execute(stmt, recommendations)
+        updated += len(recommendations)
+    return updated
+
+
+async def refresh_recommendations(db: AsyncSession, k: int = TOP_K, max_order_id: Optional[int] = None) -> dict:
+    """Fold order lines placed since the last run into the recommendation tables.
+
+    Co-purchase counts for the new orders are computed in memory with sparse
+    matrix operations and added onto product_copurchases; only products that
+    appeared in the new orders get their top-k list recomputed. Counts, top-k
+    lists and the watermark are written in the caller's transaction, so a
+    failed run is retried from the same order id. max_order_id caps the run,
+    leaving later orders to the next one.
+    """
+    result = await db.execute(
+        select(RecommendationState.last_order_id).where(RecommendationState.id == STATE_ID)
+    )
+    last_order_id = result.scalar() or 0
+
+    cutoff = datetime.now(timezone.utc) - SETTLE_DELAY
+    conditions = [Order.id > last_order_id, Order.created_at < cutoff]
+    if max_order_id is not None:
+        conditions.append(Order.id <= max_order_id)
+    result = await db.execute(select(func.max(Order.id)).where(*conditions))
+    up_to_order_id = result.scalar()
+    if up_to_order_id is None:
+        return {"last_order_id": last_order_id, "order_lines": 0, "pairs": 0, "products_updated": 0}
+
+    order_keys, product_keys = await _load_order_lines(db, last_order_id, up_to_order_id)
+    product_ids, product_index = np.unique(product_keys, return_inverse=True)
+    delta = co_purchase_matrix(order_keys, product_index, len(product_ids))
+
+    pairs = await _upsert_pair_counts(db, delta, product_ids)
+    touched = product_ids[np.unique(delta.tocoo().row)].tolist()
+    products_updated = await _rebuild_top_k(db, touched, k)
+
+    stmt = insert(RecommendationState).values(id=STATE_ID, last_order_id=up_to_order_id)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RecommendationState.id],
+        set_={"last_order_id": up_to_order_id, "updated_at": func.now()},
+    )
+    await db.execute(stmt)
+
+    return {
+        "last_order_id": up_to_order_id,
+        "order_lines": len(order_keys),
+        "pairs": pairs,
+        "products_updated": products_updated,
+    }
@@ -0,0 +1,110 @@
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.token import RevokedToken
+from app.utils.bloom import BloomFilter
+
+settings = get_settings()
+
+# Revocations committed this long before the previous sync are read again,
+# so transactions that committed late are not missed
+SYNC_OVERLAP = timedelta(seconds=30)
+
+# How often expired revocations are dropped from memory and the table
+PURGE_INTERVAL = 600.0
+
+
+class RevocationList:
+    """In-memory set of revoked token IDs, checked without any I/O.
+
+    A Bloom filter answers the common "not revoked" case; its rare positives
+    are confirmed against an exact jti -> expiry map. Entries are dropped
+    once the token would have expired anyway.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._bloom = BloomFilter(capacity)
+        self._confirmed: Dict[str, float] = {}
+        self.last_synced_at: Optional[datetime] = None
+        self._next_purge = time.time() + PURGE_INTERVAL
+
+    def __len__(self) -> int:
+        return len(self._confirmed)
+
+    def add(self, jti: str, expires_at: float) -> None:
+        if jti in self._confirmed:
+            return
+        self._confirmed[jti] = expires_at
+        self._bloom.add(jti)
+        if self._bloom.count > self.capacity:
+            self._rebuild()
+
+    def is_revoked(self, jti: str) -> bool:
+        if jti not in self._bloom:
+            return False
+        expires_at = self._confirmed.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def purge_expired(self) -> int:
+        """Forget revocations of tokens that have expired; return how many."""
+        now = time.time()
+        expired = [jti for jti, expires_at in self._confirmed.items() if expires_at <= now]
+        for jti in expired:
+            del self._confirmed[jti]
+        if expired:
+            self._rebuild()
+        self._next_purge = now + PURGE_INTERVAL
+        return len(expired)
+
+    def purge_due(self) -> bool:
+        return time.time() >= self._next_purge
+
+    def _rebuild(self) -> None:
+        # Bloom filters cannot delete; rebuild, growing if the live set outgrew it
+        self.capacity = max(self.capacity, 2 * len(self._confirmed))
+        self._bloom = BloomFilter(self.capacity)
+        for jti in self._confirmed:
+            self._bloom.add(jti)
+
+
+revocations = RevocationList(settings.revocation_bloom_capacity)
+
+
+async def revoke_token(db: AsyncSession, jti: str, expires_at: datetime, user_id: Optional[int] = None) -> None:
+    """Record a revocation in the caller's transaction; workers see it on their next sync.
+    
+    After committing, add it to `revocations` so this worker rejects the
+    token at once; adding it before could reject a token the commit failed
+    to revoke for everyone else.
+    """
+    stmt = insert(RevokedToken).values(jti=jti, user_id=user_id, expires_at=expires_at)
+    await db.execute(stmt.on_conflict_do_nothing(index_elements=[RevokedToken.jti]))
+
+
+async def sync_revocations(db: AsyncSession) -> int:
+    """Pull revocations recorded by any worker since the previous sync."""
+    result = await db.execute(select(func.now()))
+    synced_at = result.scalar()
+
+    query = select(RevokedToken.jti, RevokedToken.expires_at).where(RevokedToken.expires_at > synced_at)
+    if revocations.last_synced_at is not None:
+        query = query.where(RevokedToken.revoked_at >= revocations.last_synced_at - SYNC_OVERLAP)
+
+    result = await db.execute(query)
+    rows = result.all()
+    for jti, expires_at in rows:
+        revocations.add(jti, expires_at.timestamp())
+    revocations.last_synced_at = synced_at
+
+    if revocations.purge_due():
+        revocations.purge_expired()
+        await db.execute(delete(RevokedToken).where(RevokedToken.expires_at < datetime.now(timezone.utc)))
+
+    return len(rows)
@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import random
+import re
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+from app.config import get_settings
+from app.database import engine
+from app.utils.fingerprint import fingerprint
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Plans are captured for these statements only; EXPLAIN ANALYZE executes
+# the statement, so anything that writes or locks is never explained
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_LOCKING = re.compile(r"\bFOR\s+(UPDATE|SHARE|NO\s+KEY\s+UPDATE|KEY\s+SHARE)\b", re.IGNORECASE)
+
+# Set while the explain worker runs its own queries, so they are not recorded
+_explaining: ContextVar[bool] = ContextVar("slow_query_explaining", default=False)
+
+
+class QueryStats:
+    """Execution totals and the latest captured plan for one fingerprint."""
+
+    __slots__ = ("calls", "slow_calls", "errors", "total_seconds", "max_seconds",
+                 "plan", "plan_captured_at", "plan_requested_at")
+
+    def __init__(self):
+        self.calls = 0
+        self.slow_calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.plan: Optional[str] = None
+        self.plan_captured_at: Optional[datetime] = None
+        self.plan_requested_at = 0.0
+
+
+class SlowQueryLog:
+    """Per-fingerprint query statistics with sampled EXPLAIN capture.
+
+    Engine hooks time every statement and add it to its fingerprint's
+    totals; failed statements (statement timeouts included) count with the
+    time they ran before failing. Statements slower than the threshold are
+    logged, and a sample of slow SELECTs is queued for EXPLAIN (ANALYZE,
+    BUFFERS), which a background task runs on its own connection and always
+    rolls back. Each fingerprint is explained at most once per
+    explain_interval.
+    """
+
+    def __init__(self, threshold_ms: float, sample_rate: float, explain_interval: float,
+                 max_fingerprints: int, queue_size: int = 32):
+        self.threshold = threshold_ms / 1000
+        self.sample_rate = sample_rate
+        self.explain_interval = explain_interval
+        self.max_fingerprints = max_fingerprints
+        self.stats: Dict[str, QueryStats] = {}
+        self.dropped_fingerprints = 0
+        self._queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def instrument(self, engine: Engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._slow_query_started
+        if _explaining.get():
+            return
+        self.record(statement, parameters, elapsed, executemany)
+
+    def _handle_error(self, exception_context):
+        context = exception_context.execution_context
+        started = getattr(context, "_slow_query_started", None)
+        if started is None or exception_context.statement is None or _explaining.get():
+            return
+        self.record(exception_context.statement, exception_context.parameters,
+                    time.perf_counter() - started, context.executemany, failed=True)
+
+    def record(self, statement: str, parameters, elapsed: float, executemany: bool = False,
+               failed: bool = False) -> None:
+        key = fingerprint(statement)
+        stats = self.stats.get(key)
+        if stats is None:
+            if len(self.stats) >= self.max_fingerprints:
+                self.dropped_fingerprints += 1
+                return
+            stats = self.stats[key] = QueryStats()
+        stats.calls += 1
+        stats.errors += int(failed)
+        stats.total_seconds += elapsed
+        if elapsed > stats.max_seconds:
+            stats.max_seconds = elapsed
+        if elapsed < self.threshold:
+            return
+
+        stats.slow_calls += 1
+        logger.warning("Slow %squery (%.0f ms): %s", "failed " if failed else "", elapsed * 1000, key)
+        if not executemany and self._should_explain(statement, stats):
+            stats.plan_requested_at = time.monotonic()
+            try:
+                self._queue.put_nowait((key, statement, parameters))
+            except asyncio.QueueFull:
+                pass
+
+    def _should_explain(self, statement: str, stats: QueryStats) -> bool:
+        return (
+            self._queue is not None
+            and time.monotonic() - stats.plan_requested_at >= self.explain_interval
+            and random.random() < self.sample_rate
+            and _EXPLAINABLE.match(statement) is not None
+            and _LOCKING.search(statement) is None
+        )
+
+    async def explain(self, statement: str, parameters) -> str:
+        """Run EXPLAIN (ANALYZE, BUFFERS) for the statement and return the plan text."""
+        async with engine.connect() as conn:
+            await conn.execute(text(f"SET LOCAL statement_timeout = {int(settings.slow_query_explain_timeout_ms)}"))
+            result = await conn.exec_driver_sql(
+                "EXPLAIN (ANALYZE, BUFFERS) " + statement,
+                tuple(parameters) if parameters else (),
+            )
+            plan = "\n".join(row[0] for row in result)
+            await conn.rollback()
+        return plan
+
+    async def _run(self) -> None:
+        _explaining.set(True)
+        while True:
+            key, statement, parameters = await self._queue.get()
+            try:
+                plan = await self.explain(statement, parameters)
+            except Exception:
+                logger.exception("Failed to capture plan for slow query: %s", key)
+                continue
+            stats = self.stats.get(key)
+            if stats is not None:
+                stats.plan = plan
+                stats.plan_captured_at = datetime.now(timezone.utc)
+
+    def start(self) -> None:
+        """Start capturing plans in the background (call from the running loop)."""
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self._queue_size)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._queue = None
+
+    def top(self, limit: int, sort: str = "total") -> List[dict]:
+        """Fingerprints ranked by total, mean or max time."""
+        keys = {
+            "total": lambda item: item[1].total_seconds,
+            "mean": lambda item: item[1].total_seconds / item[1].calls,
+            "max": lambda item: item[1].max_seconds,
+        }
+        ranked = sorted(self.stats.items(), key=keys[sort], reverse=True)[:limit]
+        return [
+            {
+                "fingerprint": key,
+                "calls": stats.calls,
+                "slowCalls": stats.slow_calls,
+                "errors": stats.errors,
+                "totalMs": round(stats.total_seconds * 1000, 2),
+                "meanMs": round(stats.total_seconds / stats.calls * 1000, 3),
+                "maxMs": round(stats.max_seconds * 1000, 2),
+                "plan": stats.plan,
+                "planCapturedAt": stats.plan_captured_at.isoformat() if stats.plan_captured_at else None,
+            }
+            for key, stats in ranked
+        ]
+
+    def reset(self) -> None:
+        self.stats.clear()
+        self.dropped_fingerprints = 0
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.slow_query_threshold_ms,
+    sample_rate=settings.slow_query_explain_sample_rate,
+    explain_interval=settings.slow_query_explain_interval_seconds,
+    max_fingerprints=settings.slow_query_max_fingerprints,
+)
@@ -0,0 +1,89 @@
+import logging
+from collections import Counter
+
+from fastapi import Request
+from sqlalchemy.exc import DBAPIError
+
+from app.config import get_settings
+from app.utils.admission import classify_route
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Per-statement time budget of each route group
+STATEMENT_TIMEOUTS_MS = {
+    "checkout": 5000,
+    "cart": 2000,
+    "account": 2000,
+    "catalog": 2000,
+    "admin": 15000,
+}
+
+# Routes that only read, so get_db may cancel them, queries included, when the
+# client disconnects. Opt-in per route template rather than by method: a GET
+# that writes (the OAuth callbacks) must not be cut off before its commit
+CANCEL_ON_DISCONNECT = frozenset({
+    "GET /api/auth/me",
+    "GET /api/products/",
+    "GET /api/products/facets",
+    "GET /api/products/{product_id}",
+    "GET /api/products/{product_id}/related",
+    "GET /api/cart/",
+    "GET /api/cart/summary",
+    "GET /api/cart/guest",
+    "GET /api/cart/guest/summary",
+    "GET /api/orders/",
+    "GET /api/orders/{order_id}",
+    "GET /api/users/profile",
+    "GET /api/users/me/overview",
+    "GET /api/users/addresses",
+    "GET /api/admin/stats",
+    "GET /api/admin/analytics",
+    "GET /api/admin/orders",
+    "GET /api/admin/orders/{order_id}",
+    "GET /api/admin/pricing-rules",
+    "GET /api/admin/users",
+})
+
+# SQLSTATE of query_canceled (statement_timeout or a cancel request)
+QUERY_CANCELED = "57014"
+
+# Counts per route template, e.g. "GET /api/admin/orders"
+statement_timeouts: Counter = Counter()
+disconnect_cancellations: Counter = Counter()
+
+
+def route_label(request: Request) -> str:
+    """Method and route template of a request, for counting per route."""
+    route = request.scope.get("route")
+    path = getattr(route, "path", None) or request.url.path
+    return f"{request.method} {path}"
+
+
+def route_statement_timeout(method: str, path: str) -> int:
+    """Statement timeout budget in milliseconds for a route."""
+    return STATEMENT_TIMEOUTS_MS.get(classify_route(method, path), settings.statement_timeout_ms)
+
+
+def statement_timeout_for(request: Request) -> int:
+    """Statement timeout budget in milliseconds for the request's route."""
+    return route_statement_timeout(request.method, request.url.path)
+
+
+def cancels_on_disconnect(request: Request) -> bool:
+    """Whether the request's route is marked read-only in CANCEL_ON_DISCONNECT."""
+    return route_label(request) in CANCEL_ON_DISCONNECT
+
+
+def is_query_canceled(error: DBAPIError) -> bool:
+    return getattr(error.orig, "sqlstate", None) == QUERY_CANCELED
+
+
+def record_statement_timeout(request: Request) -> None:
+    label = route_label(request)
+    statement_timeouts[label] += 1
+    logger.warning("Statement timeout on %s (%d so far)", label, statement_timeouts[label])
+
+
+def record_disconnect_cancellation(request: Request) -> None:
+    disconnect_cancellations[route_label(request)] += 1
@@ -0,0 +1,363 @@
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import get_settings
+from app.utils.fingerprint import fingerprint
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# W3C trace context: version-traceid-parentid-flags
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# Finished spans are handed to the exporter in batches of this size, or
+# after this many seconds, whichever comes first
+EXPORT_BATCH = 256
+EXPORT_INTERVAL = 5.0
+
+# Batches the file exporter's writer thread may fall behind by before it drops them
+FILE_EXPORT_BACKLOG = 64
+
+
+class Span:
+    """One timed operation in a trace.
+
+    Spans that were not sampled are still created at the root, so their ids
+    can be propagated downstream, but they record nothing and children
+    reuse them instead of allocating new spans.
+    """
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "sampled",
+                 "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, kind: str, sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes: Dict[str, object] = {}
+        self.error: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set(self, key: str, value) -> None:
+        if self.sampled:
+            self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        """OTLP-style JSON representation."""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+        }
+
+
+class SpanExporter(ABC):
+    """Receives batches of finished spans; subclass to ship them elsewhere (e.g. OTLP)."""
+
+    @abstractmethod
+    def export(self, spans: List[dict]) -> None:
+        """Called on the event loop, so it must not block."""
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InMemoryExporter(SpanExporter):
+    """Keeps the most recent finished spans in memory."""
+
+    def __init__(self, maxlen: int = 10000):
+        self.finished: deque = deque(maxlen=maxlen)
+
+    def export(self, spans: List[dict]) -> None:
+        self.finished.extend(spans)
+
+    def traces(self, limit: int) -> List[dict]:
+        """Most recent traces, newest first, each with its spans in start order."""
+        by_trace: Dict[str, List[dict]] = {}
+        for span in reversed(self.finished):
+            by_trace.setdefault(span["traceId"], []).append(span)
+        traces = []
+        for trace_id, spans in list(by_trace.items())[:limit]:
+            spans.sort(key=lambda span: span["startTimeUnixNano"])
+            root = next((span for span in spans if span["parentSpanId"] is None), spans[0])
+            traces.append({
+                "traceId": trace_id,
+                "name": root["name"],
+                "durationMs": root["durationMs"],
+                "spans": spans,
+            })
+        return traces
+
+    def clear(self) -> None:
+        self.finished.clear()
+
+
+class FileExporter(SpanExporter):
+    """Appends spans as JSON lines to a local file.
+
+    A writer thread does the file I/O, so ending a span never waits on the
+    disk. Batches are dropped, with a warning, if it falls too far behind.
+    """
+
+    def __init__(self, path: str, backlog: int = FILE_EXPORT_BACKLOG):
+        self.path = path
+        self._queue: queue.Queue = queue.Queue(maxsize=backlog)
+        self._thread: Optional[threading.Thread] = None
+
+    def export(self, spans: List[dict]) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._write, name="span-file-exporter", daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            logger.warning("Span file writer is behind; dropped %d spans", len(spans))
+
+    def _write(self) -> None:
+        while True:
+            spans = self._queue.get()
+            if spans is None:
+                return
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.writelines(json.dumps(span, default=str) + "\n" for span in spans)
+            except OSError:
+                logger.exception("Failed to write %d spans to %s", len(spans), self.path)
+
+    def shutdown(self) -> None:
+        """Write the queued batches and stop the writer thread."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+
+class Tracer:
+    """Creates spans, decides sampling and batches finished spans for export.
+
+    Sampling is decided once per trace: an incoming traceparent's sampled
+    flag is honoured, otherwise sample_rate of new traces are recorded.
+    """
+
+    def __init__(self, exporter: Optional[SpanExporter], sample_rate: float):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self._pending: List[dict] = []
+        self._last_flush = time.monotonic()
+
+    def new_span(self, name: str, kind: str = "internal", parent: Optional[Span] = None,
+                 remote: Optional[Tuple[str, str, bool]] = None) -> Span:
+        """Create a span under parent, under a remote (trace_id, span_id, sampled), or as a root."""
+        if parent is not None:
+            return Span(parent.trace_id, parent.span_id, name, kind, parent.sampled)
+        if remote is not None:
+            trace_id, parent_id, sampled = remote
+            return Span(trace_id, parent_id, name, kind, sampled)
+        sampled = self.exporter is not None and random.random() < self.sample_rate
+        return Span(os.urandom(16).hex(), None, name, kind, sampled)
+
+    def end_span(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        if span.sampled and self.exporter is not None:
+            self._pending.append(span.to_dict())
+            if len(self._pending) >= EXPORT_BATCH or time.monotonic() - self._last_flush >= EXPORT_INTERVAL:
+                self.flush()
+
+    def flush(self) -> None:
+        """Hand pending spans to the exporter."""
+        self._last_flush = time.monotonic()
+        if not self._pending or self.exporter is None:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            self.exporter.export(batch)
+        except Exception:
+            logger.exception("Failed to export %d spans", len(batch))
+
+    def shutdown(self) -> None:
+        """Flush pending spans and shut the exporter down."""
+        self.flush()
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", **attributes) -> Iterator[Span]:
+        """Run the block in a child span of the current one.
+
+        Without a sampled parent no span is recorded; the unsampled parent,
+        or a placeholder outside any trace, is yielded so callers can still
+        call set().
+        """
+        parent = current_span.get()
+        if parent is None or not parent.sampled:
+            yield parent or _UNSAMPLED
+            return
+        span = self.new_span(name, kind, parent)
+        span.attributes.update(attributes)
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            current_span.reset(token)
+            self.end_span(span)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """(trace_id, parent_span_id, sampled) from a W3C traceparent header."""
+    if not value:
+        return None
+    match = _TRACEPARENT.match(value.strip().lower())
+    if match is None or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+def create_exporter(kind: str) -> Optional[SpanExporter]:
+    """Exporter named by the tracing_exporter setting ("memory", "file" or "none")."""
+    if kind == "memory":
+        return InMemoryExporter()
+    if kind == "file":
+        return FileExporter(settings.tracing_file_path)
+    return None
+
+
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+# Stand-in yielded outside a trace
+_UNSAMPLED = Span("0" * 32, None, "unsampled", "internal", False)
+
+tracer = Tracer(create_exporter(settings.tracing_exporter), settings.tracing_sample_rate)
+
+
+def inject_traceparent(headers) -> None:
+    """Forward the current trace context to a downstream call."""
+    span = current_span.get()
+    if span is not None:
+        headers["traceparent"] = span.traceparent
+
+
+def traced(name: Optional[str] = None):
+    """Decorator running an async function (e.g. a dependency) in a span."""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with tracer.span(span_name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = current_span.get()
+    if parent is not None and parent.sampled:
+        span = tracer.new_span("db.query", "client", parent)
+        span.attributes["db.system"] = "postgresql"
+        span.attributes["db.statement"] = fingerprint(statement)
+        context._trace_span = span
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    span = getattr(context, "_trace_span", None)
+    if span is not None:
+        span.attributes["db.rows"] = cursor.rowcount
+        tracer.end_span(span)
+
+
+def _handle_error(exception_context):
+    span = getattr(exception_context.execution_context, "_trace_span", None)
+    if span is not None:
+        span.error = str(exception_context.original_exception)
+        tracer.end_span(span)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Record a span per SQL statement under the current span."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class TracingMiddleware:
+    """ASGI middleware that opens the server span of each HTTP request.
+
+    Continues the caller's trace when a valid traceparent header is sent and
+    names the span after the matched route template.
+    """
+
+    def __init__(self, app, skip_paths=("/metrics", "/health")):
+        self.app = app
+        self.skip_paths = frozenset(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            return await self.app(scope, receive, send)
+
+        remote = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                remote = parse_traceparent(value.decode("latin-1"))
+                break
+
+        span = tracer.new_span(f"{scope['method']} {scope['path']}", "server", remote=remote)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        token = current_span.set(span)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            current_span.reset(token)
+            if span.sampled:
+                route = scope.get("route")
+                if route is not None:
+                    span.name = f"{scope['method']} {route.path}"
+                    span.attributes["http.route"] = route.path
+                span.attributes["http.method"] = scope["method"]
+                span.attributes["http.target"] = scope["path"]
+                span.attributes["http.status_code"] = status_code
+                if status_code >= 500 and span.error is None:
+                    span.error = f"HTTP {status_code}"
+            tracer.end_span(span)
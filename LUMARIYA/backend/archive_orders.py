@@ -0,0 +1,51 @@
+"""
+Archive orders older than the retention period (ORDER_RETENTION_MONTHS).
+Each expired month is detached from orders and order_items, written to
+ORDER_ARCHIVE_DIR as gzipped CSV (orders_pYYYY_MM.csv.gz and
+order_items_pYYYY_MM.csv.gz) and dropped. Upcoming partitions are created
+too. Run it from cron, e.g. daily; a run that was interrupted is finished
+by the next one.
+
+Usage: python archive_orders.py [--retention-months N] [--dir PATH]
+"""
+import argparse
+import asyncio
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.config import get_settings
+from app.utils.partitions import archive_partitions, create_upcoming_partitions
+
+settings = get_settings()
+
+
+async def archive(retention_months: int, archive_dir: str):
+    """Create upcoming partitions, then archive the expired ones."""
+    engine = create_async_engine(settings.database_url)
+    
+    async with engine.begin() as conn:
+        created = await create_upcoming_partitions(conn)
+    print(f"✅ {len(created)} upcoming partitions created")
+    
+    async with engine.connect() as conn:
+        files = await archive_partitions(conn, retention_months, archive_dir)
+    for path in files:
+        print(f"📦 {path}")
+    print(f"✅ {len(files)} partitions archived")
+    
+    await engine.dispose()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Archive old monthly order partitions")
+    parser.add_argument("--retention-months", type=int, default=settings.order_retention_months)
+    parser.add_argument("--dir", default=settings.order_archive_dir, help="Directory for the CSV exports")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    
+    args = parse_args()
+    print("🗄️  Archiving orders...")
+    asyncio.run(archive(args.retention_months, args.dir))
@@ -0,0 +1,66 @@
+"""
+Benchmark for the per-request cost of the metrics instrumentation.
+Times a trivial ASGI app with and without MetricsMiddleware, and the engine
+hooks that run around every query.
+
+Usage: python -m benchmarks.bench_metrics [requests]
+"""
+import asyncio
+import sys
+import time
+from types import SimpleNamespace
+
+from app.utils.metrics import MetricsMiddleware, _before_cursor_execute, _after_cursor_execute, registry
+
+ROUTE = SimpleNamespace(path="/api/products/{product_id}")
+START = {"type": "http.response.start", "status": 200, "headers": []}
+BODY = {"type": "http.response.body", "body": b"{}"}
+
+
+async def endpoint(scope, receive, send):
+    scope["route"] = ROUTE
+    await send(START)
+    await send(BODY)
+
+
+async def send(message):
+    pass
+
+
+async def run(app, requests: int) -> float:
+    """Return the mean seconds per request."""
+    started = time.perf_counter()
+    for i in range(requests):
+        scope = {"type": "http", "method": "GET", "path": f"/api/products/{i % 500}"}
+        await app(scope, None, send)
+    return (time.perf_counter() - started) / requests
+
+
+def run_hooks(queries: int) -> float:
+    """Return the mean seconds for one before/after hook pair."""
+    context = SimpleNamespace()
+    started = time.perf_counter()
+    for _ in range(queries):
+        _before_cursor_execute(None, None, None, None, context, False)
+        _after_cursor_execute(None, None, None, None, context, False)
+    return (time.perf_counter() - started) / queries
+
+
+async def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    print(f"Metrics benchmark: {requests:,} requests")
+    bare = await run(endpoint, requests)
+    instrumented = await run(MetricsMiddleware(endpoint), requests)
+    print(f"  bare app              {bare * 1e6:6.2f} us/request")
+    print(f"  with MetricsMiddleware {instrumented * 1e6:5.2f} us/request")
+    print(f"  overhead              {(instrumented - bare) * 1e6:6.2f} us/request")
+    print(f"  query hooks           {run_hooks(requests) * 1e6:6.2f} us/query")
+
+    started = time.perf_counter()
+    text = registry.render()
+    print(f"  scrape                {(time.perf_counter() - started) * 1e3:6.2f} ms ({len(text):,} bytes)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
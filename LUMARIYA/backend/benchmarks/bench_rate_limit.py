@@ -0,0 +1,34 @@
+"""
+Benchmark for the login rate limiter's per-check overhead.
+Times token-bucket checks against the in-memory store, both for a single hot
+key and spread over many keys (one bucket per IP/email).
+
+Usage: python -m benchmarks.bench_rate_limit [checks]
+"""
+import asyncio
+import sys
+import time
+
+from app.utils.rate_limit import MemoryBucketStore
+
+
+async def run(store, keys, checks: int) -> float:
+    """Return the mean seconds per consume() call."""
+    started = time.perf_counter()
+    for i in range(checks):
+        await store.consume(keys[i % len(keys)], 20, 10 / 60)
+    return (time.perf_counter() - started) / checks
+
+
+async def main():
+    checks = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    
+    print(f"Rate limiter benchmark: {checks:,} checks")
+    for label, n_keys in [("single key", 1), ("10k keys", 10_000), ("200k keys (evicting)", 200_000)]:
+        keys = [f"login:ip:10.0.{i // 256}.{i % 256}" for i in range(n_keys)]
+        per_check = await run(MemoryBucketStore(), keys, checks)
+        print(f"  {label:<24} {per_check * 1e6:6.2f} us/check")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
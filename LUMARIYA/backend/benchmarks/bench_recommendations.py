@@ -0,0 +1,54 @@
+"""
+Benchmark for the in-memory part of the recommendation job.
+Generates synthetic order lines with a skewed product popularity and times
+the co-purchase matrix build and the top-k extraction. The job itself,
+database reads and writes included, is timed by
+benchmarks/bench_refresh_recommendations.py.
+
+Usage: python -m benchmarks.bench_recommendations [order_lines] [products]
+"""
+import sys
+import time
+
+import numpy as np
+
+from app.utils.recommendations import co_purchase_matrix, top_k_neighbours, group_neighbours, TOP_K
+
+
+def synthetic_order_lines(n_lines: int, n_products: int, seed: int = 42):
+    """Return (order_keys, product_keys) with ~3 lines per order and Zipf-like popularity."""
+    rng = np.random.default_rng(seed)
+    lines_per_order = rng.integers(1, 6, size=n_lines // 2 + 1)
+    order_keys = np.repeat(np.arange(len(lines_per_order)), lines_per_order)[:n_lines]
+    product_keys = (rng.zipf(1.3, size=n_lines) - 1) % n_products
+    return order_keys, product_keys
+
+
+def timed(label: str, fn, *args):
+    """Run fn(*args), print its wall time and return its result."""
+    started = time.perf_counter()
+    result = fn(*args)
+    print(f"  {label:<28} {time.perf_counter() - started:8.3f}s")
+    return result
+
+
+def main():
+    n_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    n_products = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    
+    print(f"Recommendation benchmark: {n_lines:,} order lines, {n_products:,} products")
+    order_keys, product_keys = timed("generate order lines", synthetic_order_lines, n_lines, n_products)
+    product_ids = np.array([f"p{i}" for i in range(n_products)], dtype=object)
+    
+    started = time.perf_counter()
+    matrix = timed("co-purchase matrix", co_purchase_matrix, order_keys, product_keys, n_products)
+    neighbours = timed(f"top-{TOP_K} neighbours", top_k_neighbours, matrix, TOP_K)
+    rows = timed("group per product", group_neighbours, *neighbours, product_ids)
+    total = time.perf_counter() - started
+    
+    print(f"  {'total':<28} {total:8.3f}s")
+    print(f"  non-zero pairs: {matrix.nnz:,}, products with neighbours: {len(rows):,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark for the recommendation job against the database.
+Times refresh_recommendations on the dataset loaded by
+benchmarks/generate_data.py: a full build over all but the latest orders,
+then an incremental run folding the latest orders into the existing counts.
+
+Everything runs in one transaction that is rolled back, so the stored
+recommendations are left as they were.
+
+Usage: python -m benchmarks.bench_refresh_recommendations [incremental_orders]
+"""
+import asyncio
+import sys
+import time
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import get_settings
+from app.models.order import Order, OrderItem
+from app.models.recommendation import ProductCoPurchase, ProductRecommendation, RecommendationState
+from app.utils.recommendations import refresh_recommendations
+
+settings = get_settings()
+
+
+async def timed(label: str, job) -> dict:
+    """Await job, print its wall time and summary and return the summary."""
+    started = time.perf_counter()
+    summary = await job
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<18} {elapsed:8.3f}s  {summary['order_lines']:>12,} lines  "
+          f"{summary['pairs']:>12,} pairs  {summary['products_updated']:>10,} products")
+    return summary
+
+
+async def main():
+    incremental_orders = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    engine = create_async_engine(settings.database_url)
+    async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    
+    async with async_session() as session:
+        orders = (await session.execute(select(func.count(), func.max(Order.id)).select_from(Order))).one()
+        lines = (await session.execute(select(func.count()).select_from(OrderItem))).scalar()
+        if not orders[0]:
+            print("❌ No orders; load a dataset with python -m benchmarks.generate_data first")
+            await engine.dispose()
+            return
+        print(f"Recommendation job benchmark: {orders[0]:,} orders, {lines:,} order lines")
+        
+        # Start from empty recommendation tables, inside the transaction
+        for model in (ProductCoPurchase, ProductRecommendation, RecommendationState):
+            await session.execute(delete(model))
+        
+        await timed("full build", refresh_recommendations(session, max_order_id=orders[1] - incremental_orders))
+        await timed("incremental", refresh_recommendations(session))
+        await session.rollback()
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    
+    asyncio.run(main())
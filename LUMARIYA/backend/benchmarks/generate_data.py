@@ -0,0 +1,302 @@
+"""
+Synthetic data generator for load tests and benchmarks.
+Bulk-loads products, users (with addresses and carts), orders and order items
+with COPY. The same --seed always produces the same data, so benchmark runs
+on different commits see identical datasets.
+
+Defaults match the target volumes (1M products, 1M users, 10M orders); pass
+smaller counts for a quick local dataset. Generated rows are recognisable by
+their ids and emails (products "BP...", users "bench...@lumariya.test"); all
+bench users have the password "benchpass123".
+
+Usage: python -m benchmarks.generate_data [--products N] [--users N] [--orders N]
+                                          [--seed N] [--truncate]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import combinations
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import get_settings
+from app.database import Base
+from app.utils.partitions import ensure_partitions, add_months, current_month
+from app.utils.order_summaries import rebuild_order_summaries
+from app.utils.security import get_password_hash
+
+settings = get_settings()
+
+CHUNK = 50_000
+BENCH_PASSWORD = "benchpass123"
+HISTORY_DAYS = 730
+
+CATEGORIES = ["Rings", "Necklaces", "Earrings", "Bracelets", "Watches", "Bags", "Scarves", "Sunglasses"]
+ADJECTIVES = ["Aurora", "Celeste", "Eclipse", "Gilded", "Lumen", "Noir", "Opaline", "Radiant", "Solstice", "Velvet"]
+NOUNS = ["Band", "Charm", "Cuff", "Drop", "Halo", "Loop", "Pendant", "Signet", "Solitaire", "Tote"]
+MATERIALS = ["18k Gold", "Sterling Silver", "Platinum", "Rose Gold", "Leather", "Silk", "Diamond", "Pearl"]
+COLORS = [("Gold", "#D4AF37"), ("Silver", "#C0C0C0"), ("Rose", "#B76E79"), ("Black", "#111111"),
+          ("Ivory", "#FFFFF0"), ("Emerald", "#50C878"), ("Sapphire", "#0F52BA"), ("Ruby", "#E0115F")]
+COUNTRIES = ["India", "Italy", "France", "Switzerland"]
+CITIES = [("Mumbai", "Maharashtra"), ("Delhi", "Delhi"), ("Bengaluru", "Karnataka"), ("Chennai", "Tamil Nadu"),
+          ("Kolkata", "West Bengal"), ("Hyderabad", "Telangana"), ("Pune", "Maharashtra"), ("Jaipur", "Rajasthan")]
+STATUSES = ["pending", "processing", "shipped", "delivered", "cancelled"]
+STATUS_WEIGHTS = [0.05, 0.05, 0.10, 0.75, 0.05]
+
+TABLES = ["order_summaries", "order_items", "orders", "cart", "addresses", "users", "products"]
+
+
+def timestamps(rng, n: int, now: datetime):
+    """n timestamps spread over the last HISTORY_DAYS days."""
+    offsets = rng.uniform(0, HISTORY_DAYS * 86400, size=n)
+    return [now - timedelta(seconds=float(offset)) for offset in offsets]
+
+
+def color_pool(rng, size: int = 512):
+    """Pre-serialized colour lists, so rows only pick one."""
+    pool = []
+    for _ in range(size):
+        picks = rng.choice(len(COLORS), size=rng.integers(1, 4), replace=False)
+        pool.append(json.dumps([
+            {"name": COLORS[i][0], "hex": COLORS[i][1], "available": bool(rng.random() < 0.8)}
+            for i in sorted(picks)
+        ]))
+    return pool
+
+
+def product_prices(rng, count: int) -> np.ndarray:
+    """Log-normal prices around ₹5,000."""
+    return np.round(np.exp(rng.normal(8.5, 0.8, size=count)), 2).clip(199, 250000)
+
+
+def product_chunks(rng, count: int, prices: np.ndarray, now: datetime):
+    materials = [json.dumps(list(combo)) for k in (1, 2) for combo in combinations(MATERIALS, k)]
+    colors = color_pool(rng)
+    care = json.dumps(["Store in the provided pouch", "Avoid contact with perfume"])
+
+    for start in range(0, count, CHUNK):
+        n = min(CHUNK, count - start)
+        categories = rng.integers(0, len(CATEGORIES), size=n)
+        adjectives = rng.integers(0, len(ADJECTIVES), size=n)
+        nouns = rng.integers(0, len(NOUNS), size=n)
+        material_ids = rng.integers(0, len(materials), size=n)
+        color_ids = rng.integers(0, len(colors), size=n)
+        countries = rng.integers(0, len(COUNTRIES), size=n)
+        created = timestamps(rng, n, now)
+        yield [
+            (
+                f"BP{start + i + 1:07d}",
+                f"{ADJECTIVES[adjectives[i]]} {NOUNS[nouns[i]]} {start + i + 1}",
+                float(prices[start + i]),
+                CATEGORIES[categories[i]],
+                "Synthetic product for load testing",
+                materials[material_ids[i]],
+                care,
+                json.dumps([f"Reference BP{start + i + 1:07d}"]),
+                colors[color_ids[i]],
+                COUNTRIES[countries[i]],
+                created[i],
+            )
+            for i in range(n)
+        ]
+
+
+def user_chunks(rng, first_id: int, count: int, password_hash: str, now: datetime):
+    for start in range(0, count, CHUNK):
+        n = min(CHUNK, count - start)
+        created = timestamps(rng, n, now)
+        yield [
+            (first_id + start + i, f"bench{start + i + 1}@lumariya.test", password_hash,
+             f"Bench User {start + i + 1}", 0, created[i])
+            for i in range(n)
+        ]
+
+
+def address_chunks(rng, first_id: int, count: int):
+    """One default address per user, a second one for a fifth of them."""
+    for start in range(0, count, CHUNK):
+        n = min(CHUNK, count - start)
+        cities = rng.integers(0, len(CITIES), size=n)
+        second = rng.random(n) < 0.2
+        records = []
+        for i in range(n):
+            user_id = first_id + start + i
+            city, state = CITIES[cities[i]]
+            records.append((user_id, f"Bench User {start + i + 1}", f"{i % 500 + 1} Residency Road",
+                            city, state, f"{400001 + i % 90000}", "India", True))
+            if second[i]:
+                records.append((user_id, f"Bench User {start + i + 1}", f"{i % 300 + 1} Lake View",
+                                city, state, f"{500001 + i % 90000}", "India", False))
+        yield records
+
+
+def cart_chunks(rng, first_user_id: int, users: int, products: int):
+    """Open carts with 1-3 items for 30% of users."""
+    sizes = [None, "S", "M", "L"]
+    for start in range(0, users, CHUNK):
+        n = min(CHUNK, users - start)
+        has_cart = np.flatnonzero(rng.random(n) < 0.3)
+        counts = rng.integers(1, 4, size=len(has_cart))
+        owners = np.repeat(has_cart, counts)
+        product_ids = rng.integers(1, products + 1, size=len(owners))
+        quantities = rng.integers(1, 3, size=len(owners))
+        size_ids = rng.integers(0, len(sizes), size=len(owners))
+        # The cart holds one row per product and size of a user
+        lines = {
+            (first_user_id + start + int(owner), f"BP{product_id:07d}", sizes[size_id]): int(quantity)
+            for owner, product_id, quantity, size_id in zip(owners, product_ids, quantities, size_ids)
+        }
+        yield [(user_id, product_id, quantity, size, None) for (user_id, product_id, size), quantity in lines.items()]
+
+
+def order_chunks(rng, first_order_id: int, count: int, first_user_id: int, users: int,
+                 prices: np.ndarray, addresses, now: datetime):
+    """Yield (order records, order item records) with consistent totals."""
+    for start in range(0, count, CHUNK):
+        n = min(CHUNK, count - start)
+        items_per_order = rng.integers(1, 4, size=n)
+        order_index = np.repeat(np.arange(n), items_per_order)
+        product_index = rng.integers(0, len(prices), size=len(order_index))
+        quantities = rng.integers(1, 3, size=len(order_index))
+        line_prices = prices[product_index]
+        subtotals = np.bincount(order_index, weights=line_prices * quantities, minlength=n)
+        user_ids = rng.integers(first_user_id, first_user_id + users, size=n)
+        statuses = rng.choice(len(STATUSES), size=n, p=STATUS_WEIGHTS)
+        address_ids = rng.integers(0, len(addresses), size=n)
+        created = timestamps(rng, n, now)
+
+        orders = []
+        for i in range(n):
+            subtotal = round(float(subtotals[i]), 2)
+            tax = round(subtotal * 0.18, 2)
+            shipping = 0.0 if subtotal > 5000 else 200.0
+            orders.append((
+                first_order_id + start + i, int(user_ids[i]), STATUSES[statuses[i]],
+                round(subtotal + tax + shipping, 2), subtotal, tax, shipping,
+                addresses[address_ids[i]], created[i], created[i],
+            ))
+        items = [
+            (first_order_id + start + int(order), created[int(order)], f"BP{int(product) + 1:07d}",
+             int(quantity), float(price), None, f"Product BP{int(product) + 1:07d}")
+            for order, product, quantity, price in zip(order_index, product_index, quantities, line_prices)
+        ]
+        yield orders, items
+
+
+async def copy(conn, table: str, columns, records) -> None:
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(table, records=records, columns=columns)
+
+
+async def next_id(conn, table: str) -> int:
+    result = await conn.execute(text(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}"))
+    return result.scalar()
+
+
+async def generate(args):
+    if settings.environment == "production":
+        sys.exit("Refusing to generate synthetic data with ENVIRONMENT=production")
+
+    rng = np.random.default_rng(args.seed)
+    # Fixed reference time, so timestamps are reproducible too
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    engine = create_async_engine(settings.database_url)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        # Monthly order partitions covering the generated history
+        await ensure_partitions(conn, (now - timedelta(days=HISTORY_DAYS)).date(),
+                                add_months(current_month(), settings.order_partitions_ahead))
+        if args.truncate:
+            await conn.execute(text(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE"))
+            print("🗑️  Existing data truncated (rerun seed_admin.py for the admin account)")
+        else:
+            result = await conn.execute(text("SELECT 1 FROM products WHERE id = 'BP0000001'"))
+            if result.scalar():
+                sys.exit("Synthetic data already present; rerun with --truncate to regenerate it")
+
+    started = time.perf_counter()
+    password_hash = get_password_hash(BENCH_PASSWORD)
+    address_pool = [
+        json.dumps({"full_name": "Bench User", "address_line1": f"{i + 1} Residency Road",
+                    "city": city, "state": state, "zip_code": f"{400001 + i}", "country": "India"})
+        for i, (city, state) in enumerate(CITIES * 16)
+    ]
+
+    async with engine.begin() as conn:
+        await conn.execute(text("SET LOCAL synchronous_commit = off"))
+
+        prices = product_prices(rng, args.products)
+        for records in product_chunks(rng, args.products, prices, now):
+            await copy(conn, "products", ["id", "name", "price", "category", "description", "materials",
+                                          "care", "details", "colors", "made_in", "created_at"], records)
+        print(f"✅ {args.products:,} products ({time.perf_counter() - started:.0f}s)")
+
+        first_user = await next_id(conn, "users")
+        for records in user_chunks(rng, first_user, args.users, password_hash, now):
+            await copy(conn, "users", ["id", "email", "password_hash", "full_name", "is_admin", "created_at"], records)
+        for records in address_chunks(rng, first_user, args.users):
+            await copy(conn, "addresses", ["user_id", "full_name", "address_line1", "city", "state",
+                                           "zip_code", "country", "is_default"], records)
+        for records in cart_chunks(rng, first_user, args.users, args.products):
+            await copy(conn, "cart", ["user_id", "product_id", "quantity", "size", "color"], records)
+        print(f"✅ {args.users:,} users with addresses and carts ({time.perf_counter() - started:.0f}s)")
+
+        first_order = await next_id(conn, "orders")
+        loaded = 0
+        for orders, items in order_chunks(rng, first_order, args.orders, first_user, args.users,
+                                          prices, address_pool, now):
+            await copy(conn, "orders", ["id", "user_id", "status", "total", "subtotal", "tax", "shipping",
+                                        "shipping_address", "created_at", "updated_at"], orders)
+            await copy(conn, "order_items", ["order_id", "created_at", "product_id", "quantity", "price",
+                                             "color", "product_name"], items)
+            loaded += len(orders)
+            if loaded % 1_000_000 < CHUNK:
+                print(f"   {loaded:,} orders ({time.perf_counter() - started:.0f}s)")
+        print(f"✅ {args.orders:,} orders ({time.perf_counter() - started:.0f}s)")
+
+        await rebuild_order_summaries(conn)
+        print(f"✅ Order summaries built ({time.perf_counter() - started:.0f}s)")
+
+        # Explicit ids were used, so move the sequences past them
+        for table in ("users", "orders"):
+            await conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"
+            ))
+        await conn.execute(text(
+            "INSERT INTO catalog_version (id, version) VALUES (1, 1) "
+            "ON CONFLICT (id) DO UPDATE SET version = catalog_version.version + 1"
+        ))
+
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in TABLES:
+            await conn.execute(text(f"VACUUM ANALYZE {table}"))
+    print(f"✅ Tables analyzed ({time.perf_counter() - started:.0f}s)")
+    print("ℹ️  Run python migrate_sales_rollup.py, build_recommendations.py and refresh_popularity.py "
+          "to build the derived tables")
+
+    await engine.dispose()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bulk-load synthetic data with COPY")
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--orders", type=int, default=10_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--truncate", action="store_true",
+                        help="Empty the users, products, carts, addresses and orders tables first")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+    asyncio.run(generate(parse_args()))
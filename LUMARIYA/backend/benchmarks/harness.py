@@ -0,0 +1,261 @@
+"""
+Benchmark harness that drives the real API over HTTP.
+Runs each scenario (browse, search, add-to-cart, checkout, admin dashboard)
+for a fixed time with a fixed number of concurrent clients against a running
+server backed by a local Postgres loaded with benchmarks.generate_data.
+Reports throughput and p50/p95/p99 latency per scenario and writes them to a
+JSON file tagged with the git commit, so runs on different commits can be
+compared with --compare.
+
+Request parameters come from a seeded RNG, so every run issues the same
+request sequence per client. Checkout and add-to-cart write rows; regenerate
+the dataset when comparing runs that must start from identical data.
+
+Usage:
+    uvicorn app.main:app --workers 4 &
+    python -m benchmarks.harness [--base-url URL] [--duration S] [--concurrency N]
+                                 [--scenarios browse,search,...] [--compare results.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import get_settings
+from app.utils.auth import create_access_token
+
+settings = get_settings()
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+SORTS = ["price", "newest", "name", "popular"]
+COLORS = ["Gold", "Silver", "Rose", "Black", "Ivory", "Emerald", "Sapphire", "Ruby"]
+MATERIALS = ["18k Gold", "Sterling Silver", "Platinum", "Rose Gold", "Leather", "Silk", "Diamond", "Pearl"]
+
+
+def percentile(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def load_fixtures(sample: int) -> dict:
+    """Product ids, categories and user ids to build requests from, chosen deterministically."""
+    engine = create_async_engine(settings.database_url)
+    async with engine.connect() as conn:
+        result = await conn.execute(text("SELECT id FROM products ORDER BY md5(id) LIMIT :n"), {"n": sample})
+        products = [row[0] for row in result]
+        result = await conn.execute(text("SELECT DISTINCT category FROM products ORDER BY category"))
+        categories = [row[0] for row in result]
+        result = await conn.execute(
+            text("SELECT id FROM users WHERE is_admin = 0 ORDER BY md5(id::text) LIMIT :n"), {"n": sample}
+        )
+        users = [row[0] for row in result]
+        result = await conn.execute(text("SELECT id FROM users WHERE is_admin = 1 ORDER BY id LIMIT 1"))
+        admin = result.scalar()
+        result = await conn.execute(text(
+            "SELECT relname, reltuples::bigint FROM pg_class "
+            "WHERE relname IN ('products', 'users', 'orders', 'order_items', 'cart', 'addresses')"
+        ))
+        dataset = dict(result.all())
+    await engine.dispose()
+
+    if not products or not users:
+        raise SystemExit("No products or users found; run python -m benchmarks.generate_data first")
+    # Tokens are minted directly so login rate limits do not get in the way
+    return {
+        "products": products,
+        "categories": categories,
+        "user_tokens": [create_access_token({"sub": user_id}) for user_id in users],
+        "admin_token": create_access_token({"sub": admin}) if admin else None,
+        "dataset": dataset,
+    }
+
+
+def auth(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def browse(rng: random.Random, fx: dict):
+    params = {"category": rng.choice(fx["categories"]), "sort": rng.choice(SORTS),
+              "skip": rng.randrange(0, 200), "limit": 24}
+    if rng.random() < 0.3:
+        return "GET", f"/api/products/{rng.choice(fx['products'])}", {}
+    return "GET", "/api/products/", {"params": params}
+
+
+def search(rng: random.Random, fx: dict):
+    low = rng.choice([500, 1000, 2500, 5000])
+    params = {"min_price": low, "max_price": low * rng.choice([2, 4, 10]), "limit": 24}
+    if rng.random() < 0.5:
+        params["color"] = rng.choice(COLORS)
+    else:
+        params["material"] = rng.choice(MATERIALS)
+    if rng.random() < 0.5:
+        params["category"] = rng.choice(fx["categories"])
+    if rng.random() < 0.2:
+        facet_params = {"category": params["category"]} if "category" in params else {}
+        return "GET", "/api/products/facets", {"params": facet_params}
+    return "GET", "/api/products/", {"params": params}
+
+
+def add_to_cart(rng: random.Random, fx: dict):
+    body = {"product_id": rng.choice(fx["products"]), "quantity": rng.randint(1, 2),
+            "size": rng.choice([None, "S", "M", "L"])}
+    return "POST", "/api/cart/items", {"json": body, "headers": auth(rng.choice(fx["user_tokens"]))}
+
+
+def checkout(rng: random.Random, fx: dict):
+    items = [{"product_id": product_id, "quantity": rng.randint(1, 2)}
+             for product_id in rng.sample(fx["products"], rng.randint(1, 3))]
+    body = {"items": items, "shipping_address": {"city": "Mumbai", "country": "India"}}
+    return "POST", "/api/orders/", {"json": body, "headers": auth(rng.choice(fx["user_tokens"]))}
+
+
+def admin_dashboard(rng: random.Random, fx: dict):
+    path = rng.choice(["/api/admin/stats", "/api/admin/analytics"])
+    return "GET", path, {"headers": auth(fx["admin_token"])}
+
+
+SCENARIOS = {
+    "browse": browse,
+    "search": search,
+    "add_to_cart": add_to_cart,
+    "checkout": checkout,
+    "admin_dashboard": admin_dashboard,
+}
+
+
+async def run_scenario(client: httpx.AsyncClient, name: str, fx: dict, args) -> dict:
+    """Closed-loop run: each client sends its next request as soon as the last one returns."""
+    build = SCENARIOS[name]
+    latencies = []
+    statuses = Counter()
+
+    async def worker(index: int, deadline: float, record: bool):
+        rng = random.Random(f"{args.seed}-{name}-{index}")
+        while time.perf_counter() < deadline:
+            method, path, kwargs = build(rng, fx)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            if record:
+                statuses[status] += 1
+                if isinstance(status, int) and status < 400:
+                    latencies.append(time.perf_counter() - started)
+
+    # Warm caches and connection pools before measuring
+    deadline = time.perf_counter() + args.warmup
+    await asyncio.gather(*(worker(i, deadline, False) for i in range(args.concurrency)))
+
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(worker(i, deadline, True) for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    errors = sum(count for status, count in statuses.items() if not isinstance(status, int) or status >= 400)
+    return {
+        "requests": sum(statuses.values()),
+        "errors": errors,
+        "throughput": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+    }
+
+
+def git_revision() -> dict:
+    def git(*cmd):
+        try:
+            return subprocess.run(["git", *cmd], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+    return {"commit": git("rev-parse", "--short", "HEAD") or "unknown",
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def report(results: dict, baseline: dict = None) -> None:
+    print(f"\n  {'scenario':<16} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for name, stats in results["scenarios"].items():
+        print(f"  {name:<16} {stats['throughput']:8.1f} {stats['p50_ms']:8.1f} "
+              f"{stats['p95_ms']:8.1f} {stats['p99_ms']:8.1f} {stats['errors']:7d}")
+        old = (baseline or {}).get("scenarios", {}).get(name)
+        if old:
+            deltas = [
+                f"{key} {(stats[key] - old[key]) / old[key] * 100:+.1f}%"
+                for key in ("throughput", "p50_ms", "p95_ms", "p99_ms")
+                if old.get(key)
+            ]
+            print(f"  {'':<16} vs {baseline['commit']}: {', '.join(deltas)}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Drive the API and report latency per scenario")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sample", type=int, default=2000, help="Products and users to draw requests from")
+    parser.add_argument("--output", help="Results file (default benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    fx = await load_fixtures(args.sample)
+    if "admin_dashboard" in names and fx["admin_token"] is None:
+        raise SystemExit("admin_dashboard needs an admin user; run python seed_admin.py")
+
+    revision = git_revision()
+    print(f"Benchmarking {args.base_url} at {revision['commit']}{' (dirty)' if revision['dirty'] else ''}: "
+          f"{args.concurrency} clients, {args.duration:.0f}s per scenario")
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {
+        **revision,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {key: getattr(args, key) for key in ("base_url", "duration", "warmup", "concurrency", "seed")},
+        "dataset": fx["dataset"],
+        "scenarios": {},
+    }
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30.0) as client:
+        for name in names:
+            results["scenarios"][name] = await run_scenario(client, name, fx, args)
+            print(f"  {name} done")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    report(results, baseline)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{revision['commit']}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
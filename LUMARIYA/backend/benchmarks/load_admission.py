@@ -0,0 +1,115 @@
+"""
+Overload model of admission control.
+This does not run the LUMARIYA app or touch a database: it drives a stand-in
+ASGI app whose handlers hold one of a fixed number of simulated "DB
+connections" (a semaphore) for a fixed service time, at several times the load
+it can serve, with and without the real AdmissionMiddleware. Reports latency
+percentiles of successful requests per route group, and how many were shed
+with 503. The numbers show how the admission policy behaves against that
+model, not how the API performs; for that, run benchmarks.harness against a
+server started with ADMISSION_ENABLED=true and then false.
+
+Usage: python -m benchmarks.load_admission [overload_factor] [seconds]
+"""
+import asyncio
+import random
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+from app.utils.admission import AdmissionController, AdmissionMiddleware, default_route_groups
+
+POOL_SIZE = 15
+SERVICE_TIME = 0.02  # Seconds a request holds a connection
+POOL_TIMEOUT = 30.0  # SQLAlchemy's default pool checkout timeout
+
+# Traffic mix: mostly browsing, a little checkout
+MIX = [("GET", "/api/products/", 0.70), ("POST", "/api/cart/items", 0.15),
+       ("POST", "/api/orders/", 0.10), ("GET", "/api/admin/stats", 0.05)]
+
+
+def make_app():
+    """ASGI app whose every request checks out a pooled connection."""
+    pool = asyncio.Semaphore(POOL_SIZE)
+
+    async def app(scope, receive, send):
+        try:
+            await asyncio.wait_for(pool.acquire(), timeout=POOL_TIMEOUT)
+        except asyncio.TimeoutError:
+            await send({"type": "http.response.start", "status": 500, "headers": []})
+            await send({"type": "http.response.body", "body": b"pool timeout"})
+            return
+        try:
+            await asyncio.sleep(SERVICE_TIME)
+        finally:
+            pool.release()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    return app
+
+
+def percentile(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def drive(app, rate: float, seconds: float):
+    """Open-loop load: start requests at `rate`/s regardless of completions."""
+    latencies = defaultdict(list)
+    rejected = defaultdict(int)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(method, path):
+            started = time.perf_counter()
+            response = await client.request(method, path)
+            if response.status_code == 200:
+                latencies[path].append(time.perf_counter() - started)
+            else:
+                rejected[path] += 1
+
+        tasks = []
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            method, path = random.choices([m[:2] for m in MIX], weights=[m[2] for m in MIX])[0]
+            tasks.append(asyncio.create_task(one(method, path)))
+            await asyncio.sleep(random.expovariate(rate))
+        await asyncio.gather(*tasks)
+
+    return latencies, rejected
+
+
+def report(label, latencies, rejected):
+    print(f"\n{label}")
+    print(f"  {'route':<18} {'ok':>6} {'503':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for _, path, _ in MIX:
+        values = latencies[path]
+        print(f"  {path:<18} {len(values):>6} {rejected[path]:>6} "
+              f"{percentile(values, 0.50) * 1000:8.1f} {percentile(values, 0.95) * 1000:8.1f} "
+              f"{percentile(values, 0.99) * 1000:8.1f}")
+
+
+async def main():
+    overload = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    capacity_rps = POOL_SIZE / SERVICE_TIME
+    rate = capacity_rps * overload
+    print(f"Simulated app ({POOL_SIZE} connections, {SERVICE_TIME * 1000:.0f}ms per request), not the real API")
+    print(f"Capacity ~{capacity_rps:.0f} req/s, offering {rate:.0f} req/s for {seconds:.0f}s")
+
+    random.seed(1)
+    report("Without admission control (simulated app)", *await drive(make_app(), rate, seconds))
+
+    random.seed(1)
+    controller = AdmissionController(POOL_SIZE, default_route_groups(POOL_SIZE))
+    app = AdmissionMiddleware(make_app(), controller=controller)
+    report("With admission control (simulated app)", *await drive(app, rate, seconds))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,49 @@
+"""
+Batch job that updates "frequently bought together" recommendations.
+Only order lines placed since the previous run are read, so it is cheap to
+run on a schedule (e.g. every few minutes from cron).
+
+Usage: python build_recommendations.py
+"""
+import asyncio
+import time
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+
+from app.config import get_settings
+from app.database import Base
+from app.utils.recommendations import refresh_recommendations
+
+settings = get_settings()
+
+
+async def build():
+    """Fold new order lines into the recommendation tables."""
+    engine = create_async_engine(settings.database_url)
+    
+    # Make sure the recommendation tables exist
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    
+    async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    
+    async with async_session() as session:
+        started = time.perf_counter()
+        summary = await refresh_recommendations(session)
+        await session.commit()
+        elapsed = time.perf_counter() - started
+    
+    print(f"✅ Processed {summary['order_lines']} order lines up to order {summary['last_order_id']}")
+    print(f"   Co-purchase pairs updated: {summary['pairs']}")
+    print(f"   Products re-ranked: {summary['products_updated']}")
+    print(f"   Took {elapsed:.2f}s")
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    
+    print("🔧 Building recommendations...")
+    asyncio.run(build())
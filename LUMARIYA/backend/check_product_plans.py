@@ -0,0 +1,166 @@
+"""
+Query-plan check for product listing filters.
+EXPLAINs every combination of list_products filters and sort options with
+the default planner settings and fails unless each one uses an index that
+serves one of its filters or its sort.
+
+Run it against a representative catalog (e.g. one loaded with
+benchmarks/generate_data.py); on a handful of rows a sequential scan is
+the right plan and the check is meaningless.
+
+Usage: python check_product_plans.py
+"""
+import asyncio
+import itertools
+import sys
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy import text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.config import get_settings
+from app.routers.products import build_product_query, SORT_OPTIONS
+
+settings = get_settings()
+
+# Fewer products than this are not representative of production plans
+MIN_PRODUCTS = 10000
+
+# Indexes that serve each filter and sort option; sort options missing here
+# are reported as unchecked
+FILTER_INDEXES = {
+    "category": {"ix_products_category", "ix_products_category_price"},
+    "min_price": {"ix_products_price", "ix_products_category_price"},
+    "max_price": {"ix_products_price", "ix_products_category_price"},
+    "color": {"ix_products_colors"},
+    "material": {"ix_products_materials"},
+    "in_stock_color": {"ix_products_colors"},
+}
+SORT_INDEXES = {
+    "price": {"ix_products_price", "ix_products_category_price"},
+    "newest": {"ix_products_created_at"},
+    "name": {"ix_products_name"},
+    "popular": {"ix_product_popularity_log_score"},
+}
+
+# Selective sample values, taken from the catalog so the planner has a
+# reason to prefer an index: the rarest category, material and colour and a
+# narrow price band
+SAMPLE_QUERIES = {
+    "category": "SELECT category FROM products GROUP BY category ORDER BY count(*) LIMIT 1",
+    "material": (
+        "SELECT m FROM products, jsonb_array_elements_text(materials) AS m "
+        "GROUP BY m ORDER BY count(*) LIMIT 1"
+    ),
+    "color": (
+        "SELECT c->>'name' FROM products, jsonb_array_elements(colors) AS c "
+        "GROUP BY 1 ORDER BY count(*) LIMIT 1"
+    ),
+    "min_price": "SELECT percentile_disc(0.500) WITHIN GROUP (ORDER BY price) FROM products",
+    "max_price": "SELECT percentile_disc(0.505) WITHIN GROUP (ORDER BY price) FROM products",
+}
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) wrapper that keeps the statement's bound parameters."""
+    
+    inherit_cache = False
+    
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def plan_nodes(node: dict):
+    """Yield a plan node and all the nodes below it."""
+    yield node
+    for child in node.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+def expected_indexes(filters: dict, sort) -> set:
+    """Indexes any of which may serve the combination."""
+    indexes = set()
+    for name in filters:
+        indexes |= FILTER_INDEXES[name]
+    if sort:
+        indexes |= SORT_INDEXES[sort]
+    return indexes
+
+
+def filter_combinations(values: dict):
+    """Yield every subset of filters paired with every sort option.
+    
+    The unfiltered, unsorted listing is skipped: reading the first rows of
+    the table is its best plan.
+    """
+    names = list(values)
+    for size in range(len(names) + 1):
+        for subset in itertools.combinations(names, size):
+            for sort in [None, *SORT_INDEXES]:
+                if subset or sort:
+                    yield {name: values[name] for name in subset}, sort
+
+
+async def sample_values(conn) -> dict:
+    values = {}
+    for name, query in SAMPLE_QUERIES.items():
+        result = await conn.execute(text(query))
+        values[name] = result.scalar()
+    values["in_stock_color"] = values["color"]
+    return values
+
+
+async def check_plans() -> int:
+    """EXPLAIN each combination and return the number that use none of their indexes."""
+    engine = create_async_engine(settings.database_url)
+    failures = 0
+    checked = 0
+    
+    async with engine.connect() as conn:
+        result = await conn.execute(text("SELECT count(*) FROM products"))
+        products = result.scalar()
+        if products < MIN_PRODUCTS:
+            print(f"❌ Only {products} products; load at least {MIN_PRODUCTS} "
+                  f"(benchmarks/generate_data.py) so plans are representative")
+            await engine.dispose()
+            return 1
+        
+        await conn.execute(text("ANALYZE products"))
+        values = await sample_values(conn)
+        print(f"Sample filter values: {values}")
+        unchecked = sorted(set(SORT_OPTIONS) - set(SORT_INDEXES))
+        if unchecked:
+            print(f"⚠️  No expected index for sort options {unchecked}; not checked")
+        
+        for filters, sort in filter_combinations(values):
+            query = build_product_query(**filters, sort=sort).limit(100)
+            result = await conn.execute(Explain(query))
+            plan = result.scalar()[0]["Plan"]
+            checked += 1
+            
+            used = {node["Index Name"] for node in plan_nodes(plan) if "Index Name" in node}
+            seq_scan = any(
+                node["Node Type"] == "Seq Scan" and node.get("Relation Name") == "products"
+                for node in plan_nodes(plan)
+            )
+            expected = expected_indexes(filters, sort)
+            if seq_scan or not used & expected:
+                failures += 1
+                print(f"❌ filters={sorted(filters)} sort={sort} used {sorted(used) or 'no index'}, "
+                      f"expected one of {sorted(expected)}")
+    
+    await engine.dispose()
+    print(f"Checked {checked} filter combinations, {failures} without a matching index")
+    return failures
+
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    
+    sys.exit(1 if asyncio.run(check_plans()) else 0)
@@ -0,0 +1,69 @@
+"""
+Upsert products from a supplier feed (CSV or NDJSON).
+Rows are validated with the product schema and merged in batches through a
+COPY staging table, so large feeds load in minutes with flat memory use.
+Re-importing a feed only touches products that changed.
+
+CSV files need a header row with product columns (id, name, price, category,
+...); list columns hold a JSON array or "|"-separated values.
+
+Usage: python import_products.py FILE [--batch-size N] [--errors errors.ndjson]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import get_settings
+from app.utils.product_import import ProductImport, detect_format
+
+settings = get_settings()
+
+
+async def import_feed(path: str, batch_size: int, errors_path: str):
+    """Import the feed at path and report progress per batch."""
+    engine = create_async_engine(settings.database_url)
+    started = time.perf_counter()
+    
+    def progress(summary: dict):
+        elapsed = time.perf_counter() - started
+        print(f"   {summary['rows']:,} rows ({summary['rows'] / elapsed:,.0f}/s): "
+              f"{summary['inserted']:,} inserted, {summary['updated']:,} updated, {summary['failed']:,} failed")
+    
+    # Row errors are written as they are found, so memory stays flat however many fail
+    with open(path, encoding="utf-8-sig", newline="") as stream, \
+            open(errors_path, "w", encoding="utf-8") as errors:
+        def record_error(error: dict):
+            errors.write(json.dumps(error) + "\n")
+        
+        product_import = ProductImport(stream, detect_format(path), batch_size, max_errors=0,
+                                       on_error=record_error)
+        async with engine.connect() as conn:
+            summary = await product_import.run(conn, on_progress=progress)
+    
+    await engine.dispose()
+    
+    print(f"✅ Imported {summary['rows']:,} rows in {time.perf_counter() - started:.1f}s")
+    print(f"   Inserted: {summary['inserted']:,}, updated: {summary['updated']:,}, "
+          f"unchanged: {summary['unchanged']:,}, duplicate ids: {summary['duplicates']:,}")
+    if summary["failed"]:
+        print(f"⚠️  {summary['failed']:,} rows failed validation, see {errors_path}")
+    else:
+        os.remove(errors_path)
+
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    
+    parser = argparse.ArgumentParser(description="Upsert products from a CSV or NDJSON feed")
+    parser.add_argument("file")
+    parser.add_argument("--batch-size", type=int, default=settings.product_import_batch_size)
+    parser.add_argument("--errors", default="import_errors.ndjson", help="Where to write row errors")
+    args = parser.parse_args()
+    
+    print(f"🔧 Importing products from {args.file}...")
+    asyncio.run(import_feed(args.file, args.batch_size, args.errors))
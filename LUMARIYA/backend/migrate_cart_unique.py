@@ -0,0 +1,52 @@
+"""
+Merge duplicate cart rows (same user, product, size and color) and add the
+unique index that guest cart merging relies on.
+Run this script to migrate existing database.
+"""
+import asyncio
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy import text
+from app.config import get_settings
+
+settings = get_settings()
+
+
+async def migrate():
+    """Fold duplicate cart rows into one and create the unique index."""
+    engine = create_async_engine(settings.database_url, echo=True)
+    
+    async with engine.begin() as conn:
+        # Keep the oldest row of each line with the summed quantity
+        result = await conn.execute(text("""
+            WITH lines AS (
+                SELECT min(id) AS keep_id, sum(quantity) AS quantity, array_agg(id) AS ids
+                FROM cart
+                GROUP BY user_id, product_id, coalesce(size, ''), coalesce(color, '')
+                HAVING count(*) > 1
+            ), kept AS (
+                UPDATE cart SET quantity = lines.quantity
+                FROM lines WHERE cart.id = lines.keep_id
+                RETURNING cart.id
+            )
+            DELETE FROM cart USING lines
+            WHERE cart.id = ANY(lines.ids) AND cart.id <> lines.keep_id
+        """))
+        print(f"✅ {result.rowcount} duplicate cart rows merged!")
+        
+        await conn.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ux_cart_user_product_options "
+            "ON cart (user_id, product_id, coalesce(size, ''), coalesce(color, ''))"
+        ))
+        print("✅ Unique cart line index created!")
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    
+    print("🔧 Migrating database...")
+    asyncio.run(migrate())
+    print("✅ Migration complete!")
@@ -0,0 +1,49 @@
+"""
+Create the order_summaries read model used by the order list endpoints and
+fill it from the existing orders. Re-running it rebuilds the list indexes.
+Run this script to migrate existing database.
+"""
+import asyncio
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy import text
+from app.config import get_settings
+from app.database import Base
+from app.models.order import OrderSummary
+from app.utils.order_summaries import rebuild_order_summaries
+
+settings = get_settings()
+
+
+async def migrate():
+    """Create the order_summaries table and backfill it."""
+    engine = create_async_engine(settings.database_url, echo=True)
+    
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        print("✅ order_summaries table created!")
+        
+        # Tables created before the list cursor included order_id have
+        # indexes on created_at alone
+        for index in OrderSummary.__table__.indexes:
+            await conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+            await conn.run_sync(index.create)
+        print("✅ order_summaries list indexes rebuilt!")
+        
+        written = await rebuild_order_summaries(conn)
+        print(f"✅ {written} order summaries written!")
+    
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("ANALYZE order_summaries"))
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    
+    print("🔧 Migrating database...")
+    asyncio.run(migrate())
+    print("✅ Migration complete!")
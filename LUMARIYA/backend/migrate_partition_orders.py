@@ -0,0 +1,102 @@
+"""
+Convert orders and order_items to tables range-partitioned by month on
+created_at, copying the existing rows into monthly partitions.
+Run this script to migrate existing database. Stop the API and the outbox
+worker first; the tables are locked while the rows are copied.
+"""
+import asyncio
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy import text
+from app.config import get_settings
+from app.database import Base
+from app.utils.partitions import ensure_partitions, add_months, current_month
+
+settings = get_settings()
+
+
+async def copied_columns(conn, table: str) -> list:
+    """Columns of the renamed table that the partitioned one also has.
+    
+    Read from the database rather than listed here, so columns added by
+    later migrations (e.g. orders.discount) are copied too.
+    """
+    result = await conn.execute(text(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = :table ORDER BY ordinal_position"
+    ), {"table": f"{table}_unpartitioned"})
+    new_columns = Base.metadata.tables[table].c
+    return [column for column in result.scalars() if column in new_columns]
+
+
+async def migrate():
+    """Move the plain order tables aside, create the partitioned ones and copy the rows."""
+    engine = create_async_engine(settings.database_url, echo=True)
+    
+    async with engine.begin() as conn:
+        result = await conn.execute(text("SELECT relkind FROM pg_class WHERE relname = 'orders'"))
+        if result.scalar() == "p":
+            print("ℹ️  orders is already partitioned")
+            await engine.dispose()
+            return
+        
+        # Free the table, index and sequence names for the new tables
+        for table in ("order_items", "orders"):
+            old = f"{table}_unpartitioned"
+            await conn.execute(text(f"ALTER TABLE {table} RENAME TO {old}"))
+            await conn.execute(text(f"ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey"))
+            await conn.execute(text(f"ALTER SEQUENCE {table}_id_seq RENAME TO {old}_id_seq"))
+            result = await conn.execute(text(
+                "SELECT indexname FROM pg_indexes WHERE tablename = :table AND indexname LIKE 'ix_%'"
+            ), {"table": old})
+            for index in result.scalars().all():
+                await conn.execute(text(f"DROP INDEX {index}"))
+        print("✅ Existing order tables renamed!")
+        
+        await conn.run_sync(Base.metadata.create_all)
+        
+        result = await conn.execute(text("SELECT MIN(created_at) FROM orders_unpartitioned"))
+        first = result.scalar()
+        last_month = add_months(current_month(), settings.order_partitions_ahead)
+        first_month = min(first.date(), last_month) if first else current_month()
+        created = await ensure_partitions(conn, first_month, last_month)
+        print(f"✅ {len(created)} monthly partitions created!")
+        
+        order_columns = await copied_columns(conn, "orders")
+        selected = ["COALESCE(created_at, now())" if column == "created_at" else column for column in order_columns]
+        await conn.execute(text(
+            f"INSERT INTO orders ({', '.join(order_columns)}) "
+            f"SELECT {', '.join(selected)} FROM orders_unpartitioned"
+        ))
+        # Items take their order's created_at, which puts them in the same month
+        item_columns = [column for column in await copied_columns(conn, "order_items") if column != "created_at"]
+        await conn.execute(text(
+            f"INSERT INTO order_items ({', '.join(item_columns)}, created_at) "
+            f"SELECT {', '.join('i.' + column for column in item_columns)}, o.created_at "
+            f"FROM order_items_unpartitioned i JOIN orders o ON o.id = i.order_id"
+        ))
+        for table in ("orders", "order_items"):
+            await conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT COALESCE(MAX(id), 0) + 1 FROM {table}), false)"
+            ))
+        print("✅ Orders copied into the partitions!")
+        
+        await conn.execute(text("DROP TABLE order_items_unpartitioned, orders_unpartitioned"))
+        print("✅ Old order tables dropped!")
+    
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in ("orders", "order_items"):
+            await conn.execute(text(f"ANALYZE {table}"))
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    
+    print("🔧 Migrating database...")
+    asyncio.run(migrate())
+    print("✅ Migration complete!")
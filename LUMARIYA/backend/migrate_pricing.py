@@ -0,0 +1,54 @@
+"""
+Create the pricing_rules table, add the cart version and order discount
+columns, and seed the tax and shipping rules checkout used to hardcode.
+Run this script to migrate existing database.
+"""
+import asyncio
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy import text, select, func
+from app.config import get_settings
+from app.database import Base
+from app.models.pricing import PricingRule
+from app.utils.catalog import bump_catalog_version
+
+settings = get_settings()
+
+
+async def migrate():
+    """Create the pricing tables and columns and seed the default rules."""
+    engine = create_async_engine(settings.database_url, echo=True)
+    
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        print("✅ pricing_rules table created!")
+        
+        await conn.execute(text(
+            "ALTER TABLE users ADD COLUMN IF NOT EXISTS cart_version INTEGER NOT NULL DEFAULT 0"
+        ))
+        await conn.execute(text(
+            "ALTER TABLE orders ADD COLUMN IF NOT EXISTS discount DOUBLE PRECISION NOT NULL DEFAULT 0"
+        ))
+        print("✅ users.cart_version and orders.discount columns added!")
+        
+        result = await conn.execute(select(func.count()).select_from(PricingRule))
+        if result.scalar() == 0:
+            await conn.execute(PricingRule.__table__.insert(), [
+                {"kind": "tax", "name": "GST", "percent": settings.default_tax_percent,
+                 "priority": 0, "active": True},
+                {"kind": "shipping", "name": "Standard shipping", "amount": settings.default_shipping_fee,
+                 "min_subtotal": settings.free_shipping_over, "priority": 0, "active": True},
+            ])
+            await bump_catalog_version(conn)
+            print("✅ Default tax and shipping rules seeded!")
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    
+    print("🔧 Migrating database...")
+    asyncio.run(migrate())
+    print("✅ Migration complete!")
@@ -0,0 +1,65 @@
+"""
+Convert product materials/colors/details columns to JSONB and add the
+indexes used by product filtering and sorting.
+Run this script to migrate existing database.
+"""
+import asyncio
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy import text
+from app.config import get_settings
+
+settings = get_settings()
+
+JSONB_COLUMNS = ["materials", "colors", "details"]
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_products_materials ON products USING gin (materials jsonb_path_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_products_colors ON products USING gin (colors jsonb_path_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_products_details ON products USING gin (details jsonb_path_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_products_price ON products (price, id)",
+    "CREATE INDEX IF NOT EXISTS ix_products_category_price ON products (category, price)",
+    "CREATE INDEX IF NOT EXISTS ix_products_created_at ON products (created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_products_name ON products (name)",
+]
+
+
+async def migrate():
+    """Convert JSON columns to JSONB and create product indexes."""
+    engine = create_async_engine(settings.database_url, echo=True)
+    
+    async with engine.begin() as conn:
+        for column in JSONB_COLUMNS:
+            # Check current column type
+            check_query = text("""
+                SELECT data_type
+                FROM information_schema.columns
+                WHERE table_name='products' AND column_name=:column;
+            """)
+            result = await conn.execute(check_query, {"column": column})
+            data_type = result.scalar_one_or_none()
+            
+            if data_type == "jsonb":
+                print(f"✅ Column '{column}' is already JSONB!")
+            else:
+                await conn.execute(text(
+                    f"ALTER TABLE products ALTER COLUMN {column} TYPE JSONB USING {column}::jsonb"
+                ))
+                print(f"✅ Column '{column}' converted to JSONB!")
+        
+        for index_query in INDEXES:
+            await conn.execute(text(index_query))
+        print("✅ Product indexes created!")
+        
+        await conn.execute(text("ANALYZE products"))
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    
+    print("🔧 Migrating database...")
+    asyncio.run(migrate())
+    print("✅ Migration complete!")
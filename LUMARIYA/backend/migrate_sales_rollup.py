@@ -0,0 +1,43 @@
+"""
+Add the order timestamp indexes used by the sales rollup refresh and build
+the rollup for all existing orders.
+Run this script to migrate existing database.
+"""
+import asyncio
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy import text
+from app.config import get_settings
+from app.database import Base
+from app.utils.analytics import refresh_sales_rollup
+
+settings = get_settings()
+
+
+async def migrate():
+    """Create order indexes and the sales rollup tables, then backfill."""
+    engine = create_async_engine(settings.database_url, echo=True)
+    
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_orders_created_at ON orders (created_at)"))
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_orders_updated_at ON orders (updated_at)"))
+        print("✅ Order timestamp indexes created!")
+        
+        await conn.run_sync(Base.metadata.create_all)
+    
+    async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with async_session() as session:
+        await refresh_sales_rollup(session, full=True)
+        await session.commit()
+    print("✅ Sales rollup backfilled!")
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    
+    print("🔧 Migrating database...")
+    asyncio.run(migrate())
+    print("✅ Migration complete!")
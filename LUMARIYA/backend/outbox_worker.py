@@ -0,0 +1,59 @@
+"""
+Worker process that delivers order side effects (confirmation emails,
+warehouse notifications, analytics) from the transactional outbox.
+Run one or more alongside the API; workers claim disjoint batches, so they
+can be scaled out freely. Pass --once to dispatch everything that is due
+and exit, e.g. when trying handlers locally.
+
+Usage: python outbox_worker.py [--once]
+"""
+import asyncio
+import logging
+import signal
+import sys
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+
+from app.config import get_settings
+from app.database import Base
+from app.utils.outbox import OutboxWorker
+import app.utils.order_events  # noqa: F401  (registers the order handlers)
+
+settings = get_settings()
+
+
+async def run(once: bool):
+    """Dispatch outbox events until interrupted (or once with --once)."""
+    engine = create_async_engine(settings.database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    
+    worker = OutboxWorker(
+        async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False),
+        batch_size=settings.outbox_batch_size,
+        lease_seconds=settings.outbox_lease_seconds,
+        max_attempts=settings.outbox_max_attempts,
+        poll_interval=settings.outbox_poll_interval_seconds,
+    )
+    
+    if once:
+        dispatched = await worker.drain()
+        print(f"✅ Dispatched {dispatched} outbox events")
+    else:
+        if sys.platform != 'win32':
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sig, worker.stop)
+        print("✅ Outbox worker running (Ctrl+C to stop)")
+        await worker.run()
+        print("✅ Outbox worker stopped")
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    print("🔧 Starting outbox worker...")
+    asyncio.run(run(once="--once" in sys.argv[1:]))
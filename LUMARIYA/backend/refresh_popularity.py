@@ -0,0 +1,42 @@
+"""
+Periodic job that folds buffered product views into decayed popularity
+scores used by `GET /api/products?sort=popular`.
+The API runs it every POPULARITY_REFRESH_INTERVAL_SECONDS; use this script
+for a one-off refresh (e.g. after loading views in bulk).
+
+Usage: python refresh_popularity.py
+"""
+import asyncio
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+
+from app.config import get_settings
+from app.utils.popularity import refresh_popularity
+
+settings = get_settings()
+
+
+async def refresh():
+    """Update popularity scores from new product views."""
+    engine = create_async_engine(settings.database_url)
+    async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    
+    async with async_session() as session:
+        summary = await refresh_popularity(session)
+        await session.commit()
+    
+    if summary.get("skipped"):
+        print("ℹ️  Another refresh is running; nothing done")
+    else:
+        print(f"✅ Folded {summary['views']} views up to view {summary['last_view_id']}")
+        print(f"   Products re-scored: {summary['products_updated']}")
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    
+    print("🔧 Refreshing product popularity...")
+    asyncio.run(refresh())
@@ -0,0 +1,72 @@
+from app.database import engine
+from app.utils.admission import admission
+from tests.conftest import register
+
+
+def run_batch(client, requests, headers=None):
+    response = client.post("/api/batch", json={"requests": requests}, headers=headers)
+    assert response.status_code == 200, response.text
+    return [entry["status"] for entry in response.json()["responses"]]
+
+
+def test_sub_requests_are_rate_limited(client):
+    register(client, "batch-limited@example.com")
+    login = {"method": "POST", "path": "/api/auth/login",
+             "body": {"email": "batch-limited@example.com", "password": "wrong-password"}}
+    
+    statuses = run_batch(client, [dict(login, id=str(n)) for n in range(7)])
+    
+    assert statuses == [401] * 5 + [429] * 2
+
+
+def test_sub_requests_are_admitted_in_their_route_group(client, monkeypatch):
+    headers = register(client, "batch-admitted@example.com")
+    cart = admission.groups["cart"]
+    # No cart slot free and no room to queue for one
+    monkeypatch.setattr(cart, "limit", 0)
+    monkeypatch.setattr(cart, "max_queue", 0)
+    rejected = admission.rejected["cart"]
+    
+    statuses = run_batch(client, [
+        {"id": "cart", "method": "GET", "path": "/api/cart/"},
+        {"id": "profile", "method": "GET", "path": "/api/users/profile"},
+    ], headers)
+    
+    assert statuses == [503, 200]
+    assert admission.rejected["cart"] == rejected + 1
+
+
+def test_cookies_set_by_a_sub_request_reach_the_next_ones(client):
+    client.cookies.clear()
+    client.post("/api/products/", json={"id": "BATCH-RING-1", "name": "Batch Ring", "price": 700.0, "category": "Rings"})
+    add = {"method": "POST", "path": "/api/cart/guest/items", "body": {"product_id": "BATCH-RING-1", "quantity": 1}}
+    
+    response = client.post("/api/batch", json={"requests": [
+        dict(add, id="first"),
+        dict(add, id="second"),
+        {"id": "cart", "method": "GET", "path": "/api/cart/guest"},
+    ]})
+    
+    assert response.status_code == 200, response.text
+    cart = response.json()["responses"][2]["body"]
+    assert sum(item["quantity"] for item in cart) == 2
+    client.cookies.clear()
+
+
+def test_no_connection_is_held_while_sub_requests_wait_for_admission(client, monkeypatch):
+    headers = register(client, "batch-pool@example.com")
+    checked_out = []
+    acquire = admission.acquire
+    
+    async def recording_acquire(group_name):
+        checked_out.append(engine.pool.checkedout())
+        return await acquire(group_name)
+    
+    monkeypatch.setattr(admission, "acquire", recording_acquire)
+    statuses = run_batch(client, [
+        {"id": "profile", "method": "GET", "path": "/api/users/profile"},
+        {"id": "cart", "method": "GET", "path": "/api/cart/"},
+    ], headers)
+    
+    assert statuses == [200, 200]
+    assert checked_out == [0, 0, 0]
@@ -0,0 +1,51 @@
+import pytest
+
+from tests.conftest import register
+
+PRODUCT = {"id": "CART-RING-1", "name": "Cart Ring", "price": 1500.0, "category": "Rings"}
+
+
+@pytest.fixture(scope="module")
+def product(client):
+    response = client.post("/api/products/", json=PRODUCT)
+    assert response.status_code == 201, response.text
+    return PRODUCT["id"]
+
+
+def test_empty_and_missing_options_are_one_line(client, product):
+    headers = register(client, "cart-options@example.com")
+    
+    for size in ("", None, ""):
+        response = client.post("/api/cart/items", headers=headers,
+                               json={"product_id": product, "quantity": 1, "size": size, "color": None})
+        assert response.status_code == 201, response.text
+    
+    [line] = client.get("/api/cart/", headers=headers).json()
+    assert line["quantity"] == 3
+    assert line["size"] is None
+
+
+def test_sign_in_merges_guest_lines_with_empty_options(client, product):
+    headers = register(client, "cart-guest@example.com")
+    client.post("/api/cart/items", headers=headers, json={"product_id": product, "quantity": 1})
+    
+    for size in ("", None):
+        response = client.post("/api/cart/guest/items", json={"product_id": product, "quantity": 2, "size": size})
+        assert response.status_code == 201, response.text
+    assert len(client.get("/api/cart/guest").json()) == 1
+    
+    response = client.post("/api/auth/login", json={"email": "cart-guest@example.com", "password": "secret123"})
+    assert response.status_code == 200, response.text
+    assert "guest_cart" not in client.cookies
+    
+    [line] = client.get("/api/cart/", headers=headers).json()
+    assert line["quantity"] == 5
+
+
+def test_overview_cart_is_the_priced_summary(client, product):
+    headers = register(client, "cart-overview@example.com")
+    client.post("/api/cart/items", headers=headers, json={"product_id": product, "quantity": 2})
+    
+    summary = client.get("/api/cart/summary", headers=headers).json()
+    assert summary["tax"] > 0
+    assert client.get("/api/users/me/overview", headers=headers).json()["cart"] == summary
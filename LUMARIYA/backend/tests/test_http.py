@@ -0,0 +1,72 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.utils.http import CircuitOpenError, SharedHTTPClient
+
+HOST = "provider.test"
+
+
+class StubPool:
+    """Stands in for the shared connection pool."""
+
+    def __init__(self, outcome):
+        self.outcome = outcome
+
+    async def handle_async_request(self, request):
+        if isinstance(self.outcome, BaseException):
+            raise self.outcome
+        return httpx.Response(self.outcome)
+
+
+def half_open_client(outcome) -> SharedHTTPClient:
+    """Client whose breaker for HOST has opened and is due a trial call."""
+    client = SharedHTTPClient(timeout=1.0, max_connections=1, failure_threshold=1, reset_timeout=0.0)
+    client._pool = StubPool(outcome)
+    client.breaker(HOST).record_failure()
+    return client
+
+
+def send(client: SharedHTTPClient):
+    request = httpx.Request("GET", f"https://{HOST}/userinfo")
+    return asyncio.run(client.transport.handle_async_request(request))
+
+
+def test_cancelled_trial_lets_the_next_trial_through():
+    client = half_open_client(asyncio.CancelledError())
+    breaker = client.breaker(HOST)
+
+    with pytest.raises(asyncio.CancelledError):
+        send(client)
+
+    assert breaker.state == "half-open"
+    assert breaker.before_call() is True
+
+
+def test_trial_in_flight_rejects_other_calls():
+    client = half_open_client(200)
+    breaker = client.breaker(HOST)
+
+    assert breaker.before_call() is True
+    with pytest.raises(CircuitOpenError):
+        send(client)
+
+
+def test_successful_trial_closes_the_circuit():
+    client = half_open_client(200)
+
+    assert send(client).status_code == 200
+    assert client.breaker(HOST).state == "closed"
+
+
+def test_failed_trial_reopens_the_circuit():
+    client = half_open_client(httpx.ConnectError("refused"))
+    breaker = client.breaker(HOST)
+    breaker.reset_timeout = 60.0
+    breaker.opened_at -= 60.0
+
+    with pytest.raises(httpx.ConnectError):
+        send(client)
+
+    assert breaker.state == "open"
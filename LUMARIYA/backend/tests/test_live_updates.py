@@ -0,0 +1,37 @@
+import asyncio
+import time
+
+from app.utils.live_updates import LiveUpdateHub, event_stream
+
+
+async def read_stream(**kwargs) -> list:
+    hub = LiveUpdateHub(queue_size=10)
+    stream = event_stream(hub, "user:1", heartbeat=0.05, **kwargs)
+    messages = []
+    async for message in stream:
+        messages.append(message)
+        if len(messages) > 20:
+            break
+    return messages
+
+
+def test_stream_ends_when_its_token_expires():
+    started = time.time()
+    messages = asyncio.run(asyncio.wait_for(read_stream(expires_at=started + 0.12), timeout=5))
+
+    assert messages[-1].startswith("event: unauthorized")
+    assert time.time() - started < 1
+    assert messages.count(": keepalive\n\n") in (1, 2)
+
+
+def test_stream_ends_on_the_heartbeat_after_revocation():
+    checks = []
+
+    def revoked() -> bool:
+        checks.append(True)
+        return len(checks) > 2
+
+    messages = asyncio.run(asyncio.wait_for(read_stream(revoked=revoked), timeout=5))
+
+    assert messages[-1].startswith("event: unauthorized")
+    assert messages.count(": keepalive\n\n") == 2
@@ -0,0 +1,45 @@
+import pytest
+
+from tests.conftest import register, run_sql
+from tests.test_query_budgets import ADDRESS
+
+PRODUCT = {"id": "PAGE-RING-1", "name": "Page Ring", "price": 800.0, "category": "Rings"}
+
+
+@pytest.fixture(scope="module")
+def product(client):
+    response = client.post("/api/products/", json=PRODUCT)
+    assert response.status_code == 201, response.text
+    return PRODUCT["id"]
+
+
+def pages(client, path: str, headers: dict, **params) -> list:
+    """Ids of every order listed at path, one order per page."""
+    ids = []
+    cursor = {}
+    while True:
+        response = client.get(path, headers=headers, params={"limit": 1, **params, **cursor})
+        assert response.status_code == 200, response.text
+        page = response.json()
+        if not page:
+            return ids
+        ids.append(page[0]["id"])
+        cursor = {"before": page[0]["created_at"], "before_id": page[0]["id"]}
+
+
+def test_orders_created_at_the_same_instant_are_all_listed(client, product):
+    customer = register(client, "page-customer@example.com")
+    admin = register(client, "page-admin@example.com", admin=True)
+    order_ids = [
+        client.post("/api/orders/", headers=customer, json={
+            "items": [{"product_id": product, "quantity": 1}],
+            "shipping_address": ADDRESS,
+        }).json()["id"]
+        for _ in range(3)
+    ]
+    run_sql(client, "UPDATE order_summaries SET created_at = '2030-01-01T00:00:00Z' WHERE order_id = ANY(:ids)",
+            ids=order_ids)
+
+    expected = sorted(order_ids, reverse=True)
+    assert pages(client, "/api/orders/", customer) == expected
+    assert pages(client, "/api/admin/orders", admin, status="pending")[:3] == expected
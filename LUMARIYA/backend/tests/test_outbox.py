@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+from sqlalchemy import func, select, update
+
+from app.database import AsyncSessionLocal
+from app.models.outbox import OutboxEvent
+from app.utils.outbox import OutboxWorker, enqueue, outbox_handler
+
+# Ids of the events the test.ok handler received
+handled = []
+
+
+@outbox_handler("test.ok")
+async def succeed(event: OutboxEvent) -> None:
+    handled.append(event.id)
+
+
+@outbox_handler("test.broken")
+async def fail(event: OutboxEvent) -> None:
+    raise RuntimeError("handler failed")
+
+
+@outbox_handler("test.slow")
+async def outlive_lease(event: OutboxEvent) -> None:
+    # As if the lease ran out and another worker claimed the event again
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id == event.id)
+            .values(available_at=OutboxEvent.available_at + timedelta(seconds=1))
+        )
+        await session.commit()
+
+
+def worker(max_attempts: int = 3) -> OutboxWorker:
+    return OutboxWorker(AsyncSessionLocal, batch_size=10, lease_seconds=60, max_attempts=max_attempts,
+                        poll_interval=1)
+
+
+async def enqueue_event(event_type: str = "test.claimed") -> int:
+    async with AsyncSessionLocal() as session:
+        event = enqueue(session, event_type, 1, {})
+        await session.commit()
+        return event.id
+
+
+async def stored_event(event_id: int) -> OutboxEvent:
+    async with AsyncSessionLocal() as session:
+        return await session.get(OutboxEvent, event_id)
+
+
+async def is_due(event_id: int) -> bool:
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(OutboxEvent.available_at <= func.now()).where(OutboxEvent.id == event_id)
+        )
+        return result.scalar_one()
+
+
+def test_claim_counts_one_attempt(client):
+    event_id = client.portal.call(enqueue_event)
+    
+    claimed = client.portal.call(worker().claim)
+    
+    assert [event.attempts for event in claimed if event.id == event_id] == [1]
+    assert client.portal.call(stored_event, event_id).attempts == 1
+    # Leased, so not claimed again
+    assert event_id not in [event.id for event in client.portal.call(worker().claim)]
+
+
+def test_dispatched_event_is_done(client):
+    event_id = client.portal.call(enqueue_event, "test.ok")
+    
+    client.portal.call(worker().drain)
+    
+    event = client.portal.call(stored_event, event_id)
+    assert event_id in handled
+    assert (event.status, event.attempts, event.processed_at is not None) == ("done", 1, True)
+
+
+def test_failed_event_is_retried_with_backoff(client):
+    event_id = client.portal.call(enqueue_event, "test.broken")
+    
+    client.portal.call(worker().drain)
+    
+    event = client.portal.call(stored_event, event_id)
+    assert (event.status, event.attempts) == ("pending", 1)
+    assert "handler failed" in event.last_error
+    assert not client.portal.call(is_due, event_id)
+
+
+def test_event_fails_after_max_attempts(client):
+    event_id = client.portal.call(enqueue_event, "test.broken")
+    
+    client.portal.call(worker(max_attempts=1).drain)
+    
+    event = client.portal.call(stored_event, event_id)
+    assert (event.status, event.attempts, event.processed_at is not None) == ("failed", 1, True)
+
+
+def test_event_that_lost_its_lease_is_left_to_its_new_owner(client):
+    event_id = client.portal.call(enqueue_event, "test.slow")
+    
+    client.portal.call(worker().run_once)
+    
+    event = client.portal.call(stored_event, event_id)
+    assert (event.status, event.processed_at) == ("pending", None)
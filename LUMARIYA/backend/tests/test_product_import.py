@@ -0,0 +1,45 @@
+import io
+import time
+
+from app.utils.product_import import ProductImport
+from tests.conftest import register
+
+FEED = (
+    "id,name,price,category,materials\n"
+    "IMP-1,Import Ring,1200,Rings,18k Gold|Diamond\n"
+    "IMP-2,,900,Rings,\n"
+    "IMP-3,Import Cuff,-5,Bracelets,\n"
+)
+
+
+def test_every_row_error_reaches_on_error():
+    seen = []
+    product_import = ProductImport(io.StringIO(FEED), "csv", batch_size=10, max_errors=1, on_error=seen.append)
+
+    product_import._next_batch()
+
+    assert [error["id"] for error in seen] == ["IMP-2", "IMP-3"]
+    assert [error["id"] for error in product_import.errors] == ["IMP-2"]
+
+
+def test_upload_is_imported_in_the_background(client):
+    admin = register(client, "import-admin@example.com", admin=True)
+
+    response = client.post("/api/admin/products/import", headers=admin,
+                           files={"file": ("feed.csv", FEED.encode(), "text/csv")})
+    assert response.status_code == 202, response.text
+    job = response.json()
+
+    deadline = time.monotonic() + 10
+    while job["status"] in ("queued", "running") and time.monotonic() < deadline:
+        time.sleep(0.05)
+        job = client.get(f"/api/admin/products/import/{job['id']}", headers=admin).json()
+
+    assert job["status"] == "done", job
+    assert (job["summary"]["inserted"], job["summary"]["failed"]) == (1, 2)
+    assert client.get("/api/products/IMP-1").status_code == 200
+
+
+def test_unknown_import_job(client):
+    admin = register(client, "import-admin-2@example.com", admin=True)
+    assert client.get("/api/admin/products/import/nope", headers=admin).status_code == 404
@@ -0,0 +1,151 @@
+import pytest
+
+from app.main import app
+from app.utils.query_budget import count_queries, route_budget, routes_without_budget
+from tests.conftest import register
+
+PRODUCT = {
+    "id": "QB-RING-1",
+    "name": "Budget Ring",
+    "price": 2400.0,
+    "category": "Rings",
+    "materials": ["18k Gold"],
+    "colors": [{"name": "Gold", "hex": "#D4AF37", "available": True}],
+}
+ADDRESS = {
+    "full_name": "Budget Tester",
+    "address_line1": "1 Query Street",
+    "city": "Mumbai",
+    "state": "Maharashtra",
+    "zip_code": "400001",
+    "country": "India",
+}
+
+
+def call(client, method: str, path: str, headers=None, **kwargs):
+    """Make a request and fail if it exceeds its route's budget or repeats a statement."""
+    with count_queries() as log:
+        response = client.request(method, path, headers=headers, **kwargs)
+    assert response.status_code < 400, f"{method} {path}: {response.status_code} {response.text}"
+
+    label = f"{method} {path}"
+    log.assert_within(route_budget(app, method, path.split("?")[0]), label)
+    log.assert_no_repeats(label=label)
+    return response
+
+
+def test_every_route_declares_a_budget():
+    assert routes_without_budget(app) == []
+
+
+@pytest.fixture(scope="module")
+def admin(client):
+    return register(client, "budget-admin@example.com", admin=True)
+
+
+@pytest.fixture(scope="module")
+def customer(client, admin):
+    headers = register(client, "budget-customer@example.com")
+    call(client, "POST", "/api/products/", json=PRODUCT)
+    call(client, "POST", "/api/products/", json={**PRODUCT, "id": "QB-RING-2", "name": "Second Ring"})
+    return headers
+
+
+def test_auth_routes(client):
+    call(client, "POST", "/api/auth/register",
+         json={"email": "budget-auth@example.com", "password": "secret123", "full_name": "Auth"})
+    token = call(client, "POST", "/api/auth/login",
+                 json={"email": "budget-auth@example.com", "password": "secret123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    call(client, "GET", "/api/auth/me", headers)
+    call(client, "POST", "/api/auth/logout", headers)
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
+
+
+def test_catalog_routes(client, customer):
+    call(client, "GET", "/api/products/")
+    call(client, "GET", "/api/products/?category=Rings&sort=price&material=18k%20Gold")
+    call(client, "GET", "/api/products/facets")
+    call(client, "GET", f"/api/products/{PRODUCT['id']}")
+    call(client, "GET", f"/api/products/{PRODUCT['id']}/related")
+    call(client, "PUT", "/api/products/QB-RING-2", json={"price": 2600.0})
+    call(client, "POST", "/api/events/view", json={"product_id": PRODUCT["id"]})
+
+
+def test_cart_and_checkout_routes(client, customer):
+    item = call(client, "POST", "/api/cart/items", customer,
+                json={"product_id": PRODUCT["id"], "quantity": 1, "size": "M"}).json()
+    call(client, "POST", "/api/cart/items", customer,
+         json={"product_id": PRODUCT["id"], "quantity": 1, "size": "M"})
+    call(client, "POST", "/api/cart/items", customer, json={"product_id": "QB-RING-2", "quantity": 2})
+    call(client, "GET", "/api/cart/", customer)
+    call(client, "PUT", f"/api/cart/items/{item['id']}", customer, json={"quantity": 3})
+    call(client, "GET", "/api/cart/summary", customer)
+    call(client, "GET", "/api/cart/summary", customer)
+
+    order = call(client, "POST", "/api/orders/", customer, json={
+        "items": [{"product_id": PRODUCT["id"], "quantity": 3}, {"product_id": "QB-RING-2", "quantity": 2}],
+        "shipping_address": ADDRESS,
+    }).json()
+    call(client, "GET", "/api/orders/", customer)
+    call(client, "GET", f"/api/orders/{order['id']}", customer)
+    call(client, "GET", "/api/users/me/overview", customer)
+
+    call(client, "DELETE", f"/api/cart/items/{item['id']}", customer)
+    call(client, "DELETE", "/api/cart/", customer)
+
+
+def test_guest_cart_routes(client, customer):
+    call(client, "POST", "/api/cart/guest/items", json={"product_id": PRODUCT["id"], "quantity": 1})
+    call(client, "GET", "/api/cart/guest")
+    call(client, "GET", "/api/cart/guest/summary")
+    call(client, "PUT", "/api/cart/guest/items/0", json={"quantity": 2})
+    call(client, "POST", "/api/auth/login",
+         json={"email": "budget-customer@example.com", "password": "secret123"})
+    call(client, "DELETE", "/api/cart/guest")
+    client.cookies.clear()
+
+
+def test_account_routes(client, customer):
+    call(client, "GET", "/api/users/profile", customer)
+    call(client, "PUT", "/api/users/profile", customer, json={"full_name": "Budget Customer"})
+    address = call(client, "POST", "/api/users/addresses", customer, json=ADDRESS).json()
+    call(client, "GET", "/api/users/addresses", customer)
+    call(client, "PUT", f"/api/users/addresses/{address['id']}", customer, json={"city": "Pune"})
+    call(client, "DELETE", f"/api/users/addresses/{address['id']}", customer)
+
+
+def test_admin_routes(client, admin, customer):
+    call(client, "GET", "/api/admin/stats", admin)
+    call(client, "GET", "/api/admin/analytics", admin)
+    orders = call(client, "GET", "/api/admin/orders", admin).json()
+    call(client, "GET", "/api/admin/users", admin)
+    call(client, "GET", "/api/admin/slow-queries", admin)
+    rule = call(client, "POST", "/api/admin/pricing-rules", admin,
+                json={"kind": "promotion", "name": "Welcome", "code": "welcome10", "percent": 10}).json()
+    call(client, "GET", "/api/admin/pricing-rules", admin)
+    call(client, "GET", "/api/cart/summary?coupon=WELCOME10", customer)
+    call(client, "DELETE", f"/api/admin/pricing-rules/{rule['id']}", admin)
+    if orders:
+        call(client, "GET", f"/api/admin/orders/{orders[0]['id']}", admin)
+        call(client, "PUT", "/api/admin/orders/status", admin,
+             json={"new_status": "processing", "order_ids": [orders[0]["id"]]})
+        call(client, "PUT", f"/api/orders/{orders[0]['id']}/status?new_status=shipped", admin)
+
+
+def test_order_status_requires_admin_and_a_valid_transition(client, admin, customer):
+    order = call(client, "POST", "/api/orders/", customer, json={
+        "items": [{"product_id": PRODUCT["id"], "quantity": 1}],
+        "shipping_address": ADDRESS,
+    }).json()
+    path = f"/api/orders/{order['id']}/status"
+
+    assert client.put(path, params={"new_status": "cancelled"}, headers=customer).status_code == 403
+    assert client.put(path, params={"new_status": "delivered"}, headers=admin).status_code == 400
+    call(client, "PUT", f"{path}?new_status=cancelled", admin)
+    assert client.put(path, params={"new_status": "processing"}, headers=admin).status_code == 400
+
+
+def test_views_of_unknown_products_are_rejected(client, customer):
+    assert client.post("/api/events/view", json={"product_id": "NO-SUCH-PRODUCT"}).status_code == 404
@@ -0,0 +1,125 @@
+import asyncio
+import math
+
+import pytest
+
+from app.utils import rate_limit
+from app.utils.rate_limit import MemoryBucketStore, RedisBucketStore
+
+lupa = pytest.importorskip("lupa")
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeRedis:
+    """In-process Redis stand-in that runs EVAL scripts with Lua (lupa).
+
+    Implements the commands the token bucket script uses, reads TIME from
+    the given clock, and converts replies like Redis does (Lua numbers are
+    truncated to integers, strings become bytes).
+    """
+
+    def __init__(self, clock: Clock):
+        self.clock = clock
+        self.hashes = {}
+        self.expires_at = {}
+        self.lua = lupa.LuaRuntime()
+        self.lua.execute("redis = {}")
+        self.lua.globals().redis.call = self._call
+
+    def _live(self, key):
+        if key in self.expires_at and self.expires_at[key] <= self.clock():
+            self.hashes.pop(key, None)
+            self.expires_at.pop(key, None)
+        return self.hashes.setdefault(key, {})
+
+    def exists(self, key) -> bool:
+        return bool(self._live(key))
+
+    def _call(self, command, *args):
+        command = command.upper()
+        if command == "TIME":
+            seconds, fraction = divmod(self.clock(), 1)
+            return self.lua.table_from([str(int(seconds)), str(int(fraction * 1_000_000))])
+        key, *rest = args
+        if command == "HMGET":
+            values = self._live(key)
+            return self.lua.table_from([values.get(field) for field in rest])
+        if command == "HSET":
+            self._live(key).update(zip(rest[::2], rest[1::2]))
+            return len(rest) // 2
+        if command == "PEXPIRE":
+            self.expires_at[key] = self.clock() + rest[0] / 1000
+            return 1
+        raise NotImplementedError(command)
+
+    def _reply(self, value):
+        if lupa.lua_type(value) == "table":
+            return [self._reply(item) for item in value.values()]
+        if isinstance(value, str):
+            return value.encode()
+        if isinstance(value, float):
+            return int(value)
+        return value
+
+    async def eval(self, script, numkeys, *args):
+        keys, argv = args[:numkeys], args[numkeys:]
+        run = self.lua.eval(
+            "function(script, keys, argv) KEYS = keys ARGV = argv return load(script)() end"
+        )
+        result = run(
+            script,
+            self.lua.table_from(list(keys)),
+            self.lua.table_from([str(arg) for arg in argv]),
+        )
+        return self._reply(result)
+
+    async def aclose(self):
+        pass
+
+
+# (seconds since the previous attempt, cost) with a burst of 5 at 1 token/s
+ATTEMPTS = [(0, 1)] * 6 + [(0.5, 1), (0.6, 1), (0, 1), (10, 1), (0, 3), (0, 3), (2.25, 1), (0, 5)]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+
+def run_attempts(store, clock):
+    async def attempts():
+        results = []
+        for elapsed, cost in ATTEMPTS:
+            clock.now += elapsed
+            results.append(await store.consume("login:ip:10.0.0.1", 5, 1.0, cost))
+        return results
+    return asyncio.run(attempts())
+
+
+def test_redis_store_matches_memory_store(clock):
+    expected = run_attempts(MemoryBucketStore(), clock)
+    actual = run_attempts(RedisBucketStore(FakeRedis(clock)), clock)
+
+    assert [allowed for allowed, _ in actual] == [allowed for allowed, _ in expected]
+    for (_, retry_after), (_, expected_retry) in zip(actual, expected):
+        assert math.isclose(retry_after, expected_retry, abs_tol=1e-5)
+
+
+def test_redis_bucket_expires_once_full_again(clock):
+    redis = FakeRedis(clock)
+    store = RedisBucketStore(redis)
+
+    asyncio.run(store.consume("register:ip:10.0.0.1", 5, 1.0))
+    assert redis.exists("ratelimit:register:ip:10.0.0.1")
+    clock.now += 5.0
+
+    assert not redis.exists("ratelimit:register:ip:10.0.0.1")
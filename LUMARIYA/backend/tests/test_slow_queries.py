@@ -0,0 +1,38 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.utils.slow_queries import SlowQueryLog
+
+
+def instrumented_log(threshold_ms: float = 0.0) -> SlowQueryLog:
+    log = SlowQueryLog(threshold_ms=threshold_ms, sample_rate=0.0, explain_interval=0.0, max_fingerprints=10)
+    engine = create_engine("sqlite://")
+    log.instrument(engine)
+    log.engine = engine
+    return log
+
+
+def test_failed_statements_are_recorded():
+    log = instrumented_log()
+    
+    with log.engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing_table WHERE id = 1"))
+    
+    [entry] = log.top(10)
+    assert entry["calls"] == 1
+    assert entry["errors"] == 1
+    assert entry["slowCalls"] == 1
+
+
+def test_successful_statements_have_no_errors():
+    log = instrumented_log(threshold_ms=60000)
+    
+    with log.engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    
+    [entry] = log.top(10)
+    assert entry["calls"] == 1
+    assert entry["errors"] == 0
+    assert entry["slowCalls"] == 0
@@ -0,0 +1,16 @@
+from app.main import app
+from app.utils.timeouts import CANCEL_ON_DISCONNECT
+
+
+def route_labels() -> set:
+    return {f"{method} {route.path}" for route in app.routes for method in getattr(route, "methods", ())}
+
+
+def test_read_only_routes_exist():
+    assert CANCEL_ON_DISCONNECT - route_labels() == set()
+
+
+def test_oauth_callbacks_are_not_cancelled_on_disconnect():
+    callbacks = {label for label in route_labels() if label.endswith("/callback")}
+    assert callbacks
+    assert callbacks.isdisjoint(CANCEL_ON_DISCONNECT)
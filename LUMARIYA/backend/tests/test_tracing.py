@@ -0,0 +1,30 @@
+import json
+import threading
+
+import pytest
+
+from app.utils.tracing import FileExporter, SpanExporter
+
+
+def test_file_exporter_writes_on_its_own_thread(tmp_path, monkeypatch):
+    path = tmp_path / "spans.jsonl"
+    exporter = FileExporter(str(path))
+    writers = []
+    original = exporter._write
+
+    def write():
+        writers.append(threading.current_thread())
+        original()
+
+    monkeypatch.setattr(exporter, "_write", write)
+    exporter.export([{"spanId": "a"}])
+    exporter.export([{"spanId": "b"}, {"spanId": "c"}])
+    exporter.shutdown()
+
+    assert writers and writers[0] is not threading.current_thread()
+    assert [json.loads(line)["spanId"] for line in path.read_text().splitlines()] == ["a", "b", "c"]
+
+
+def test_exporters_must_implement_export():
+    with pytest.raises(TypeError):
+        SpanExporter()
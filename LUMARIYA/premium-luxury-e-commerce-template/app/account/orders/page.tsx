@@ -8,7 +8,7 @@ import { ChevronDown, Package, Truck, CheckCircle, AlertCircle } from "lucide-re
 import { Navigation } from "@/components/navigation"
 import { PremiumFooter } from "@/components/premium-footer"
 import { AccountSidebar } from "@/components/account-sidebar"
-import { fetchUserOrders } from "@/lib/api"
+import { ORDER_PAGE_SIZE, fetchUserOrder, fetchUserOrders } from "@/lib/api"
 import { format } from "date-fns"
 
 const StatusIcon = ({ status }: { status: string }) => {
@@ -41,12 +41,18 @@ export default function OrdersPage() {
   const [orders, setOrders] = useState<any[]>([])
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
+  const [hasMore, setHasMore] = useState(false)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [expandedOrder, setExpandedOrder] = useState<number | null>(null)
+  // Items and price breakdown of expanded orders; the list only has summaries
+  const [details, setDetails] = useState<Record<number, any>>({})
+  const [detailErrors, setDetailErrors] = useState<Record<number, boolean>>({})
 
   useEffect(() => {
     fetchUserOrders()
       .then((data) => {
         setOrders(data)
+        setHasMore(data.length === ORDER_PAGE_SIZE)
         if (data.length > 0) {
           setExpandedOrder(data[0].id)
         }
@@ -58,6 +64,29 @@ export default function OrdersPage() {
       .finally(() => setLoading(false))
   }, [])
 
+  const loadMore = () => {
+    setLoadingMore(true)
+    fetchUserOrders({ before: orders[orders.length - 1] })
+      .then((data) => {
+        setOrders((loaded) => [...loaded, ...data])
+        setHasMore(data.length === ORDER_PAGE_SIZE)
+      })
+      .catch((err) => console.error("Failed to load more orders:", err))
+      .finally(() => setLoadingMore(false))
+  }
+
+  useEffect(() => {
+    if (expandedOrder === null || details[expandedOrder]) return
+    const orderId = expandedOrder
+    setDetailErrors((errors) => ({ ...errors, [orderId]: false }))
+    fetchUserOrder(orderId)
+      .then((order) => setDetails((loaded) => ({ ...loaded, [orderId]: order })))
+      .catch((err) => {
+        console.error("Failed to load order:", err)
+        setDetailErrors((errors) => ({ ...errors, [orderId]: true }))
+      })
+  }, [expandedOrder])
+
   return (
     <>
       <Navigation />
@@ -114,7 +143,7 @@ export default function OrdersPage() {
                       key={order.id}
                       initial={{ opacity: 0, y: 20 }}
                       animate={{ opacity: 1, y: 0 }}
-                      transition={{ duration: 0.4, delay: index * 0.1 }}
+                      transition={{ duration: 0.4, delay: (index % ORDER_PAGE_SIZE) * 0.1 }}
                       className="border border-border"
                     >
                       {/* Order header */}
@@ -131,6 +160,10 @@ export default function OrdersPage() {
                             <StatusIcon status={order.status} />
                             {order.status}
                           </span>
+                          <span className="text-sm text-muted-foreground">
+                            {order.first_product_name ? `${order.first_product_name} · ` : ""}
+                            {order.item_count} {order.item_count === 1 ? "item" : "items"}
+                          </span>
                         </div>
                         <div className="flex items-center gap-4">
                           <span className="text-sm hidden sm:block">₹{order.total.toLocaleString()}</span>
@@ -152,60 +185,86 @@ export default function OrdersPage() {
                             className="overflow-hidden"
                           >
                             <div className="p-6 pt-0 border-t border-border">
-                              <div className="space-y-4 pt-6">
-                                {order.items.map((item: any) => (
-                                  <Link key={item.id} href={`/product/${item.product_id}`} className="flex gap-4 group">
-                                    <div className="w-16 h-20 bg-muted flex-shrink-0 relative overflow-hidden">
-                                      <Image
-                                        src={"/placeholder.svg"} // Backend doesn't always provide item images in the order list
-                                        alt={item.product_name}
-                                        fill
-                                        sizes="64px"
-                                        loading="lazy"
-                                        className="object-cover group-hover:scale-105 transition-transform duration-500"
-                                      />
+                              {detailErrors[order.id] ? (
+                                <p className="pt-6 text-sm text-red-700">Unable to load this order. Please try again later.</p>
+                              ) : !details[order.id] ? (
+                                <div className="space-y-4 pt-6">
+                                  {[...Array(Math.min(order.item_count, 3))].map((_, i) => (
+                                    <div key={i} className="h-20 bg-muted animate-pulse" />
+                                  ))}
+                                </div>
+                              ) : (
+                                <>
+                                  <div className="space-y-4 pt-6">
+                                    {details[order.id].items.map((item: any) => (
+                                      <Link key={item.id} href={`/product/${item.product_id}`} className="flex gap-4 group">
+                                        <div className="w-16 h-20 bg-muted flex-shrink-0 relative overflow-hidden">
+                                          <Image
+                                            src={"/placeholder.svg"} // Backend doesn't always provide item images in the order list
+                                            alt={item.product_name}
+                                            fill
+                                            sizes="64px"
+                                            loading="lazy"
+                                            className="object-cover group-hover:scale-105 transition-transform duration-500"
+                                          />
+                                        </div>
+                                        <div className="flex-1">
+                                          <h4 className="font-serif text-sm group-hover:underline">{item.product_name}</h4>
+                                          <p className="text-xs text-muted-foreground mt-1">
+                                            Qty: {item.quantity} {item.color ? ` / ${item.color}` : ''}
+                                          </p>
+                                        </div>
+                                        <div className="text-sm">₹{item.price.toLocaleString()}</div>
+                                      </Link>
+                                    ))}
+                                  </div>
+
+                                  <div className="flex flex-col sm:flex-row justify-between items-start sm:items-center gap-4 mt-6 pt-6 border-t border-border">
+                                    <div className="text-sm flex flex-col gap-1">
+                                      <div className="text-muted-foreground">
+                                        Subtotal: <span className="text-foreground">₹{details[order.id].subtotal.toLocaleString()}</span>
+                                      </div>
+                                      {details[order.id].discount > 0 && (
+                                        <div className="text-muted-foreground">
+                                          Discount: <span className="text-foreground">−₹{details[order.id].discount.toLocaleString()}</span>
+                                        </div>
+                                      )}
+                                      <div className="text-muted-foreground">
+                                        Tax & Shipping: <span className="text-foreground">₹{(details[order.id].tax + details[order.id].shipping).toLocaleString()}</span>
+                                      </div>
+                                      <div className="mt-1">
+                                        <span className="text-muted-foreground">Total: </span>
+                                        <span className="font-medium">₹{order.total.toLocaleString()}</span>
+                                      </div>
                                     </div>
-                                    <div className="flex-1">
-                                      <h4 className="font-serif text-sm group-hover:underline">{item.product_name}</h4>
-                                      <p className="text-xs text-muted-foreground mt-1">
-                                        Qty: {item.quantity} {item.color ? ` / ${item.color}` : ''}
-                                      </p>
+                                    <div className="flex gap-4">
+                                      <button className="text-sm underline underline-offset-4 hover:no-underline transition-all">
+                                        View Invoice
+                                      </button>
+                                      {(order.status === "shipped" || order.status === "in transit") && (
+                                        <button className="text-sm underline underline-offset-4 hover:no-underline transition-all">
+                                          Track Order
+                                        </button>
+                                      )}
                                     </div>
-                                    <div className="text-sm">₹{item.price.toLocaleString()}</div>
-                                  </Link>
-                                ))}
-                              </div>
-
-                              <div className="flex flex-col sm:flex-row justify-between items-start sm:items-center gap-4 mt-6 pt-6 border-t border-border">
-                                <div className="text-sm flex flex-col gap-1">
-                                  <div className="text-muted-foreground">
-                                    Subtotal: <span className="text-foreground">₹{order.subtotal.toLocaleString()}</span>
-                                  </div>
-                                  <div className="text-muted-foreground">
-                                    Tax & Shipping: <span className="text-foreground">₹{(order.tax + order.shipping).toLocaleString()}</span>
                                   </div>
-                                  <div className="mt-1">
-                                    <span className="text-muted-foreground">Total: </span>
-                                    <span className="font-medium">₹{order.total.toLocaleString()}</span>
-                                  </div>
-                                </div>
-                                <div className="flex gap-4">
-                                  <button className="text-sm underline underline-offset-4 hover:no-underline transition-all">
-                                    View Invoice
-                                  </button>
-                                  {(order.status === "shipped" || order.status === "in transit") && (
-                                    <button className="text-sm underline underline-offset-4 hover:no-underline transition-all">
-                                      Track Order
-                                    </button>
-                                  )}
-                                </div>
-                              </div>
+                                </>
+                              )}
                             </div>
                           </motion.div>
                         )}
                       </AnimatePresence>
                     </motion.div>
                   ))}
+                  {hasMore && (
+                    <button
+                      onClick={loadMore}
+                      disabled={loadingMore}
+                      className="w-full py-4 border border-border text-sm tracking-[0.15em] uppercase hover:bg-muted/30 transition-colors disabled:opacity-50"
+                    >
+                      {loadingMore ? "Loading..." : "Load older orders"}
+                    </button>
+                  )}
                 </div>
               )}
             </motion.div>
@@ -1,13 +1,13 @@
 "use client"
 
-import { useEffect, useState } from 'react'
+import { Fragment, useEffect, useState } from 'react'
 import { useAuth } from '@/lib/auth-context'
 import { useRouter } from 'next/navigation'
 import Link from 'next/link'
-import { fetchAllOrders, updateOrderStatus } from '@/lib/api'
+import { ORDER_PAGE_SIZE, fetchAllOrders, fetchOrderDetails, updateOrderStatus } from '@/lib/api'
 import {
     Crown, ArrowLeft, ClipboardList,
-    CheckCircle, Clock, AlertCircle, XCircle, Truck
+    CheckCircle, Clock, AlertCircle, XCircle, Truck, ChevronDown
 } from 'lucide-react'
 
 const STATUS_OPTIONS = ['pending', 'processing', 'shipped', 'delivered', 'cancelled']
@@ -42,6 +42,11 @@ export default function AdminOrdersPage() {
     const [loading, setLoading] = useState(true)
     const [filter, setFilter] = useState('all')
     const [updating, setUpdating] = useState<number | null>(null)
+    const [hasMore, setHasMore] = useState(false)
+    const [loadingMore, setLoadingMore] = useState(false)
+    // Line items are not in the list; they are loaded when a row is expanded
+    const [expanded, setExpanded] = useState<number | null>(null)
+    const [details, setDetails] = useState<Record<number, any>>({})
 
     useEffect(() => {
         if (!isLoading) {
@@ -52,12 +57,17 @@ export default function AdminOrdersPage() {
 
     useEffect(() => {
         loadOrders()
-    }, [])
+    }, [filter])
+
+    // The status filter is applied by the API, so each page holds matching orders only
+    const statusParam = filter === 'all' ? undefined : filter
 
     const loadOrders = async () => {
+        setLoading(true)
         try {
-            const data = await fetchAllOrders()
+            const data = await fetchAllOrders({ status: statusParam })
             setOrders(data)
+            setHasMore(data.length === ORDER_PAGE_SIZE)
         } catch (err) {
             console.error('Failed to load orders:', err)
         } finally {
@@ -65,6 +75,19 @@ export default function AdminOrdersPage() {
         }
     }
 
+    const loadMore = async () => {
+        setLoadingMore(true)
+        try {
+            const data = await fetchAllOrders({ status: statusParam, before: orders[orders.length - 1] })
+            setOrders(loaded => [...loaded, ...data])
+            setHasMore(data.length === ORDER_PAGE_SIZE)
+        } catch (err) {
+            console.error('Failed to load more orders:', err)
+        } finally {
+            setLoadingMore(false)
+        }
+    }
+
     const handleStatusUpdate = async (orderId: number, newStatus: string) => {
         setUpdating(orderId)
         try {
@@ -77,6 +100,23 @@ export default function AdminOrdersPage() {
         }
     }
 
+    const toggleItems = async (orderId: number) => {
+        if (expanded === orderId) {
+            setExpanded(null)
+            return
+        }
+        setExpanded(orderId)
+        if (details[orderId]) return
+        try {
+            const order = await fetchOrderDetails(orderId)
+            setDetails(loaded => ({ ...loaded, [orderId]: order }))
+        } catch (err) {
+            console.error('Failed to load order details:', err)
+            setExpanded(current => current === orderId ? null : current)
+            alert('Failed to load order items')
+        }
+    }
+
     const filteredOrders = filter === 'all'
         ? orders
         : orders.filter(o => o.status === filter)
@@ -158,7 +198,8 @@ export default function AdminOrdersPage() {
                             </thead>
                             <tbody className="divide-y divide-border">
                                 {filteredOrders.map((order) => (
-                                    <tr key={order.id} className="hover:bg-foreground/[0.02] transition-colors">
+                                    <Fragment key={order.id}>
+                                    <tr className="hover:bg-foreground/[0.02] transition-colors">
                                         <td className="py-4 px-6 text-sm font-light">#{order.id}</td>
                                         <td className="py-4 px-6">
                                             <div>
@@ -167,7 +208,20 @@ export default function AdminOrdersPage() {
                                             </div>
                                         </td>
                                         <td className="py-4 px-6 text-sm text-foreground/60 font-light">
-                                            {order.items?.length || 0} item{(order.items?.length || 0) !== 1 ? 's' : ''}
+                                            <button
+                                                onClick={() => toggleItems(order.id)}
+                                                className="flex items-center gap-2 text-left hover:text-foreground transition-colors"
+                                            >
+                                                <div>
+                                                    <p>{order.item_count} item{order.item_count !== 1 ? 's' : ''}</p>
+                                                    {order.first_product_name && (
+                                                        <p className="text-xs text-foreground/40">
+                                                            {order.first_product_name}
+                                                        </p>
+                                                    )}
+                                                </div>
+                                                <ChevronDown className={`w-3 h-3 transition-transform ${expanded === order.id ? 'rotate-180' : ''}`} />
+                                            </button>
                                         </td>
                                         <td className="py-4 px-6 text-sm font-light">₹{order.total?.toLocaleString()}</td>
                                         <td className="py-4 px-6">
@@ -192,9 +246,40 @@ export default function AdminOrdersPage() {
                                             </select>
                                         </td>
                                     </tr>
+                                    {expanded === order.id && (
+                                        <tr className="bg-foreground/[0.02]">
+                                            <td colSpan={7} className="py-4 px-6">
+                                                {!details[order.id] ? (
+                                                    <div className="h-4 bg-muted w-64 animate-pulse" />
+                                                ) : (
+                                                    <ul className="space-y-2">
+                                                        {details[order.id].items.map((item: any) => (
+                                                            <li key={item.id} className="flex justify-between text-sm font-light">
+                                                                <span>
+                                                                    {item.product_name}
+                                                                    <span className="text-foreground/40"> × {item.quantity}{item.color ? ` / ${item.color}` : ''}</span>
+                                                                </span>
+                                                                <span>₹{item.price?.toLocaleString()}</span>
+                                                            </li>
+                                                        ))}
+                                                    </ul>
+                                                )}
+                                            </td>
+                                        </tr>
+                                    )}
+                                    </Fragment>
                                 ))}
                             </tbody>
                         </table>
+                        {hasMore && (
+                            <button
+                                onClick={loadMore}
+                                disabled={loadingMore}
+                                className="w-full py-4 border-t border-border text-xs uppercase tracking-wider text-foreground/60 hover:bg-foreground/[0.02] transition-colors disabled:opacity-50"
+                            >
+                                {loadingMore ? 'Loading...' : 'Load older orders'}
+                            </button>
+                        )}
                     </div>
                 )}
             </div>
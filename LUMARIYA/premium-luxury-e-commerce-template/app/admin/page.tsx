@@ -46,8 +46,8 @@ export default function AdminPage() {
                 .then(setStats)
                 .catch(err => console.error('Failed to load stats:', err))
 
-            fetchAllOrders()
-                .then(orders => setRecentOrders(orders.slice(0, 4)))
+            fetchAllOrders({ limit: 4 })
+                .then(setRecentOrders)
                 .catch(err => console.error('Failed to load orders:', err))
         }
     }, [user])
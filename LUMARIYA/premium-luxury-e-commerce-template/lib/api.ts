@@ -92,22 +92,59 @@ export async function fetchAdminStats(): Promise<any> {
     return res.json()
 }
 
-export async function fetchAllOrders(): Promise<any[]> {
-    const res = await fetch(`${API_BASE}/api/admin/orders`, {
+// Order lists are paged newest first: pass the last order received as `before`
+// to get the next page; a page shorter than `limit` is the last
+export const ORDER_PAGE_SIZE = 50
+
+export interface OrderPageParams {
+    before?: { id: number; created_at: string }
+    limit?: number
+    status?: string
+}
+
+function orderPageQuery({ before, limit = ORDER_PAGE_SIZE, status }: OrderPageParams): string {
+    const params = new URLSearchParams({ limit: String(limit) })
+    if (before) {
+        // The id orders those created at the same instant
+        params.set('before', before.created_at)
+        params.set('before_id', String(before.id))
+    }
+    if (status) params.set('status', status)
+    return params.toString()
+}
+
+export async function fetchAllOrders(page: OrderPageParams = {}): Promise<any[]> {
+    const res = await fetch(`${API_BASE}/api/admin/orders?${orderPageQuery(page)}`, {
         headers: getAuthHeaders(),
     })
     if (!res.ok) throw new Error('Failed to fetch orders')
     return res.json()
 }
 
-export async function fetchUserOrders(): Promise<any[]> {
-    const res = await fetch(`${API_BASE}/api/orders/`, {
+export async function fetchUserOrders(page: Omit<OrderPageParams, 'status'> = {}): Promise<any[]> {
+    const res = await fetch(`${API_BASE}/api/orders/?${orderPageQuery(page)}`, {
         headers: getAuthHeaders(),
     })
     if (!res.ok) throw new Error('Failed to fetch user orders')
     return res.json()
 }
 
+export async function fetchOrderDetails(orderId: number): Promise<any> {
+    const res = await fetch(`${API_BASE}/api/admin/orders/${orderId}`, {
+        headers: getAuthHeaders(),
+    })
+    if (!res.ok) throw new Error('Failed to fetch order details')
+    return res.json()
+}
+
+export async function fetchUserOrder(orderId: number): Promise<any> {
+    const res = await fetch(`${API_BASE}/api/orders/${orderId}`, {
+        headers: getAuthHeaders(),
+    })
+    if (!res.ok) throw new Error('Failed to fetch order')
+    return res.json()
+}
+
 export async function updateOrderStatus(orderId: number, newStatus: string): Promise<any> {
     const res = await fetch(`${API_BASE}/api/orders/${orderId}/status?new_status=${encodeURIComponent(newStatus)}`, {
         method: 'PUT',